@@ -0,0 +1,53 @@
+# RentTracker/caches.py
+"""
+Builds settings.CACHES from environment variables.
+
+The cache holds the dashboard metrics, permission sets and list page
+fragments (tracker/metrics.py, tracker/permissions.py, tracker/fragments.py).
+CACHE_BACKEND picks where:
+  - locmem (the default): in each server process's memory. Fine for one
+    process; with several, each keeps its own copy.
+  - file: a directory on local disk (CACHE_LOCATION) shared by every process
+    on the machine.
+  - redis: a Redis server (CACHE_LOCATION, a redis:// URL) shared by every
+    process and machine. Needs the redis package.
+"""
+import importlib.util
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .database import _number
+
+DEFAULT_FILE_LOCATION = '/var/tmp/renttracker_cache'
+DEFAULT_REDIS_LOCATION = 'redis://127.0.0.1:6379/1'
+
+
+def cache_settings(env=None):
+    """settings.CACHES for CACHE_BACKEND in `env` (default: os.environ)."""
+    env = os.environ if env is None else env
+    backend = env.get('CACHE_BACKEND', 'locmem').lower()
+    location = env.get('CACHE_LOCATION')
+    if backend == 'locmem':
+        config = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': location or 'renttracker',
+        }
+    elif backend == 'file':
+        config = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location or DEFAULT_FILE_LOCATION,
+        }
+    elif backend == 'redis':
+        if importlib.util.find_spec('redis') is None:
+            raise ImproperlyConfigured("CACHE_BACKEND=redis needs the redis package: pip install redis.")
+        config = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': location or DEFAULT_REDIS_LOCATION,
+        }
+    else:
+        raise ImproperlyConfigured(f"Unknown CACHE_BACKEND {backend!r}; use 'locmem', 'file' or 'redis'.")
+    config['OPTIONS'] = {}
+    if backend != 'redis':
+        config['OPTIONS']['MAX_ENTRIES'] = _number(env, 'CACHE_MAX_ENTRIES', 10000) # Fragments are many small entries
+    return {'default': config}
@@ -0,0 +1,99 @@
+# RentTracker/database.py
+"""
+Builds settings.DATABASES from environment variables.
+
+DB_ENGINE=sqlite (the default) is for small installs. It's a single file,
+tuned for a web server:
+  - WAL journaling, so readers don't block the writer or each other;
+  - synchronous=NORMAL, which is safe with WAL and skips an fsync per commit;
+  - a busy timeout, so concurrent writers wait for the lock instead of failing;
+  - memory-mapped I/O and a larger page cache;
+  - IMMEDIATE transactions, which take the write lock up front instead of
+    failing when a read transaction tries to upgrade.
+
+DB_ENGINE=postgresql reads the SQL_* credentials (see .env.example) and
+either keeps connections open between requests (DB_CONN_MAX_AGE seconds,
+with health checks) or, with DB_POOL=true, uses Django's native connection
+pool. The pool needs psycopg 3 with its pool extra (psycopg[pool]) instead
+of psycopg2.
+"""
+import importlib.util
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=134217728', # 128 MB
+    'PRAGMA cache_size=-20000', # 20 MB
+    'PRAGMA temp_store=MEMORY',
+)
+
+
+def _bool(env, name, default=False):
+    return env.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def _number(env, name, default, kind=int):
+    value = env.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return kind(value)
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} must be a number, not {value!r}.")
+
+
+def sqlite_settings(env, base_dir):
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('SQLITE_PATH') or base_dir / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': _number(env, 'SQLITE_BUSY_TIMEOUT', 20, float), # Seconds to wait for the write lock
+        },
+    }
+    if _bool(env, 'SQLITE_TUNED', True):
+        config['OPTIONS'].update({
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+        })
+    return config
+
+
+def postgresql_settings(env):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('SQL_DATABASE'),
+        'USER': env.get('SQL_USER'),
+        'PASSWORD': env.get('SQL_PASSWORD'),
+        'HOST': env.get('SQL_HOST'),
+        'PORT': env.get('SQL_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if env.get('SQL_SSLMODE'):
+        config['OPTIONS']['sslmode'] = env['SQL_SSLMODE']
+    if _bool(env, 'DB_POOL'):
+        if importlib.util.find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured("DB_POOL=true needs psycopg 3 with the pool extra: pip install 'psycopg[binary,pool]'.")
+        config['OPTIONS']['pool'] = {
+            'min_size': _number(env, 'DB_POOL_MIN_SIZE', 2),
+            'max_size': _number(env, 'DB_POOL_MAX_SIZE', 10),
+            'timeout': _number(env, 'DB_POOL_TIMEOUT', 10, float), # Seconds to wait for a free connection
+        }
+        config['CONN_MAX_AGE'] = 0 # The pool owns connection lifetime; Django refuses both at once
+    else:
+        config['CONN_MAX_AGE'] = _number(env, 'DB_CONN_MAX_AGE', 60)
+    return config
+
+
+def database_settings(base_dir, env=None):
+    """settings.DATABASES for DB_ENGINE in `env` (default: os.environ)."""
+    env = os.environ if env is None else env
+    engine = env.get('DB_ENGINE', 'sqlite').lower()
+    if engine in ('sqlite', 'sqlite3'):
+        return {'default': sqlite_settings(env, base_dir)}
+    if engine in ('postgresql', 'postgres'):
+        return {'default': postgresql_settings(env)}
+    raise ImproperlyConfigured(f"Unknown DB_ENGINE {engine!r}; use 'sqlite' or 'postgresql'.")
@@ -14,6 +14,9 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 
+from .caches import cache_settings
+from .database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 # (Gemini version) Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -49,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tracker.middleware.RequestTimingMiddleware', # First, so it measures everything below it
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,7 +66,7 @@ ROOT_URLCONF = 'RentTracker.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'tracker.instrumentation.TimedDjangoTemplates', # DjangoTemplates plus render timing
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +74,7 @@ TEMPLATES = [
                 "django.template.context_processors.debug", # Add debug if not present
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
+                'tracker.permissions.permissions', # Replaces auth's `perms` with a per-request snapshot
                 'django.contrib.messages.context_processors.messages',
             ],
         },
@@ -82,23 +87,17 @@ WSGI_APPLICATION = 'RentTracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-# For using postgres
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': os.environ.get('SQL_DATABASE'),
-#         'USER': os.environ.get('SQL_USER'),
-#         'PASSWORD': os.environ.get('SQL_PASSWORD'),
-#         'HOST': os.environ.get('SQL_HOST'),
-#         'PORT': os.environ.get('SQL_PORT'),
-#     }
-# }
+# DB_ENGINE=sqlite (default, WAL-tuned) or postgresql (persistent connections,
+# or Django's connection pool with DB_POOL=true). See RentTracker/database.py.
+DATABASES = database_settings(BASE_DIR)
+
+# Cache for dashboard metrics, permission sets and list page fragments:
+# CACHE_BACKEND=locmem (default), file or redis. See RentTracker/caches.py.
+CACHES = cache_settings()
+
+# The model backend, with each user's permission set cached across requests
+# (see tracker/permissions.py).
+AUTHENTICATION_BACKENDS = ['tracker.permissions.CachedModelBackend']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -148,6 +147,62 @@ LOGOUT_REDIRECT_URL = 'tracker:home' # Redirect to the public home page after lo
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+# Request instrumentation (tracker/middleware.py). Timing headers are on in DEBUG by default.
+TRACKER_TIMING_HEADERS = os.environ.get('TRACKER_TIMING_HEADERS', str(DEBUG)).lower() in ('1', 'true', 'yes')
+# Most SQL queries each view may run, keyed by URL name. The session, user and
+# permission lookups count too. Over-budget requests are logged, or raise when enforced.
+TRACKER_QUERY_BUDGETS = {
+    'tracker:dashboard': 10,
+    'tracker:llc_list': 8,
+    'tracker:property_list': 8,
+    'tracker:tenant_list': 8,
+    'tracker:payment_list': 8,
+    'tracker:rent_roll': 8,
+    'tracker:delinquency_report': 8,
+    'tracker:analytics_report': 10,
+    'tracker:llc_statement': 12, # The first view of a period rolls up its missing months
+}
+TRACKER_ENFORCE_QUERY_BUDGETS = os.environ.get('TRACKER_ENFORCE_QUERY_BUDGETS', '').lower() in ('1', 'true', 'yes')
+# Seconds a cached list table or row is kept (tracker/fragments.py). Changes retire them sooner.
+TRACKER_FRAGMENT_TIMEOUT = int(os.environ.get('TRACKER_FRAGMENT_TIMEOUT', 60 * 60))
+
+# Monthly billing (the post_rent_charges command): days after the 1st that rent
+# may still be paid without a fee, and the flat late fee charged after that.
+LATE_FEE_GRACE_DAYS = int(os.environ.get('LATE_FEE_GRACE_DAYS', 5))
+LATE_FEE_AMOUNT = os.environ.get('LATE_FEE_AMOUNT', '50.00')
+
+# Annual LLC filing deadline, as MM-DD, for states without a FilingDeadline row
+# (see tracker/compliance.py; the refresh_filing_status command runs daily).
+LLC_FILING_DEADLINE = os.environ.get('LLC_FILING_DEADLINE', '04-15')
+
+# How model actions are logged: 'sync' (default) writes logs/actions.log and the console
+# during the save itself; 'queued' writes logs/actions.jsonl from a background thread in
+# batches, keeping disk writes off the request thread. Only the chosen mode's handler is set up.
+ACTION_LOG_MODE = os.environ.get('ACTION_LOG_MODE', 'sync')
+
+if ACTION_LOG_MODE == 'queued':
+    ACTION_LOG_HANDLERS = {
+        'action_log_queue': { # Action log as JSON lines, written by a background thread in batches
+            'level': 'INFO',
+            'class': 'tracker.log_handlers.BatchingFileHandler',
+            'filename': os.path.join(BASE_DIR, 'logs/actions.jsonl'),
+            'formatter': 'action_json',
+            'max_queue_size': int(os.environ.get('ACTION_LOG_QUEUE_SIZE', 10000)),
+            'batch_size': 500,
+            'flush_interval': 0.5,
+            'overflow': os.environ.get('ACTION_LOG_OVERFLOW', 'drop'), # 'drop' or 'block' (backpressure)
+        },
+    }
+else:
+    ACTION_LOG_HANDLERS = {
+        'action_log_file': { # Handler for our specific action logs
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': os.path.join(BASE_DIR, 'logs/actions.log'), # Log file path
+            'formatter': 'action_formatter',
+        },
+    }
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False, # Keep default Django loggers
@@ -165,18 +220,16 @@ LOGGING = {
             'style': '{',
             'datefmt': '%Y-%m-%d %H:%M:%S',
         },
+        'action_json': { # One JSON object per line, with the structured fields from signals.py
+            '()': 'tracker.log_handlers.JsonLinesFormatter',
+        },
     },
     'handlers': {
         'console': { # Logs to the console where runserver runs
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
-        'action_log_file': { # Handler for our specific action logs
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'logs/actions.log'), # Log file path
-            'formatter': 'action_formatter',
-        },
+        **ACTION_LOG_HANDLERS,
         # You might have other handlers like 'mail_admins' here
     },
     'loggers': {
@@ -186,7 +239,7 @@ LOGGING = {
             'propagate': True,
         },
         'tracker.actions': { # Our custom logger for model actions
-            'handlers': ['action_log_file', 'console'], # Log to both file and console
+            'handlers': ['action_log_queue'] if ACTION_LOG_MODE == 'queued' else ['action_log_file', 'console'],
             'level': 'INFO',
             'propagate': False, # Don't pass these logs up to the root logger
         },
@@ -0,0 +1,8 @@
+# conftest.py
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """Fail any test request that goes over its view's query budget (see TRACKER_QUERY_BUDGETS)."""
+    settings.TRACKER_ENFORCE_QUERY_BUDGETS = True
@@ -1,12 +1,24 @@
 # tracker/admin.py
 from django.contrib import admin
-from .models import LLC, Property, Tenant, Payment, PropertyFinancialHistory
+from .models import LLC, FilingDeadline, LLCFiling, Property, Tenant, Payment, PropertyFinancialHistory, LedgerEntry, TenantBalance, PropertyBalance
+
+class LLCFilingInline(admin.TabularInline):
+    model = LLCFiling
+    extra = 0
+    fields = ('year', 'filed_on', 'notes')
 
 @admin.register(LLC)
 class LLCAdmin(admin.ModelAdmin):
-    list_display = ('name', 'creation_date', 'last_filing_date', 'filing_current')
+    list_display = ('name', 'state', 'creation_date', 'last_filing_date', 'filing_due', 'filing_bucket', 'filing_current')
+    list_filter = ('filing_bucket', 'state')
     search_fields = ('name',)
     list_editable = ('filing_current',)
+    readonly_fields = ('filing_due', 'filing_bucket')
+    inlines = [LLCFilingInline]
+
+@admin.register(FilingDeadline)
+class FilingDeadlineAdmin(admin.ModelAdmin):
+    list_display = ('state', 'rule', 'month', 'day')
 
 class PropertyFinancialHistoryInline(admin.TabularInline):
     model = PropertyFinancialHistory
@@ -46,3 +58,36 @@ class PropertyFinancialHistoryAdmin(admin.ModelAdmin):
     search_fields = ('property__street_name', 'changed_by__username')
     raw_id_fields = ('property', 'changed_by')
     list_per_page = 25
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('entry_date', 'entry_type', 'amount', 'tenant', 'property', 'payment_id', 'period')
+    list_filter = ('entry_type', 'entry_date', 'property__llc')
+    search_fields = ('tenant__first_name', 'tenant__last_name', 'property__street_name')
+    raw_id_fields = ('tenant', 'property', 'payment')
+    date_hierarchy = 'entry_date'
+    list_per_page = 50
+
+    # The ledger is append-only; entries are only ever created by tracker.ledger.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(TenantBalance)
+class TenantBalanceAdmin(admin.ModelAdmin):
+    list_display = ('tenant', 'balance', 'updated_at')
+    search_fields = ('tenant__first_name', 'tenant__last_name')
+    readonly_fields = ('tenant', 'balance', 'updated_at')
+    ordering = ('-balance',)
+
+@admin.register(PropertyBalance)
+class PropertyBalanceAdmin(admin.ModelAdmin):
+    list_display = ('property', 'balance', 'updated_at')
+    list_filter = ('property__llc',)
+    readonly_fields = ('property', 'balance', 'updated_at')
+    ordering = ('-balance',)
@@ -0,0 +1,325 @@
+# tracker/api.py
+"""
+The JSON API's resources: which fields each model exposes, which it accepts
+and how they're filtered (the HTTP side is views/api.py).
+
+Reads are built for pulling a lot of rows cheaply:
+  - ?fields=a,b becomes values('a', 'b'), so only those columns are selected
+    and no model instances are built;
+  - pages are keyset pages over the primary key (?after=<cursor>), so page
+    N costs the same as page 1;
+  - filters are ?field=value, ?field__gte=value etc., parsed with the model
+    field and applied in SQL.
+
+Writes take one object or a list of them. The foreign keys of a whole batch
+are checked in one query per related model, every value is parsed by the
+model's ModelForm field and checked with the model's own rules, and nothing
+is written unless the whole batch is valid. Payments are then inserted with
+bulk_create and announced with payments_bulk_created (like the CSV import);
+other models are saved one by one, in one transaction, so their post_save
+receivers (ledger, search index, occupancy, rollups...) all run.
+"""
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import IntegrityError, models, transaction
+
+from .forms import LLCForm, PaymentForm, PropertyForm, TenantForm
+from .models import LLC, Payment, Property, PropertyFinancialHistory, Tenant
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .signals import payments_bulk_created
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 1000
+LOOKUPS = ('gt', 'gte', 'lt', 'lte', 'in')
+# Query string parameters that aren't filters.
+RESERVED_PARAMS = ('fields', 'after', 'limit')
+
+
+class ApiError(Exception):
+    """An error to report to the client as {"error": message, "errors": details} with `status`."""
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors
+
+
+def _error_dict(error):
+    if hasattr(error, 'error_dict'):
+        return {field: [str(message) for message in messages] for field, messages in error.message_dict.items()}
+    return {'__all__': error.messages}
+
+
+class Resource:
+    """
+    A model as seen through the API. `fields` can be read (the primary key is
+    always included as "id"); `writable` can be set, parsed by the matching
+    field of `form`; `filters` can be used in the query string.
+    """
+    def __init__(self, model, fields, filters=(), writable=(), form=None):
+        self.model = model
+        self.fields = ('id', *fields)
+        self.filters = tuple(filters)
+        self.writable = tuple(writable)
+        self.form_fields = form.base_fields if form else {}
+
+    def perm(self, action):
+        return f'{self.model._meta.app_label}.{action}_{self.model._meta.model_name}'
+
+    def _field(self, name):
+        return self.model._meta.pk if name == 'id' else self.model._meta.get_field(name)
+
+    # --- Reading ---
+
+    def select(self, param):
+        """The fields named in ?fields= (default: all), in the resource's order."""
+        if not param:
+            return list(self.fields)
+        names = [name.strip() for name in param.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.fields)}.")
+        return ['id'] + [name for name in self.fields if name in names and name != 'id']
+
+    def _filter_field(self, path):
+        """The model field a filter path like 'property__llc' ends at."""
+        model, field = self.model, None
+        for part in path.split('__'):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                raise ApiError(f"Unknown filter: {path}")
+            model = field.related_model
+        return field
+
+    def _parse_filter_value(self, field, value):
+        if field.is_relation:
+            field = field.target_field
+        if isinstance(field, models.BooleanField):
+            value = {'true': True, 'false': False, '1': True, '0': False}.get(value.lower(), value)
+        return field.to_python(value)
+
+    def filter(self, queryset, params):
+        """Applies ?field=, ?field__<lookup>= filters from `params` (a QueryDict)."""
+        for key, value in params.items():
+            if key in RESERVED_PARAMS:
+                continue
+            path, _, lookup = key.rpartition('__')
+            if lookup not in LOOKUPS:
+                path, lookup = key, ''
+            if path not in self.filters:
+                raise ApiError(f"Unknown filter: {key}. Available: {', '.join(self.filters)} (with __gt, __gte, __lt, __lte or __in).")
+            field = self._filter_field(path)
+            try:
+                if lookup == 'in':
+                    parsed = [self._parse_filter_value(field, item) for item in value.split(',')]
+                else:
+                    parsed = self._parse_filter_value(field, value)
+            except ValidationError as e:
+                raise ApiError(f"Invalid value for {key}: {' '.join(e.messages)}")
+            queryset = queryset.filter(**{key: parsed})
+        return queryset
+
+    def page(self, params):
+        """One page of rows as dicts, and the cursor of the next page (or None)."""
+        fields = self.select(params.get('fields'))
+        try:
+            limit = max(1, min(int(params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        except ValueError:
+            raise ApiError("limit must be a number.")
+        queryset = self.filter(self.model.objects.all(), params)
+        if params.get('after'):
+            try:
+                (last_pk,) = decode_cursor(params['after'], 1, [self.model._meta.pk])
+            except InvalidCursor as e:
+                raise ApiError(str(e))
+            queryset = queryset.filter(pk__gt=last_pk)
+        rows = list(queryset.order_by('pk').values(*fields)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return rows, encode_cursor([rows[-1]['id']]) if has_more else None
+
+    def get(self, pk, params):
+        row = self.model.objects.filter(pk=pk).values(*self.select(params.get('fields'))).first()
+        if row is None:
+            raise ApiError(f"No {self.model._meta.verbose_name} with id {pk}.", status=404)
+        return row
+
+    def serialize(self, obj):
+        """A saved object as the same dict values() would have read back."""
+        row = {}
+        for name in self.fields:
+            field = self._field(name)
+            value = getattr(obj, field.attname)
+            if isinstance(field, models.DecimalField) and value is not None:
+                value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+            row[name] = value
+        return row
+
+    # --- Writing ---
+
+    def _check_foreign_keys(self, items, errors):
+        """Reports foreign key ids in `items` that don't exist, with one query per related model."""
+        for name in self.writable:
+            field = self._field(name)
+            if not field.is_relation:
+                continue
+            ids = {}
+            for index, item in enumerate(items):
+                if item.get(name) not in (None, ''):
+                    try:
+                        ids[index] = field.target_field.to_python(item[name])
+                    except ValidationError as e:
+                        errors.setdefault(index, {})[name] = e.messages
+            existing = set(field.related_model.objects.filter(pk__in=set(ids.values())).values_list('pk', flat=True)) if ids else set()
+            for index, pk in ids.items():
+                if pk not in existing:
+                    errors.setdefault(index, {})[name] = [f"No {field.related_model._meta.verbose_name} with id {pk}."]
+
+    def _apply(self, obj, item):
+        """Sets the writable fields in `item` on `obj`, parsed like the HTML form would."""
+        errors = {}
+        unknown = [name for name in item if name not in self.writable and name != 'id']
+        if unknown:
+            raise ValidationError({name: ["This field can't be written."] for name in unknown})
+        for name, value in item.items():
+            if name == 'id':
+                continue
+            field = self._field(name)
+            try:
+                if field.is_relation:
+                    value = None if value in (None, '') else field.target_field.to_python(value)
+                else:
+                    value = self.form_fields[name].clean(value)
+            except ValidationError as e:
+                errors[name] = e.messages
+                continue
+            setattr(obj, field.attname, value)
+        if errors:
+            raise ValidationError(errors)
+
+    def _validate(self, objects_and_items, errors):
+        relations = [name for name in self.writable if self._field(name).is_relation]
+        valid = []
+        for index, (obj, item) in enumerate(objects_and_items):
+            if obj is None: # An update of an id that doesn't exist, already reported
+                continue
+            try:
+                self._apply(obj, item)
+                # Foreign keys were checked in bulk above; skip their per-row queries.
+                obj.clean_fields(exclude=relations)
+                obj.clean()
+            except ValidationError as e:
+                errors[index] = {**_error_dict(e), **errors.get(index, {})}
+                continue
+            valid.append(obj)
+        if errors:
+            raise ApiError("Nothing was saved: some objects are invalid.", errors={str(k): v for k, v in sorted(errors.items())})
+        return valid
+
+    def _save(self, objects, create):
+        try:
+            with transaction.atomic():
+                if create and self.model is Payment:
+                    created = Payment.objects.bulk_create(objects, batch_size=MAX_BATCH_SIZE)
+                    payments_bulk_created.send(sender=Payment, payments=created)
+                    return created
+                for obj in objects:
+                    obj.save()
+                return objects
+        except IntegrityError as e:
+            raise ApiError(f"Nothing was saved: {e}", status=409)
+
+    def _items(self, data):
+        items = data if isinstance(data, list) else [data]
+        if not all(isinstance(item, dict) for item in items):
+            raise ApiError("Expected an object or a list of objects.")
+        if not items or len(items) > MAX_BATCH_SIZE:
+            raise ApiError(f"Send between 1 and {MAX_BATCH_SIZE} objects at a time.")
+        return items
+
+    def create(self, data):
+        """Creates one object or a batch; returns the new rows."""
+        items = self._items(data)
+        errors = {}
+        self._check_foreign_keys(items, errors)
+        objects = self._validate([(self.model(), item) for item in items], errors)
+        return [self.serialize(obj) for obj in self._save(objects, create=True)]
+
+    def update(self, data, pk=None):
+        """Updates one object (`pk`) or a batch of objects that each carry their "id"; returns the rows."""
+        items = self._items(data)
+        if pk is not None:
+            if len(items) != 1:
+                raise ApiError("Expected one object.")
+            items[0] = {**items[0], 'id': pk}
+        errors, ids = {}, {}
+        for index, item in enumerate(items):
+            try:
+                ids[index] = self.model._meta.pk.to_python(item.get('id'))
+            except (ValidationError, TypeError):
+                errors[index] = {'id': [f"{item['id']!r} is not a valid id."]}
+                continue
+            if ids[index] is None:
+                errors[index] = {'id': ["This field is required."]}
+        instances = self.model.objects.in_bulk([ids[index] for index in ids if index not in errors])
+        for index, item in enumerate(items):
+            if index not in errors and instances.get(ids[index]) is None:
+                if pk is not None:
+                    raise ApiError(f"No {self.model._meta.verbose_name} with id {pk}.", status=404)
+                errors[index] = {'id': [f"No {self.model._meta.verbose_name} with id {ids[index]}."]}
+        self._check_foreign_keys(items, errors)
+        objects = self._validate([(instances.get(ids.get(index)), item) for index, item in enumerate(items)], errors)
+        return [self.serialize(obj) for obj in self._save(objects, create=False)]
+
+
+RESOURCES = {
+    'llcs': Resource(
+        LLC,
+        fields=('name', 'creation_date', 'state', 'last_filing_date', 'filing_current', 'filing_due', 'filing_bucket'),
+        filters=('name', 'creation_date', 'state', 'last_filing_date', 'filing_current', 'filing_due', 'filing_bucket'),
+        writable=('name', 'creation_date', 'state', 'last_filing_date', 'filing_current'),
+        form=LLCForm,
+    ),
+    'properties': Resource(
+        Property,
+        fields=(
+            'llc', 'street_number', 'street_name', 'date_purchased', 'size', 'status', 'rent_amount',
+            'home_payment', 'lot_payment', 'make', 'year', 'security_deposit', 'bedrooms', 'bathrooms',
+            'power_provider', 'water_provider',
+        ),
+        filters=('llc', 'status', 'rent_amount', 'bedrooms', 'date_purchased', 'street_name'),
+        writable=(
+            'llc', 'street_number', 'street_name', 'date_purchased', 'size', 'status', 'rent_amount',
+            'home_payment', 'lot_payment', 'make', 'year', 'security_deposit', 'bedrooms', 'bathrooms',
+            'power_provider', 'water_provider',
+        ),
+        form=PropertyForm,
+    ),
+    'tenants': Resource(
+        Tenant,
+        # ID numbers and birth dates can be written but aren't read back, as in the CSV export.
+        fields=('first_name', 'last_name', 'phone_number', 'identification_type', 'is_approved', 'date_approved', 'move_in_date', 'property'),
+        filters=('property', 'property__llc', 'last_name', 'is_approved', 'move_in_date'),
+        writable=(
+            'first_name', 'last_name', 'phone_number', 'date_of_birth', 'identification_type',
+            'identification_number', 'is_approved', 'date_approved', 'move_in_date', 'property',
+        ),
+        form=TenantForm,
+    ),
+    'payments': Resource(
+        Payment,
+        fields=('tenant', 'property', 'payment_date', 'amount', 'notes'),
+        filters=('tenant', 'property', 'property__llc', 'payment_date', 'amount'),
+        writable=('tenant', 'property', 'payment_date', 'amount', 'notes'),
+        form=PaymentForm,
+    ),
+    # Written by the Property signals only, so read-only here.
+    'financial-history': Resource(
+        PropertyFinancialHistory,
+        fields=('property', 'field_name', 'old_value', 'new_value', 'date_changed', 'changed_by'),
+        filters=('property', 'property__llc', 'field_name', 'date_changed'),
+    ),
+}
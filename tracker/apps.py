@@ -1,5 +1,7 @@
 # tracker/apps.py
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class TrackerConfig(AppConfig):
@@ -12,3 +14,15 @@ class TrackerConfig(AppConfig):
         """
         # Implicitly connects signal handlers decorated with @receiver.
         from . import signals # noqa F401 - Tells linters not to complain about unused import
+
+        # The full-text search index is backend-specific SQL, created once the tables exist.
+        post_migrate.connect(create_search_index, sender=self)
+
+        # Per-request query counts for RequestTimingMiddleware.
+        from .instrumentation import install_query_recorder
+        connection_created.connect(install_query_recorder)
+
+
+def create_search_index(sender, using, **kwargs):
+    from .search import install_search_index
+    install_search_index(using)
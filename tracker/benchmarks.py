@@ -0,0 +1,477 @@
+# tracker/benchmarks.py
+"""
+Benchmark suite behind the `benchmark` management command.
+
+Times every page in tracker/urls.py, every admin changelist, and the save
+paths that run the signal receivers, against whatever data is in the
+database (see generate_portfolio). The concurrency suite runs writers and
+readers in parallel threads, to compare database settings (SQLite WAL
+tuning, PostgreSQL pooling) under write contention. The asgi suite serves
+the async views' requests all at once through the ASGI handler, against
+the same requests served one at a time, as by a single sync worker. Each target records its timings and SQL
+query count. The report is plain JSON, so two runs can be compared with
+compare_reports() and regressions show up as numbers.
+"""
+import asyncio
+import contextlib
+import datetime
+import itertools
+import logging
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from decimal import Decimal
+
+import django
+from django.contrib import admin
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from . import api
+from . import urls as tracker_urls
+from .models import LLC, Payment, Property, Tenant
+from .signals import payments_bulk_created
+
+REPORT_VERSION = 1
+SUITES = ('urls', 'admin', 'signals', 'concurrency', 'asgi')
+SIGNAL_BATCH_SIZE = 100
+CONCURRENCY_THREADS = 4 # Writer threads; as many readers run alongside them
+CONCURRENCY_OPERATIONS = 25 # Per thread
+ASGI_VIEWS = ('tracker:dashboard', 'tracker:llc_list', 'tracker:property_list', 'tracker:tenant_list', 'tracker:payment_list')
+ASGI_REQUESTS = 20 # Requests per view, sent at once
+
+# URL name prefix -> model whose first pk fills in <int:pk>.
+PK_MODELS = {'llc': LLC, 'property': Property, 'tenant': Tenant, 'payment': Payment}
+
+# Extra query strings for pages whose interesting work happens with parameters.
+URL_VARIANTS = {
+    'tracker:search': ['?q=main', '?q=check 12'],
+    'tracker:rent_roll': ['?as_of={year_ago}'],
+    'tracker:payment_export': ['?format=csv'],
+}
+
+
+def measure(func, repeat):
+    """Runs func() `repeat` times. Returns timings in ms and the query count of the last run."""
+    timings, queries, result = [], 0, None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = len(captured.captured_queries)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': queries,
+    }, result
+
+
+def _get(client, path):
+    response = client.get(path)
+    # Streaming responses (exports) only do their work while being read.
+    size = sum(len(chunk) for chunk in response.streaming_content) if response.streaming else len(response.content)
+    return response.status_code, size
+
+
+def url_targets():
+    """(name, path) for every GET-able page in tracker/urls.py, plus a few parameterized variants."""
+    year_ago = (datetime.date.today() - datetime.timedelta(days=365)).isoformat()
+    for pattern in tracker_urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        name = f'{tracker_urls.app_name}:{pattern.name}'
+        if 'resource' in pattern.pattern.converters: # The JSON API, once per resource
+            for resource_name, resource in api.RESOURCES.items():
+                if 'pk' not in pattern.pattern.converters:
+                    yield f'{name}[{resource_name}]', reverse(name, args=[resource_name])
+                    continue
+                pk = resource.model.objects.order_by('pk').values_list('pk', flat=True).first()
+                if pk is not None:
+                    yield f'{name}[{resource_name}]', reverse(name, args=[resource_name, pk])
+            continue
+        if 'pk' in pattern.pattern.converters:
+            model = PK_MODELS.get(pattern.name.split('_')[0])
+            pk = model.objects.order_by('pk').values_list('pk', flat=True).first() if model else None
+            if pk is None:
+                continue
+            yield name, reverse(name, args=[pk])
+            continue
+        path = reverse(name)
+        yield name, path
+        for query in URL_VARIANTS.get(name, []):
+            query = query.format(year_ago=year_ago)
+            yield f'{name}{query}', path + query
+
+
+def admin_targets():
+    for model in admin.site._registry:
+        opts = model._meta
+        name = f'admin:{opts.app_label}_{opts.model_name}_changelist'
+        yield name, reverse(name)
+
+
+def _rolled_back(func):
+    """Runs func() in a transaction that is always rolled back, so benchmarks leave no data behind."""
+    def run():
+        with transaction.atomic():
+            func()
+            transaction.set_rollback(True)
+    return run
+
+
+def signal_targets():
+    """Save paths that fan out to the receivers in signals.py (ledger, metrics, search, history)."""
+    tenant = Tenant.objects.filter(property__isnull=False).order_by('pk').first()
+    payment = Payment.objects.order_by('pk').first()
+    prop = Property.objects.order_by('pk').first()
+
+    if tenant:
+        def create_payment():
+            Payment.objects.create(tenant=tenant, property_id=tenant.property_id, payment_date=datetime.date.today(), amount=Decimal('500'))
+        yield 'signals:payment_create', create_payment
+
+        def bulk_create_payments():
+            created = Payment.objects.bulk_create([
+                Payment(tenant=tenant, property_id=tenant.property_id, payment_date=datetime.date.today(), amount=Decimal('500'))
+                for _ in range(SIGNAL_BATCH_SIZE)
+            ])
+            payments_bulk_created.send(sender=Payment, payments=created)
+        yield f'signals:payments_bulk_created[{SIGNAL_BATCH_SIZE}]', bulk_create_payments
+
+        def save_tenant():
+            tenant.save()
+        yield 'signals:tenant_save', save_tenant
+
+    if payment:
+        def edit_payment():
+            payment.amount += Decimal('1')
+            payment.save()
+        yield 'signals:payment_edit', edit_payment
+
+    if prop:
+        def change_rent():
+            prop.rent_amount += Decimal('5')
+            prop.save()
+        yield 'signals:property_rent_change', change_rent
+
+        def bulk_rent_increase():
+            ids = Property.objects.filter(llc_id=prop.llc_id).values_list('pk', flat=True)[:SIGNAL_BATCH_SIZE]
+            Property.objects.filter(pk__in=list(ids)).update_with_history(rent_amount=F('rent_amount') + Decimal('5'))
+        yield f'signals:property_bulk_update[{SIGNAL_BATCH_SIZE}]', bulk_rent_increase
+
+
+def _percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _throughput(timings, elapsed):
+    """Latency percentiles (ms) and completed operations per second of wall time."""
+    return {
+        'runs': len(timings),
+        'min_ms': round(min(timings), 2) if timings else 0,
+        'median_ms': round(statistics.median(timings), 2) if timings else 0,
+        'p95_ms': round(_percentile(timings, 0.95), 2) if timings else 0,
+        'max_ms': round(max(timings), 2) if timings else 0,
+        'per_second': round(len(timings) / elapsed, 1) if elapsed else 0,
+    }
+
+
+def run_concurrently(workers, operations):
+    """
+    Runs each (name, func) in `workers` in its own thread, `operations` times,
+    all starting together. Database errors (e.g. SQLite's "database is
+    locked") are counted rather than raised. Returns {name: result} with
+    timings, throughput and errors summed over the threads sharing a name.
+    """
+    start_together = threading.Barrier(len(workers))
+    lock = threading.Lock()
+    timings, errors, elapsed = {}, {}, {}
+
+    def run(name, func):
+        try:
+            start_together.wait()
+            started = time.perf_counter()
+            for _ in range(operations):
+                start = time.perf_counter()
+                try:
+                    func()
+                except DatabaseError:
+                    with lock:
+                        errors[name] = errors.get(name, 0) + 1
+                    continue
+                with lock:
+                    timings.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+            with lock:
+                elapsed[name] = max(elapsed.get(name, 0), time.perf_counter() - started)
+        finally:
+            connections.close_all() # Each thread has its own connections
+
+    threads = [threading.Thread(target=run, args=worker) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = {}
+    for name in dict(workers):
+        results[name] = {
+            **_throughput(timings.get(name, []), elapsed.get(name)),
+            'threads': sum(1 for worker_name, _ in workers if worker_name == name),
+            'errors': errors.get(name, 0),
+        }
+    return results
+
+
+def concurrency_targets():
+    """
+    (name, func) pairs for the concurrency suite: a committed write (locking
+    a property and rewriting its row unchanged, so no data changes and no
+    signals fire) and the payment list's main read query.
+    """
+    property_ids = list(Property.objects.order_by('pk').values_list('pk', flat=True)[:CONCURRENCY_THREADS * 10])
+    if not property_ids:
+        return
+    counter = itertools.count() # Spreads writers over different rows
+
+    def write():
+        pk = property_ids[next(counter) % len(property_ids)]
+        with transaction.atomic():
+            Property.objects.select_for_update().filter(pk=pk).update(rent_amount=F('rent_amount'))
+    yield 'write', write
+
+    def read():
+        list(Payment.objects.select_related('tenant', 'property').order_by('-payment_date', '-pk')[:50])
+    yield 'read', read
+
+
+# --- Async views under ASGI ---
+
+async def _asgi_get(application, path, host, cookie):
+    """One GET through an ASGI application, the way a server would call it. Returns the status code."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', host.encode()), (b'cookie', cookie.encode())],
+        'server': (host, 80), 'client': ('127.0.0.1', 0),
+    }
+    request_sent = False
+    messages = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait() # The client never disconnects; Django cancels this when done
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]['status']
+
+
+@contextlib.contextmanager
+def simulated_latency(ms):
+    """
+    Sleeps `ms` before every query, on every connection including ones opened
+    meanwhile by ASGI worker threads, to stand in for a database across the
+    network. Local SQLite answers too fast for waiting on it to matter.
+    """
+    if not ms:
+        yield
+        return
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(ms / 1000)
+        return execute(sql, params, many, context)
+
+    def add_delay(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(add_delay)
+    try:
+        with connection.execute_wrapper(delay):
+            yield
+    finally:
+        connection_created.disconnect(add_delay)
+
+
+def serve_concurrently(path, requests, host, cookie):
+    """
+    Sends `requests` GETs of `path` all at once to one ASGI application on one
+    event loop, as a single uvicorn worker would receive them. Returns the
+    throughput result, with the status codes seen.
+    """
+    application = ASGIHandler()
+
+    async def timed():
+        start = time.perf_counter()
+        status = await _asgi_get(application, path, host, cookie)
+        return status, (time.perf_counter() - start) * 1000
+
+    async def run():
+        return await asyncio.gather(*(timed() for _ in range(requests)))
+
+    start = time.perf_counter()
+    outcomes = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    return {**_throughput([ms for _, ms in outcomes], elapsed), 'status': sorted({status for status, _ in outcomes})}
+
+
+def serve_sequentially(client, path, requests):
+    """The same requests one after another through the WSGI-style handler, as one sync worker serves them."""
+    timings, statuses = [], set()
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_start = time.perf_counter()
+        statuses.add(_get(client, path)[0])
+        timings.append((time.perf_counter() - request_start) * 1000)
+    return {**_throughput(timings, time.perf_counter() - start), 'status': sorted(statuses)}
+
+
+def _database_profile():
+    """The connection settings the concurrency numbers depend on."""
+    settings_dict = connection.settings_dict
+    profile = {
+        'vendor': connection.vendor,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'pool': bool(settings_dict.get('OPTIONS', {}).get('pool')),
+    }
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for pragma in ('journal_mode', 'synchronous'):
+                cursor.execute(f'PRAGMA {pragma}')
+                profile[pragma] = cursor.fetchone()[0]
+        profile['transaction_mode'] = settings_dict.get('OPTIONS', {}).get('transaction_mode')
+    return profile
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(user, suites=SUITES, repeat=5, host='localhost', progress=None,
+                   threads=CONCURRENCY_THREADS, operations=CONCURRENCY_OPERATIONS, requests=ASGI_REQUESTS,
+                   latency_ms=0):
+    """Runs the suites as `user` and returns the report as a dict."""
+    progress = progress or (lambda message: None)
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    client.force_login(user)
+    results = {}
+
+    def record(name, func, warm_up=True):
+        if warm_up:
+            func() # Fills caches (templates, metrics) so every run measures the steady state
+        results[name], outcome = measure(func, repeat)
+        if isinstance(outcome, tuple): # Page requests return (status code, bytes)
+            results[name]['status'], results[name]['bytes'] = outcome
+        progress(f"{name}: {results[name]['median_ms']} ms, {results[name]['queries']} queries")
+
+    if 'urls' in suites:
+        for name, path in url_targets():
+            record(name, lambda path=path: _get(client, path))
+    if 'admin' in suites:
+        for name, path in admin_targets():
+            record(name, lambda path=path: _get(client, path))
+    if 'signals' in suites:
+        # Rolled-back saves would otherwise leave audit log lines for changes that never happened.
+        action_logger = logging.getLogger('tracker.actions')
+        was_disabled, action_logger.disabled = action_logger.disabled, True
+        try:
+            for name, func in signal_targets():
+                record(name, _rolled_back(func))
+        finally:
+            action_logger.disabled = was_disabled
+    if 'concurrency' in suites:
+        targets = list(concurrency_targets())
+        queries = {}
+        for name, func in targets:
+            queries[name], _ = measure(func, 1) # Warm-up, and the query count per operation
+        workers = [target for target in targets for _ in range(threads)]
+        for name, result in run_concurrently(workers, operations).items():
+            result['queries'] = queries[name]['queries']
+            results[f'concurrency:{name}[{threads}x{operations}]'] = result
+            progress(
+                f"concurrency:{name}: {result['per_second']}/s, median {result['median_ms']} ms, "
+                f"p95 {result['p95_ms']} ms, {result['errors']} error(s)"
+            )
+    if 'asgi' in suites:
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        for name in ASGI_VIEWS:
+            path = reverse(name)
+            warm_up, _ = measure(lambda: _get(client, path), 1) # Also the query count per request
+            with simulated_latency(latency_ms):
+                served = {
+                    'sync': serve_sequentially(client, path, requests),
+                    'async': serve_concurrently(path, requests, host, cookie),
+                }
+            for mode, result in served.items():
+                result['queries'] = warm_up['queries']
+                results[f'asgi:{name}[{mode} x{requests}]'] = result
+                progress(f"asgi:{name} {mode}: {result['per_second']} requests/s, median {result['median_ms']} ms, p95 {result['p95_ms']} ms")
+
+    return {
+        'version': REPORT_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'revision': _git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'database_profile': _database_profile(),
+        },
+        'data': {
+            'llcs': LLC.objects.count(),
+            'properties': Property.objects.count(),
+            'tenants': Tenant.objects.count(),
+            'payments': Payment.objects.count(),
+        },
+        'repeat': repeat,
+        'latency_ms': latency_ms,
+        'results': results,
+    }
+
+
+def get_benchmark_user(username='benchmark'):
+    """A superuser to run the suite as, so every page and changelist is reachable."""
+    user, created = User.objects.get_or_create(username=username, defaults={'is_staff': True, 'is_superuser': True})
+    if created:
+        user.set_unusable_password()
+        user.save()
+    return user
+
+
+def compare_reports(baseline, current, threshold=0.25):
+    """
+    Lists regressions of `current` against `baseline`: any increase in query
+    count, or a median time more than `threshold` (a fraction) slower.
+    Returns a list of (name, metric, before, after) tuples.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            regressions.append((name, 'queries', before['queries'], result['queries']))
+        if result['median_ms'] > before['median_ms'] * (1 + threshold):
+            regressions.append((name, 'median_ms', before['median_ms'], result['median_ms']))
+    return regressions
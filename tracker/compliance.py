@@ -0,0 +1,149 @@
+# tracker/compliance.py
+"""
+LLC filing compliance: each LLC's filing deadline for the year, whether the
+filing has been made, and the status the LLC list and dashboard show.
+
+An LLC's deadline comes from the FilingDeadline of its state (a fixed date,
+or the end of the month it was formed in), else from
+settings.LLC_FILING_DEADLINE. An LLC formed after this year's deadline is
+first due next year. Filings are LLCFiling rows, one per LLC and year;
+checking "Filed for <year>" on an LLC records this year's (record_flag()).
+
+refresh() stores the deadline and status bucket on the LLC (filing_due and
+filing_bucket, indexed together), so the list filters and sorts by status in
+SQL instead of working it out per row. Saving an LLC, a filing or a deadline
+refreshes the LLCs it touches. Otherwise a status only moves with the date:
+from due to overdue when the deadline passes, and back to due for everyone on
+January 1st. The refresh_filing_status command, run daily, refreshes just
+those LLCs (stale()). Changed LLCs are written with one bulk_update, which
+retires the LLC list fragments and dashboard metrics that showed them.
+"""
+import calendar
+import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Max, Q, QuerySet
+
+from . import fragments, metrics
+from .models import LLC, FilingDeadline, LLCFiling
+
+REFRESHED_FIELDS = ['filing_due', 'filing_bucket', 'filing_current', 'last_filing_date']
+
+
+def default_deadline():
+    """(month, day) of settings.LLC_FILING_DEADLINE."""
+    value = getattr(settings, 'LLC_FILING_DEADLINE', '04-15')
+    try:
+        month, day = (int(part) for part in value.split('-'))
+        datetime.date(2000, month, day) # A leap year, so 02-29 is allowed
+    except (AttributeError, ValueError):
+        raise ImproperlyConfigured(f"LLC_FILING_DEADLINE must be MM-DD, not {value!r}.")
+    return month, day
+
+
+def _on_or_before(year, month, day):
+    """The date, or the last day of the month if it has fewer days."""
+    return datetime.date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _rules():
+    return {rule.state.upper(): rule for rule in FilingDeadline.objects.all()}
+
+
+def deadline(llc, year, rules=None):
+    """
+    The deadline of `llc`'s filing for `year`. `rules` are the
+    FilingDeadlines by state (default: loaded).
+    """
+    rules = _rules() if rules is None else rules
+    rule = rules.get(llc.state.upper())
+    if rule is None:
+        due = _on_or_before(year, *default_deadline())
+    elif rule.rule == FilingDeadline.Rule.ANNIVERSARY:
+        due = _on_or_before(year, llc.creation_date.month, 31)
+    else:
+        due = _on_or_before(year, rule.month, rule.day)
+    if llc.creation_date.year == year and llc.creation_date > due:
+        return deadline(llc, year + 1, rules) # Formed after this year's deadline
+    return due
+
+
+def bucket(filed, due, today):
+    """The LLC.FilingBucket of a filing that has (or hasn't) been made, due on `due`."""
+    if filed:
+        return LLC.FilingBucket.FILED
+    return LLC.FilingBucket.OVERDUE if today >= due else LLC.FilingBucket.DUE
+
+
+def stale(today=None):
+    """The LLCs whose status may have moved with the date since they were last refreshed."""
+    today = today or datetime.date.today()
+    return LLC.objects.filter(
+        Q(filing_due__isnull=True)
+        | Q(filing_due__lt=datetime.date(today.year, 1, 1)) # Last year's filing
+        | Q(filing_bucket=LLC.FilingBucket.DUE, filing_due__lte=today) # Now overdue
+    )
+
+
+def refresh(llcs=None, today=None):
+    """
+    Recomputes the compliance fields (REFRESHED_FIELDS) of `llcs`, LLC
+    instances or a queryset (default: every LLC), as of `today`. Updates the
+    instances, saves those that changed and returns them.
+    """
+    today = today or datetime.date.today()
+    if llcs is None:
+        llcs = LLC.objects.all()
+    if isinstance(llcs, QuerySet):
+        filings = LLCFiling.objects.filter(llc__in=llcs.values('pk'))
+    else:
+        filings = LLCFiling.objects.filter(llc_id__in=[llc.pk for llc in llcs])
+    llcs = list(llcs)
+    if not llcs:
+        return []
+
+    rules = _rules()
+    filed = set(filings.filter(year=today.year).values_list('llc_id', flat=True))
+    last_filed = dict(filings.order_by().values('llc_id').annotate(last=Max('filed_on')).values_list('llc_id', 'last'))
+    changed = []
+    for llc in llcs:
+        due = deadline(llc, today.year, rules)
+        values = {
+            'filing_due': due,
+            'filing_bucket': bucket(llc.pk in filed, due, today),
+            'filing_current': llc.pk in filed,
+            # The later of the date entered on the LLC and the latest recorded filing.
+            'last_filing_date': max(filter(None, [llc.last_filing_date, last_filed.get(llc.pk)]), default=None),
+        }
+        if any(getattr(llc, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(llc, field, value)
+            changed.append(llc)
+
+    if changed:
+        LLC.objects.bulk_update(changed, REFRESHED_FIELDS, batch_size=500)
+        fragments.bump(LLC) # bulk_update() sends no post_save
+        metrics.invalidate_llc(*(llc.pk for llc in changed))
+    return changed
+
+
+def record_flag(llc, today=None):
+    """
+    Records or removes `llc`'s filing for this year to match its
+    filing_current flag (the "Filed for <year>" checkbox), filed on its
+    last_filing_date if that is in this year. Callers refresh().
+    """
+    today = today or datetime.date.today()
+    if llc.filing_current:
+        # bulk_create(): no post_save, so recording doesn't refresh the LLC a second time.
+        if llc.last_filing_date and llc.last_filing_date.year == today.year:
+            # The date entered on the LLC is this year's filing date, even if one was recorded already.
+            LLCFiling.objects.bulk_create(
+                [LLCFiling(llc=llc, year=today.year, filed_on=llc.last_filing_date)],
+                update_conflicts=True, unique_fields=['llc', 'year'], update_fields=['filed_on'],
+            )
+        else:
+            LLCFiling.objects.bulk_create([LLCFiling(llc=llc, year=today.year, filed_on=today)], ignore_conflicts=True)
+    else:
+        LLCFiling.objects.filter(llc=llc, year=today.year).delete()
@@ -0,0 +1,85 @@
+# tracker/delinquency.py
+"""
+"Who is behind": rent expected from each tenant since move-in against what
+they have paid, computed per tenant in one SQL query.
+
+Rent is due on the 1st of every month after the move-in month, at the
+property's current rent_amount. What a tenant has paid is the sum of their
+Payment rows, taken in a correlated subquery. Sorting and LLC filtering
+happen in the database as well.
+"""
+import datetime
+import math
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear, Greatest
+
+from .models import Payment, Tenant
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def tenant_balances(as_of=None, queryset=None):
+    """
+    Tenants living in a property since before `as_of` (default: today), with
+    months_due, expected_rent, total_paid and past_due (expected less paid, may
+    be negative for tenants paid ahead) annotated.
+    """
+    as_of = as_of or datetime.date.today()
+    queryset = queryset if queryset is not None else Tenant.objects.all()
+    paid = (
+        Payment.objects
+        .filter(tenant=OuterRef('pk'), payment_date__lte=as_of)
+        .order_by()
+        .values('tenant')
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    months_due = Greatest(
+        Value(as_of.year * 12 + as_of.month) - (ExtractYear('move_in_date') * 12 + ExtractMonth('move_in_date')),
+        Value(0),
+        output_field=IntegerField(),
+    )
+    return (
+        queryset
+        .filter(property__isnull=False, move_in_date__lte=as_of)
+        .annotate(
+            months_due=months_due,
+            expected_rent=ExpressionWrapper(F('months_due') * F('property__rent_amount'), output_field=MONEY),
+            total_paid=Coalesce(Subquery(paid, output_field=MONEY), Value(0), output_field=MONEY),
+        )
+        .annotate(past_due=ExpressionWrapper(F('expected_rent') - F('total_paid'), output_field=MONEY))
+    )
+
+
+def delinquent_tenants(as_of=None, llc=None):
+    """Tenants who owe money as of `as_of`, largest amount first, optionally for one LLC."""
+    queryset = Tenant.objects.select_related('property__llc')
+    if llc is not None:
+        queryset = queryset.filter(property__llc=llc)
+    return (
+        tenant_balances(as_of, queryset)
+        .filter(past_due__gt=0)
+        .order_by('-past_due', 'last_name', 'first_name', 'pk')
+    )
+
+
+def delinquency_totals(queryset):
+    """Number of delinquent tenants and their combined past-due amount, in one query."""
+    totals = queryset.order_by().aggregate(tenant_count=Count('pk'), past_due_total=Sum('past_due'))
+    return {'tenants': totals['tenant_count'], 'past_due': totals['past_due_total'] or 0}
+
+
+def days_past_due(tenant, as_of=None):
+    """
+    Days since the oldest unpaid rent fell due, for a tenant from
+    delinquent_tenants(). Payments cover the oldest months first.
+    """
+    as_of = as_of or datetime.date.today()
+    rent = tenant.property.rent_amount
+    if tenant.past_due <= 0 or not rent:
+        return 0
+    months_behind = min(math.ceil(tenant.past_due / rent), tenant.months_due)
+    oldest_unpaid = as_of.replace(day=1) - relativedelta(months=months_behind - 1)
+    return (as_of - oldest_unpaid).days
@@ -1,4 +1,5 @@
 # tracker/forms.py
+from asgiref.sync import sync_to_async
 from django import forms
 import datetime
 from .models import LLC, Property, Tenant, Payment
@@ -52,4 +53,181 @@ class PropertyBulkUpdateForm(forms.Form):
         choices=Property.StatusChoices.choices,
         required=True,
         label="Set status for all selected properties to"
-    )
\ No newline at end of file
+    )
+
+class AsyncFormMixin:
+    """
+    Lets async views use a form whose ModelChoiceFields would otherwise query
+    the database synchronously: while validating, and while the template
+    renders their <select> options.
+    """
+    async def ais_valid(self):
+        return await sync_to_async(self.is_valid)()
+
+    async def aload_choices(self):
+        """Loads the options of every ModelChoiceField rendered as a <select>."""
+        for field in self.fields.values():
+            if isinstance(field, forms.ModelChoiceField) and isinstance(field.widget, forms.Select):
+                empty = [('', field.empty_label)] if field.empty_label is not None else []
+                field.choices = empty + [
+                    (field.prepare_value(obj), field.label_from_instance(obj)) async for obj in field.queryset
+                ]
+
+
+class PropertyFilterForm(AsyncFormMixin, forms.Form):
+    """
+    GET filters for the property list. Every field is optional; an empty form
+    means "all properties".
+    """
+    llc = forms.ModelChoiceField(queryset=LLC.objects.all(), required=False, empty_label="All LLCs")
+    status = forms.ChoiceField(
+        choices=[('', 'Any status')] + list(Property.StatusChoices.choices),
+        required=False
+    )
+    rent_min = forms.DecimalField(required=False, min_value=0, decimal_places=2, label="Min rent")
+    rent_max = forms.DecimalField(required=False, min_value=0, decimal_places=2, label="Max rent")
+
+    def filter_queryset(self, queryset):
+        """Applies the cleaned filters to a Property queryset."""
+        data = self.cleaned_data
+        if data.get('llc'):
+            queryset = queryset.filter(llc=data['llc'])
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('rent_min') is not None:
+            queryset = queryset.filter(rent_amount__gte=data['rent_min'])
+        if data.get('rent_max') is not None:
+            queryset = queryset.filter(rent_amount__lte=data['rent_max'])
+        return queryset
+
+
+class LLCFilterForm(forms.Form):
+    """GET filter and sort for the LLC list, on the stored filing status (see tracker/compliance.py)."""
+    SORT_ORDERINGS = {
+        'name': ['name'],
+        'status': ['filing_bucket', 'filing_due', 'name'], # Most urgent first; matches llc_filing_status_idx
+    }
+
+    status = forms.TypedChoiceField(
+        choices=[('', 'Any status')] + list(LLC.FilingBucket.choices),
+        coerce=int, empty_value=None, required=False, label="Filing status"
+    )
+    sort = forms.ChoiceField(choices=[('name', 'Name'), ('status', 'Filing status')], required=False, label="Sort by")
+
+    def filter_queryset(self, queryset):
+        """Applies the cleaned filter and ordering to an LLC queryset."""
+        data = self.cleaned_data
+        if data.get('status') is not None:
+            queryset = queryset.filter(filing_bucket=data['status'])
+        return queryset.order_by(*self.SORT_ORDERINGS[data.get('sort') or 'name'])
+
+
+class PaymentFilterForm(AsyncFormMixin, forms.Form):
+    """GET filters shared by the payment list and the payment export."""
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="From")
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="To")
+    llc = forms.ModelChoiceField(queryset=LLC.objects.all(), required=False, empty_label="All LLCs")
+    # A number input rather than a <select>: rendering every property as an option doesn't scale.
+    property = forms.ModelChoiceField(queryset=Property.objects.all(), required=False, widget=forms.NumberInput, label="Property ID")
+
+    def filter_queryset(self, queryset):
+        """Applies the cleaned filters to a Payment queryset."""
+        data = self.cleaned_data
+        if data.get('date_from'):
+            queryset = queryset.filter(payment_date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(payment_date__lte=data['date_to'])
+        if data.get('llc'):
+            queryset = queryset.filter(property__llc=data['llc'])
+        if data.get('property'):
+            queryset = queryset.filter(property=data['property'])
+        return queryset
+
+
+class TenantFilterForm(forms.Form):
+    """GET filters for the tenant export."""
+    llc = forms.ModelChoiceField(queryset=LLC.objects.all(), required=False, empty_label="All LLCs")
+    property = forms.ModelChoiceField(queryset=Property.objects.all(), required=False, widget=forms.NumberInput, label="Property ID")
+
+    def filter_queryset(self, queryset):
+        """Applies the cleaned filters to a Tenant queryset."""
+        data = self.cleaned_data
+        if data.get('llc'):
+            queryset = queryset.filter(property__llc=data['llc'])
+        if data.get('property'):
+            queryset = queryset.filter(property=data['property'])
+        return queryset
+
+
+class PaymentImportForm(forms.Form):
+    """Upload form for a CSV file of payments (see tracker/importers.py)."""
+    csv_file = forms.FileField(
+        label="CSV file",
+        help_text="Columns: payment_date, amount, tenant (name or ID), and optionally property (address or ID), llc, notes."
+    )
+    dry_run = forms.BooleanField(required=False, label="Dry run (validate only, don't save)")
+
+
+class RentRollForm(forms.Form):
+    """Date (and optional LLC) for the point-in-time rent roll report."""
+    as_of = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}), label="As of")
+    llc = forms.ModelChoiceField(queryset=LLC.objects.all(), required=False, empty_label="All LLCs")
+
+
+class OccupancyReportForm(forms.Form):
+    """Month range (and optional LLC) for the occupancy and vacancy loss report."""
+    MAX_MONTHS = 36
+
+    start = forms.DateField(
+        input_formats=['%Y-%m'], label="From",
+        widget=forms.DateInput(format='%Y-%m', attrs={'type': 'month'}),
+    )
+    end = forms.DateField(
+        input_formats=['%Y-%m'], label="To",
+        widget=forms.DateInput(format='%Y-%m', attrs={'type': 'month'}),
+    )
+    llc = forms.ModelChoiceField(queryset=LLC.objects.all(), required=False, empty_label="All LLCs")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end:
+            if start > end:
+                raise forms.ValidationError("The first month must not be after the last one.")
+            if (end.year - start.year) * 12 + end.month - start.month >= self.MAX_MONTHS:
+                raise forms.ValidationError(f"Choose at most {self.MAX_MONTHS} months.")
+        return cleaned_data
+
+
+class DelinquencyForm(forms.Form):
+    """Optional LLC and date for the delinquency report."""
+    llc = forms.ModelChoiceField(queryset=LLC.objects.all(), required=False, empty_label="All LLCs")
+    as_of = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="As of")
+
+
+class AnalyticsForm(forms.Form):
+    """Window, optional LLC and ordering for the portfolio analytics report."""
+    ORDER_CHOICES = [
+        ('margin', "Lowest margin"),
+        ('collection_rate', "Lowest collection rate"),
+        ('regularity', "Least regular"),
+        ('days_late', "Most days late"),
+    ]
+
+    as_of = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}), label="As of")
+    months = forms.IntegerField(min_value=1, max_value=120, required=False, label="Months")
+    llc = forms.ModelChoiceField(queryset=LLC.objects.all(), required=False, empty_label="All LLCs")
+    order = forms.ChoiceField(choices=ORDER_CHOICES, required=False, label="Properties by")
+
+
+class StatementForm(forms.Form):
+    """Year range for an LLC's financial statement."""
+    start_year = forms.IntegerField(min_value=1900, max_value=2100, label="From year")
+    end_year = forms.IntegerField(min_value=1900, max_value=2100, label="To year")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start_year'), cleaned_data.get('end_year')
+        if start and end and start > end:
+            raise forms.ValidationError("The first year must not be after the last one.")
+        return cleaned_data
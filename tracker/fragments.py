@@ -0,0 +1,151 @@
+# tracker/fragments.py
+"""
+Cached HTML for the list pages, keyed by per-model version tokens.
+
+Every model shown in a list has a version token in the cache. The receivers
+in signals.py replace it (bump()) whenever a row of that model is saved,
+deleted or bulk changed, which retires every fragment built from that model
+without having to find them.
+
+A list page caches its table under the versions of the models it shows, the
+query string and the viewer's relevant permissions. Each row is also cached
+on its own (without the query string), so a row already rendered for another
+page or filter isn't rendered again.
+
+Views build a Fragment and call aload() before rendering. When the table is
+cached they skip the queryset entirely. Otherwise aload_rows() fetches every
+cached row in one round trip. The {% fragment %} and {% fragment_row %} tags
+(templatetags/fragments.py) render from it, and asave() stores what was newly
+rendered. As with permissions, a transaction with uncommitted changes to
+these models neither reads nor writes fragments.
+
+The same version tokens validate conditional GETs (views/conditional.py).
+"""
+import functools
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.safestring import mark_safe
+
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def _timeout():
+    return getattr(settings, 'TRACKER_FRAGMENT_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def _version_key(model):
+    return f'tracker:fragments:version:{model._meta.label_lower}'
+
+
+def _replace_versions(keys):
+    token = str(time.time_ns())
+    cache.set_many({key: token for key in keys}, None)
+
+
+def _pending_bumps():
+    return [func for _, func, _ in connection.run_on_commit
+            if isinstance(func, functools.partial) and func.func is _replace_versions]
+
+
+def bump(*models):
+    """
+    Retires every fragment built from `models`, now and again when the
+    transaction commits (so nothing rendered from the old rows in between survives).
+    """
+    keys = tuple(sorted({_version_key(model) for model in models}))
+    _replace_versions(keys)
+    if connection.in_atomic_block and not any(func.args == (keys,) for func in _pending_bumps()): # Once per model set, however many saves
+        transaction.on_commit(functools.partial(_replace_versions, keys))
+
+
+def versions(models):
+    """
+    The current version token of each model, creating missing ones. Tokens
+    are the time of the last change in nanoseconds (or of the first lookup).
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        token = str(time.time_ns())
+        for key in missing:
+            cache.add(key, token, None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+async def aversions(models):
+    """versions(), with the async cache API."""
+    keys = [_version_key(model) for model in models]
+    versions = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        token = str(time.time_ns())
+        for key in missing:
+            await cache.aadd(key, token, None)
+        versions.update(await cache.aget_many(missing))
+    return [versions[key] for key in keys]
+
+
+def _digest(*parts):
+    return hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+class Fragment:
+    """
+    One list page's cached table and rows. `models` are the models whose
+    data the HTML shows; `vary_on` is everything else the table depends on
+    (query string, date); `row_vary_on` is what each row depends on as well
+    (usually the viewer's permissions for the row's buttons).
+    """
+    def __init__(self, name, models, vary_on=(), row_vary_on=()):
+        self.name = name
+        self.models = models
+        self.vary_on = tuple(vary_on)
+        self.row_vary_on = tuple(row_vary_on)
+        self.enabled = True
+        self.content = None # Cached table HTML, after aload()
+        self.rows = {} # Cached row HTML by key, after aload_rows()
+        self.rendered = {} # Newly rendered HTML by cache key, for asave()
+        self._row_prefix = None
+
+    async def aload(self):
+        """Looks the table up. Returns True if it's cached and the rows needn't be loaded."""
+        if await sync_to_async(_pending_bumps)():
+            self.enabled = False
+            return False
+        versions = await aversions(self.models)
+        self.key = f'tracker:fragment:{self.name}:{_digest(versions, self.vary_on, self.row_vary_on)}'
+        self._row_prefix = f'tracker:fragment:{self.name}:row:{_digest(versions, self.row_vary_on)}'
+        self.content = await cache.aget(self.key)
+        return self.content is not None
+
+    def row_key(self, pk):
+        return f'{self._row_prefix}:{pk}'
+
+    async def aload_rows(self, pks):
+        """Fetches the cached HTML of the rows with these primary keys, in one round trip."""
+        if self.enabled:
+            self.rows = await cache.aget_many([self.row_key(pk) for pk in pks])
+
+    def cached(self):
+        return mark_safe(self.content) if self.enabled and self.content is not None else None
+
+    def cached_row(self, pk):
+        html = self.rows.get(self.row_key(pk)) if self.enabled else None
+        return mark_safe(html) if html is not None else None
+
+    def store(self, key, html):
+        if self.enabled:
+            self.rendered[key] = html
+
+    async def asave(self):
+        """Stores the table and rows rendered by this request."""
+        if self.enabled and self.rendered:
+            await cache.aset_many(self.rendered, _timeout())
+            self.rendered = {}
@@ -0,0 +1,186 @@
+# tracker/importers.py
+"""
+Bulk CSV import of payments (e.g. a month of bank deposits).
+
+Rows are parsed one at a time from the file, matched to tenants and
+properties through dictionaries built up front (two queries in total), checked
+with the same field rules as PaymentForm, and written with bulk_create in
+batches. The whole import runs in one transaction.
+"""
+import csv
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .forms import PaymentForm
+from .models import Payment, Property, Tenant
+from .signals import payments_bulk_created
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Also understood: property (ID or address; defaults to the tenant's current property),
+# llc (to tell apart identical addresses in different LLCs) and notes.
+REQUIRED_COLUMNS = ('payment_date', 'amount', 'tenant')
+
+
+def _normalize(value):
+    return ' '.join((value or '').split()).casefold()
+
+
+class LookupIndex:
+    """
+    In-memory lookup of tenants and properties by id, name or address.
+    Ambiguous keys (e.g. two tenants with the same name) map to None so rows
+    that use them are reported instead of guessed at.
+    """
+    def __init__(self):
+        self.tenant_ids = set()
+        self.tenant_property = {}
+        self.tenants_by_name = {}
+        self.property_ids = set()
+        self.properties_by_address = defaultdict(list)
+        self.llc_names = {}
+
+        for pk, first, last, property_id in Tenant.objects.values_list('pk', 'first_name', 'last_name', 'property_id'):
+            self.tenant_ids.add(pk)
+            self.tenant_property[pk] = property_id
+            key = _normalize(f'{first} {last}')
+            self.tenants_by_name[key] = None if key in self.tenants_by_name else pk
+
+        for pk, number, street, llc_id, llc_name in Property.objects.values_list(
+            'pk', 'street_number', 'street_name', 'llc_id', 'llc__name'
+        ):
+            self.property_ids.add(pk)
+            self.properties_by_address[_normalize(f'{number} {street}')].append((llc_id, pk))
+            self.llc_names[llc_id] = _normalize(llc_name)
+
+    def tenant(self, value):
+        value = (value or '').strip()
+        if value.isdigit():
+            if int(value) not in self.tenant_ids:
+                raise ValidationError(f"No tenant with ID {value}.")
+            return int(value)
+        key = _normalize(value)
+        if key not in self.tenants_by_name:
+            raise ValidationError(f"No tenant named '{value}'.")
+        if self.tenants_by_name[key] is None:
+            raise ValidationError(f"More than one tenant is named '{value}'; use the tenant ID.")
+        return self.tenants_by_name[key]
+
+    def property(self, value, llc, tenant_id):
+        value = (value or '').strip()
+        if not value:
+            property_id = self.tenant_property.get(tenant_id)
+            if property_id is None:
+                raise ValidationError("No property given and the tenant isn't assigned to one.")
+            return property_id
+        if value.isdigit() and int(value) in self.property_ids:
+            return int(value)
+        matches = self.properties_by_address.get(_normalize(value), [])
+        if llc:
+            matches = [m for m in matches if self.llc_names[m[0]] == _normalize(llc)]
+        if not matches:
+            raise ValidationError(f"No property at '{value}'.")
+        if len(matches) > 1:
+            raise ValidationError(f"'{value}' matches properties in more than one LLC; add an llc column.")
+        return matches[0][1]
+
+
+class ImportResult:
+    """Outcome of an import: how many rows were created and which rows failed."""
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = 0
+        self.rows_read = 0
+        self.errors = [] # (line number, message)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+
+class PaymentImporter:
+    """
+    Imports payments from a text file object (anything csv.DictReader accepts).
+
+    Invalid rows are collected in the result instead of stopping the import.
+    A file that can't be decoded or parsed is reported as an error, and
+    nothing from it is saved.
+    With dry_run=True everything is validated and inserted, then rolled back.
+    """
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        # Reuse PaymentForm's field definitions so imported values are parsed the same way.
+        form_fields = PaymentForm.base_fields
+        self.date_field = form_fields['payment_date']
+        self.amount_field = form_fields['amount']
+        self.notes_field = form_fields['notes']
+
+    def _build_payment(self, row, index):
+        tenant_id = index.tenant(row.get('tenant'))
+        payment = Payment(
+            tenant_id=tenant_id,
+            property_id=index.property(row.get('property'), row.get('llc'), tenant_id),
+            payment_date=self.date_field.clean((row.get('payment_date') or '').strip()),
+            amount=self.amount_field.clean((row.get('amount') or '').replace('$', '').replace(',', '').strip()),
+            notes=self.notes_field.clean(row.get('notes') or ''),
+        )
+        # The model-level checks ModelForm runs after the form fields (e.g. amount >= 0.01).
+        # The foreign keys were already resolved by the index, so skip their per-row lookups.
+        payment.clean_fields(exclude=['tenant', 'property'])
+        payment.clean()
+        return payment
+
+    def _flush(self, batch, result):
+        if not batch:
+            return
+        created = Payment.objects.bulk_create(batch)
+        if not self.dry_run:
+            # A dry run rolls these back, so nothing should log, post or index them.
+            payments_bulk_created.send(sender=Payment, payments=created)
+        result.created += len(created)
+        batch.clear()
+
+    def _import(self, reader, result):
+        columns = {(name or '').strip().lower() for name in reader.fieldnames or []}
+        missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+        if missing:
+            result.add_error(1, f"Missing required column(s): {', '.join(missing)}")
+            return
+
+        index = LookupIndex()
+        batch = []
+        with transaction.atomic():
+            for raw_row in reader:
+                line = reader.line_num # Counts physical lines, so quoted newlines don't throw it off
+                row = {(k or '').strip().lower(): v for k, v in raw_row.items()}
+                result.rows_read += 1
+                try:
+                    batch.append(self._build_payment(row, index))
+                except ValidationError as e:
+                    result.add_error(line, ' '.join(e.messages))
+                    continue
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, result)
+            self._flush(batch, result)
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+    def run(self, file):
+        result = ImportResult(dry_run=self.dry_run)
+        reader = csv.DictReader(file)
+        try:
+            self._import(reader, result)
+        except UnicodeDecodeError:
+            # Nothing is kept: the rows already inserted were rolled back with the transaction.
+            result.created = 0
+            result.add_error(reader.line_num + 1, "The file isn't UTF-8 text. Save it as CSV (UTF-8) and try again.")
+        except csv.Error as e:
+            result.created = 0
+            result.add_error(reader.line_num, f"The file isn't valid CSV: {e}")
+        return result
@@ -0,0 +1,154 @@
+# tracker/instrumentation.py
+"""
+Per-request performance measurements: SQL query count, time spent in the
+database, template render time and wall time.
+
+RequestTimingMiddleware (in middleware.py) starts a RequestMetrics for each
+request. Queries are counted by a database execute wrapper that every
+connection gets when it opens (see apps.py). It reports to the request in
+the current context, so it also counts the queries an async view's ORM
+calls run on other threads. Template rendering is timed by TimedDjangoTemplates, a template backend set in
+settings.TEMPLATES. The finished numbers are added to `request_stats`, which
+is aggregated per URL name and served by the request_stats view.
+"""
+import contextvars
+import threading
+import time
+
+from django.template.backends.django import DjangoTemplates
+
+_current = contextvars.ContextVar('tracker_request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL queries than its budget in settings.TRACKER_QUERY_BUDGETS."""
+
+
+class RequestMetrics:
+    """Measurements for one request. Times are in seconds."""
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.started = time.perf_counter()
+        self.wall_time = None
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called as a database execute wrapper around every query on the connection.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def current_metrics():
+    """The RequestMetrics of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper on every connection: times the query into the current request's metrics, if any."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver that adds record_query() to each new connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start(metrics):
+    return _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+class RequestStats:
+    """
+    In-process totals per URL name. Each worker process keeps its own
+    numbers, so behind several workers the endpoint shows one worker's view.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, view_name, metrics):
+        with self._lock:
+            entry = self._stats.setdefault(view_name, {
+                'requests': 0, 'queries': 0, 'max_queries': 0,
+                'db_time': 0.0, 'render_time': 0.0, 'wall_time': 0.0, 'max_wall_time': 0.0,
+            })
+            entry['requests'] += 1
+            entry['queries'] += metrics.queries
+            entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+            entry['db_time'] += metrics.db_time
+            entry['render_time'] += metrics.render_time
+            entry['wall_time'] += metrics.wall_time
+            entry['max_wall_time'] = max(entry['max_wall_time'], metrics.wall_time)
+
+    def snapshot(self):
+        """Per-view averages and maximums, with times in milliseconds."""
+        with self._lock:
+            stats = {name: dict(entry) for name, entry in self._stats.items()}
+        result = {}
+        for name, entry in sorted(stats.items()):
+            count = entry['requests']
+            result[name] = {
+                'requests': count,
+                'avg_queries': round(entry['queries'] / count, 2),
+                'max_queries': entry['max_queries'],
+                'avg_db_ms': round(entry['db_time'] / count * 1000, 2),
+                'avg_render_ms': round(entry['render_time'] / count * 1000, 2),
+                'avg_wall_ms': round(entry['wall_time'] / count * 1000, 2),
+                'max_wall_ms': round(entry['max_wall_time'] * 1000, 2),
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+request_stats = RequestStats()
+
+
+class TimedTemplate:
+    """Wraps a backend template so its top-level render() is timed."""
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics()
+        if metrics is None:
+            return self.template.render(context, request)
+        start_time = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.render_time += time.perf_counter() - start_time
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The standard Django template backend, with render time recorded on the
+    current request. {% include %} and {% extends %} are rendered inside the
+    top-level template, so they are counted once, as part of it.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
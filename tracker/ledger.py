@@ -0,0 +1,307 @@
+# tracker/ledger.py
+"""
+Posting rules for the rent ledger (see models/ledger.py).
+
+Every function here appends LedgerEntry rows and applies the same amounts to
+TenantBalance/PropertyBalance in the same transaction, so a balance lookup is a
+single-row read instead of a walk over the payment history.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import LedgerEntry, Property, PropertyBalance, Tenant, TenantBalance
+
+# Keeps IN (...) lists well under every backend's bound-parameter limit.
+ID_BATCH_SIZE = 500
+
+
+def _batched(ids, size=ID_BATCH_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _adjust_balance(model, key, pk, delta):
+    """Adds `delta` to one balance row, creating the row on first use."""
+    if pk is None or not delta:
+        return
+    updated = model.objects.filter(**{key: pk}).update(balance=F('balance') + delta, updated_at=timezone.now())
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**{key: pk, 'balance': delta})
+    except IntegrityError: # Someone else created it first; fall back to the update.
+        model.objects.filter(**{key: pk}).update(balance=F('balance') + delta, updated_at=timezone.now())
+
+
+def _post(entry):
+    entry.save()
+    _adjust_balance(TenantBalance, 'tenant_id', entry.tenant_id, entry.amount)
+    _adjust_balance(PropertyBalance, 'property_id', entry.property_id, entry.amount)
+    return entry
+
+
+def apply_entries_to_balances(entries):
+    """
+    Applies freshly inserted entries (e.g. from bulk_create) to the running
+    balances with one UPDATE per balance table and batch, instead of one per entry.
+    """
+    now = timezone.now()
+    # An UPDATE lists both the batch's entry ids and its balance keys, so each gets half the bound.
+    for batch in _batched(entries, ID_BATCH_SIZE // 2):
+        entry_ids = [e.pk for e in batch]
+        tenant_ids = {e.tenant_id for e in batch if e.tenant_id is not None}
+        property_ids = {e.property_id for e in batch}
+        for model, key, ids in ((TenantBalance, 'tenant', tenant_ids), (PropertyBalance, 'property', property_ids)):
+            if not ids:
+                continue
+            model.objects.bulk_create([model(**{f'{key}_id': pk}) for pk in ids], ignore_conflicts=True)
+            delta = (
+                LedgerEntry.objects
+                .filter(pk__in=entry_ids, **{key: OuterRef('pk')})
+                .order_by()
+                .values(key)
+                .annotate(total=Sum('amount'))
+                .values('total')
+            )
+            model.objects.filter(pk__in=ids).update(
+                balance=F('balance') + Coalesce(Subquery(delta), Value(Decimal('0'))),
+                updated_at=now,
+            )
+
+
+def _insert_unposted(build_entries, attempts=3):
+    """
+    bulk_create()s the entries `build_entries()` returns, which leaves out
+    what is already posted, and returns the rows actually inserted. A run
+    overlapping this one can post some of the same rows in between; the unique
+    constraints then reject the batch, so it is rebuilt without them and
+    tried again, and the balances only ever take rows this run inserted.
+    """
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return LedgerEntry.objects.bulk_create(build_entries(), batch_size=ID_BATCH_SIZE)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+def _posted_totals(payment_id):
+    """Net amount currently posted for a payment, per (tenant, property)."""
+    return {
+        (row['tenant_id'], row['property_id']): row['total']
+        for row in LedgerEntry.objects.filter(payment_id=payment_id)
+        .order_by()
+        .values('tenant_id', 'property_id')
+        .annotate(total=Sum('amount'))
+        if row['total']
+    }
+
+
+@transaction.atomic
+def reverse_payment(payment_id, entry_date=None):
+    """Posts reversals that cancel whatever is currently posted for a payment."""
+    entry_date = entry_date or datetime.date.today()
+    for (tenant_id, property_id), total in _posted_totals(payment_id).items():
+        _post(LedgerEntry(
+            tenant_id=tenant_id, property_id=property_id, payment_id=payment_id,
+            entry_type=LedgerEntry.EntryType.REVERSAL, entry_date=entry_date, amount=-total,
+        ))
+
+
+@transaction.atomic
+def sync_payment(payment):
+    """
+    Brings the ledger in line with a saved Payment. A new payment is posted as a
+    credit; an edited one is reversed and re-posted only if its amount, tenant
+    or property actually changed.
+    """
+    expected = {(payment.tenant_id, payment.property_id): -payment.amount}
+    posted = _posted_totals(payment.pk)
+    if posted == expected:
+        return
+    if posted:
+        reverse_payment(payment.pk)
+    _post(LedgerEntry(
+        tenant_id=payment.tenant_id, property_id=payment.property_id, payment_id=payment.pk,
+        entry_type=LedgerEntry.EntryType.PAYMENT, entry_date=payment.payment_date, amount=-payment.amount,
+    ))
+
+
+@transaction.atomic
+def post_payments(payments):
+    """Posts credits for many new payments at once (e.g. after Payment.objects.bulk_create)."""
+    entries = LedgerEntry.objects.bulk_create([
+        LedgerEntry(
+            tenant_id=p.tenant_id, property_id=p.property_id, payment_id=p.pk,
+            entry_type=LedgerEntry.EntryType.PAYMENT, entry_date=p.payment_date, amount=-p.amount,
+        )
+        for p in payments
+    ], batch_size=ID_BATCH_SIZE)
+    apply_entries_to_balances(entries)
+    return entries
+
+
+def primary_tenant_subquery():
+    """The tenant a property's rent is charged to: earliest move-in, then oldest record."""
+    return (
+        Tenant.objects
+        .filter(property=OuterRef('pk'))
+        .order_by(F('move_in_date').asc(nulls_last=True), 'pk')
+        .values('pk')[:1]
+    )
+
+
+@transaction.atomic
+def post_monthly_rent_charges(period, properties=None):
+    """
+    Charges one month of rent to every occupied property that hasn't been
+    charged for `period` yet. Safe to run more than once for the same month.
+
+    Returns the list of LedgerEntry rows that were created.
+    """
+    period = period.replace(day=1)
+    properties = properties if properties is not None else Property.objects.all()
+    already_charged = LedgerEntry.objects.filter(
+        property=OuterRef('pk'), entry_type=LedgerEntry.EntryType.CHARGE, period=period
+    )
+    rows = (
+        properties
+        .filter(status=Property.StatusChoices.OCCUPIED, rent_amount__gt=0)
+        .exclude(Exists(already_charged))
+        .annotate(charge_tenant_id=Subquery(primary_tenant_subquery()))
+        .order_by('pk')
+        .values_list('pk', 'charge_tenant_id', 'rent_amount')
+    )
+    entries = _insert_unposted(lambda: [
+        LedgerEntry(
+            tenant_id=tenant_id, property_id=property_id, entry_type=LedgerEntry.EntryType.CHARGE,
+            entry_date=period, period=period, amount=rent_amount,
+        )
+        for property_id, tenant_id, rent_amount in rows.all() # all(): re-run the query on a retry
+    ])
+    apply_entries_to_balances(entries)
+    return entries
+
+
+@transaction.atomic
+def post_late_fees(period, fee, grace_days, as_of=None, properties=None):
+    """
+    Charges a late fee of `fee` for `period` to every property that was charged
+    rent for that month and still owed money once the grace period ended: rent
+    charged through `period`, less payments dated on or before the last day of
+    grace. Earlier late fees aren't counted, so fees don't compound. Nothing is
+    posted until `as_of` (default: today) is past the grace period, and a
+    property is only ever fined once per month.
+
+    Returns the list of LedgerEntry rows that were created.
+    """
+    period = period.replace(day=1)
+    last_day_of_grace = period + datetime.timedelta(days=grace_days)
+    as_of = as_of or datetime.date.today()
+    if as_of <= last_day_of_grace or fee <= 0:
+        return []
+    properties = properties if properties is not None else Property.objects.all()
+    charge = LedgerEntry.objects.filter(property=OuterRef('pk'), entry_type=LedgerEntry.EntryType.CHARGE, period=period)
+    already_fined = LedgerEntry.objects.filter(property=OuterRef('pk'), entry_type=LedgerEntry.EntryType.LATE_FEE, period=period)
+    owed = (
+        LedgerEntry.objects
+        .filter(property=OuterRef('pk'), entry_date__lte=last_day_of_grace)
+        .exclude(entry_type=LedgerEntry.EntryType.LATE_FEE)
+        .order_by()
+        .values('property')
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    rows = (
+        properties
+        .filter(Exists(charge))
+        .exclude(Exists(already_fined))
+        .annotate(owed=Subquery(owed), fee_tenant_id=Subquery(charge.values('tenant_id')[:1]))
+        .filter(owed__gt=0)
+        .order_by('pk')
+        .values_list('pk', 'fee_tenant_id')
+    )
+    entries = _insert_unposted(lambda: [
+        LedgerEntry(
+            tenant_id=tenant_id, property_id=property_id, entry_type=LedgerEntry.EntryType.LATE_FEE,
+            entry_date=last_day_of_grace + datetime.timedelta(days=1), period=period, amount=fee,
+        )
+        for property_id, tenant_id in rows.all() # all(): re-run the query on a retry
+    ])
+    apply_entries_to_balances(entries)
+    return entries
+
+
+def property_chunks(queryset=None, chunk_size=ID_BATCH_SIZE):
+    """
+    Splits `queryset` (default: all properties) into querysets over consecutive
+    pk ranges of at most `chunk_size` rows, using keyset pagination.
+    """
+    queryset = queryset if queryset is not None else Property.objects.all()
+    last_pk = 0
+    while True:
+        pks = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield queryset.filter(pk__gt=last_pk, pk__lte=pks[-1])
+        last_pk = pks[-1]
+
+
+def run_monthly_billing(period, fee, grace_days, as_of=None, chunk_size=ID_BATCH_SIZE, progress=None):
+    """
+    Posts rent charges and then late fees for `period`, chunk by chunk. Each
+    chunk commits on its own and both steps skip what's already posted, so a
+    run that died half way can simply be started again.
+
+    Returns {'charges': n, 'late_fees': n} for this run.
+    """
+    progress = progress or (lambda message: None)
+    counts = {'charges': 0, 'late_fees': 0}
+    for chunk in property_chunks(chunk_size=chunk_size):
+        counts['charges'] += len(post_monthly_rent_charges(period, chunk))
+        counts['late_fees'] += len(post_late_fees(period, fee, grace_days, as_of, chunk))
+        progress(f"  {counts['charges']} charge(s), {counts['late_fees']} late fee(s) so far...")
+    return counts
+
+
+@transaction.atomic
+def rebuild_balances():
+    """
+    Recomputes every balance from the ledger. Only needed to repair balances,
+    e.g. after rows were loaded outside of the posting functions above.
+    """
+    TenantBalance.objects.all().delete()
+    PropertyBalance.objects.all().delete()
+    tenant_totals = (
+        LedgerEntry.objects.filter(tenant__isnull=False)
+        .order_by().values('tenant_id').annotate(total=Sum('amount'))
+    )
+    TenantBalance.objects.bulk_create(
+        [TenantBalance(tenant_id=row['tenant_id'], balance=row['total']) for row in tenant_totals],
+        batch_size=ID_BATCH_SIZE,
+    )
+    property_totals = LedgerEntry.objects.order_by().values('property_id').annotate(total=Sum('amount'))
+    PropertyBalance.objects.bulk_create(
+        [PropertyBalance(property_id=row['property_id'], balance=row['total']) for row in property_totals],
+        batch_size=ID_BATCH_SIZE,
+    )
+
+
+def get_tenant_balance(tenant):
+    """Current amount owed by a tenant (negative means credit)."""
+    balance = TenantBalance.objects.filter(tenant=tenant).values_list('balance', flat=True).first()
+    return balance if balance is not None else Decimal('0.00')
+
+
+def get_property_balance(prop):
+    """Current amount owed on a property (negative means credit)."""
+    balance = PropertyBalance.objects.filter(property=prop).values_list('balance', flat=True).first()
+    return balance if balance is not None else Decimal('0.00')
@@ -0,0 +1,155 @@
+# tracker/log_handlers.py
+"""
+Logging handler and formatter for the model action log (see LOGGING in settings.py).
+
+BatchingFileHandler only puts records on a bounded in-memory queue, so a save
+doesn't wait on disk I/O. A background thread formats the records and appends
+them to the file in batches. This module is loaded while settings are
+configured, so it must not import anything from Django's ORM.
+"""
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line, including any `extra=` fields."""
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BatchingFileHandler(logging.Handler):
+    """
+    Appends records to a file from a background thread, in batches.
+
+    `max_queue_size` bounds memory use during bursts (e.g. a bulk import).
+    When the queue is full, `overflow='drop'` discards the new record right away,
+    while `overflow='block'` waits up to `block_timeout` seconds for room first
+    (backpressure) and only then drops it. Dropped records are counted and
+    reported in the file.
+    """
+    def __init__(self, filename, max_queue_size=10000, batch_size=500, flush_interval=0.5,
+                 overflow='drop', block_timeout=0.5, encoding='utf-8'):
+        super().__init__()
+        if overflow not in ('drop', 'block'):
+            raise ValueError(f"overflow must be 'drop' or 'block', not {overflow!r}")
+        self.filename = os.path.abspath(filename)
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.encoding = encoding
+        self.dropped = 0
+        self._dropped_lock = threading.Lock() # Request threads add to `dropped`, the writer resets it
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._writer = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+
+    def _ensure_writer(self):
+        # Threads don't survive fork(), so a forked worker process starts its own writer.
+        if self._writer is not None and self._pid == os.getpid() and self._writer.is_alive():
+            return
+        with self._start_lock:
+            if self._writer is not None and self._pid == os.getpid() and self._writer.is_alive():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # The parent's queue (and its lock) were copied mid-use; start clean.
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+                self._dropped_lock = threading.Lock()
+            self._pid = os.getpid()
+            self._writer = threading.Thread(target=self._run, name='tracker-action-log', daemon=True)
+            self._writer.start()
+
+    def emit(self, record):
+        if self._closed:
+            return
+        self._ensure_writer()
+        try:
+            if self.overflow == 'block':
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def _run(self):
+        with open(self.filename, 'a', encoding=self.encoding) as stream:
+            while True:
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                batch = [first]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch # None is the shutdown sentinel
+                self._write(stream, [record for record in batch if record is not None])
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    return
+
+    def _write(self, stream, records):
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            lines.append(json.dumps({
+                'time': datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+                'level': 'WARNING',
+                'logger': __name__,
+                'message': f"Dropped {dropped} log record(s) because the queue was full",
+                'dropped': dropped,
+            }))
+        if lines:
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+
+    def flush(self, timeout=5.0):
+        """Waits (up to `timeout` seconds) until every queued record has been written."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and self._writer is not None and self._writer.is_alive():
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None and self._writer.is_alive() and self._pid == os.getpid():
+            self._queue.put(None) # Blocks if full, so nothing already queued is lost.
+            self._writer.join(timeout=5.0)
+        super().close()
@@ -0,0 +1,23 @@
+# tracker/management/commands/backfill_occupancy.py
+from django.core.management.base import BaseCommand
+
+from tracker import occupancy
+from tracker.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Opens occupancy intervals for properties without any, and optionally re-syncs the open ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sync', action='store_true',
+            help='Also compare every property with its open interval, catching changes made with plain update()',
+        )
+
+    def handle(self, *args, **options):
+        created = occupancy.backfill()
+        self.stdout.write(f"Opened {created} interval(s) for properties without history.")
+        if options['sync']:
+            occupancy.record_changes(Property.objects.order_by('pk').values_list('pk', flat=True))
+            self.stdout.write("Open intervals synced with current property status.")
+        self.stdout.write(self.style.SUCCESS("Occupancy history is up to date."))
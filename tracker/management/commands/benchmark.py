@@ -0,0 +1,65 @@
+# tracker/management/commands/benchmark.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.benchmarks import ASGI_REQUESTS, CONCURRENCY_OPERATIONS, CONCURRENCY_THREADS, SUITES, compare_reports, get_benchmark_user, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Times every tracker page, admin changelist and signal-heavy save path against the current data, '
+        'plus parallel writers and readers and concurrent ASGI requests, '
+        'records query counts, and writes a JSON report. Use --compare to check against an earlier report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the JSON report')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per target (after one warm-up run)')
+        parser.add_argument('--suite', action='append', choices=SUITES, help='Only run this suite (can be given more than once)')
+        parser.add_argument('--username', default='benchmark', help='Superuser to run as (created if missing)')
+        parser.add_argument('--host', default='localhost', help='Host header for requests; must be in ALLOWED_HOSTS')
+        parser.add_argument('--threads', type=int, default=CONCURRENCY_THREADS, help='Concurrency suite: writer threads (and as many readers)')
+        parser.add_argument('--operations', type=int, default=CONCURRENCY_OPERATIONS, help='Concurrency suite: operations per thread')
+        parser.add_argument('--requests', type=int, default=ASGI_REQUESTS, help='ASGI suite: requests per view')
+        parser.add_argument('--latency-ms', type=float, default=0, help='ASGI suite: delay added to every query, to simulate a networked database')
+        parser.add_argument('--compare', help='An earlier report to compare against')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown before a time counts as a regression (0.25 = 25%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error if anything regressed')
+
+    def handle(self, *args, **options):
+        for option in ('repeat', 'threads', 'operations', 'requests'):
+            if options[option] < 1:
+                raise CommandError(f"--{option} must be at least 1.")
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        report = run_benchmarks(
+            get_benchmark_user(options['username']),
+            suites=options['suite'] or SUITES,
+            repeat=options['repeat'],
+            host=options['host'],
+            threads=options['threads'],
+            operations=options['operations'],
+            requests=options['requests'],
+            latency_ms=options['latency_ms'],
+            progress=self.stdout.write,
+        )
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(report['results'])} result(s) to {options['output']}."))
+
+        if baseline is None:
+            return
+        regressions = compare_reports(baseline, report, options['threshold'])
+        for name, metric, before, after in regressions:
+            self.stdout.write(self.style.WARNING(f"Regression: {name} {metric} {before} -> {after}"))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}."))
+        elif options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}.")
@@ -0,0 +1,46 @@
+# tracker/management/commands/generate_portfolio.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.portfolio import DEFAULT_BATCH_SIZE, PortfolioGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills the database with a synthetic portfolio (LLCs, properties, tenants and monthly payments) '
+        'for load testing, e.g. --llcs 100 --properties 50000 --years 10. Do not run against real data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--llcs', type=int, default=10, help='Number of LLCs to create')
+        parser.add_argument('--properties', type=int, default=500, help='Number of properties to create, spread over the LLCs')
+        parser.add_argument('--years', type=int, default=2, help='Years of monthly payment history')
+        parser.add_argument('--occupancy', type=float, default=0.9, help='Share of properties with a tenant (0-1)')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for repeatable data')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per bulk insert')
+        parser.add_argument('--rent-charges', action='store_true', help='Also post monthly rent charges to the ledger')
+        parser.add_argument('--force', action='store_true', help='Run even when DEBUG is off')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("DEBUG is off; this looks like a production database. Use --force if you are sure.")
+        if options['llcs'] < 1 or options['properties'] < 0 or options['years'] < 0:
+            raise CommandError("--llcs must be at least 1, and --properties and --years can't be negative.")
+        if not 0 <= options['occupancy'] <= 1:
+            raise CommandError("--occupancy must be between 0 and 1.")
+
+        generator = PortfolioGenerator(
+            llcs=options['llcs'],
+            properties=options['properties'],
+            years=options['years'],
+            occupancy=options['occupancy'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            rent_charges=options['rent_charges'],
+            progress=self.stdout.write,
+        )
+        counts = generator.run()
+        self.stdout.write(self.style.SUCCESS(
+            "Created {llcs} LLC(s), {properties} property(ies), {tenants} tenant(s), "
+            "{payments} payment(s) and {rent_charges} rent charge(s).".format(**counts)
+        ))
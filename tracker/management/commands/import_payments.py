@@ -0,0 +1,40 @@
+# tracker/management/commands/import_payments.py
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.importers import DEFAULT_BATCH_SIZE, PaymentImporter
+
+
+class Command(BaseCommand):
+    help = 'Imports payments from a CSV file (columns: payment_date, amount, tenant, and optionally property, llc, notes).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the CSV file to import')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per bulk insert')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without saving anything')
+        parser.add_argument('--error-report', help='Write rows that failed validation to this CSV file')
+
+    def handle(self, *args, **options):
+        importer = PaymentImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as f:
+                result = importer.run(f)
+        except OSError as e:
+            raise CommandError(f"Could not read {options['csv_file']}: {e}")
+
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+
+        if options['error_report'] and result.errors:
+            with open(options['error_report'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['line', 'error'])
+                writer.writerows(result.errors)
+            self.stdout.write(f"Wrote {len(result.errors)} error(s) to {options['error_report']}.")
+
+        verb = "Would import" if result.dry_run else "Imported"
+        style = self.style.SUCCESS if result.ok else self.style.WARNING
+        self.stdout.write(style(
+            f"{verb} {result.created} of {result.rows_read} payment row(s); {len(result.errors)} row(s) had errors."
+        ))
@@ -0,0 +1,69 @@
+# tracker/management/commands/portfolio_analytics.py
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import analytics
+from tracker.models import LLC
+
+COLUMNS = [
+    ('net', "Net/mo", 12),
+    ('annual_net', "Net/yr", 13),
+    ('margin', "Margin", 7),
+    ('collection_rate', "Collected", 10),
+    ('regularity', "Regular", 8),
+    ('avg_days_late', "Days late", 10),
+    ('late_share', "Late", 6),
+]
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.")
+
+
+def _cells(row):
+    return ''.join(f"{'' if row[key] is None else row[key]:>{width}}" for key, _, width in COLUMNS)
+
+
+class Command(BaseCommand):
+    help = 'Prints per-LLC cash flow and payment behaviour, and the worst properties, computed with NumPy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', type=_date, help='Last day of the period, as YYYY-MM-DD (default: today)')
+        parser.add_argument('--months', type=int, default=12, help='Months in the period, up to 120 (default: 12)')
+        parser.add_argument('--llc', type=int, dest='llc_id', help='Only this LLC id')
+        parser.add_argument('--order', choices=sorted(analytics.ORDERINGS), default='margin', help='Measure the properties are ranked by, worst first (default: margin)')
+        parser.add_argument('--top', type=int, default=20, help='Properties to list (default: 20)')
+
+    def handle(self, *args, **options):
+        if analytics.np is None:
+            raise CommandError("Portfolio analytics require the numpy package.")
+        if not 1 <= options['months'] <= 120:
+            raise CommandError("--months must be between 1 and 120.")
+        llc = None
+        if options['llc_id'] is not None:
+            try:
+                llc = LLC.objects.get(pk=options['llc_id'])
+            except LLC.DoesNotExist:
+                raise CommandError(f"No LLC with id {options['llc_id']}.")
+
+        started = time.perf_counter()
+        result = analytics.analyze(options['as_of'], options['months'], llc)
+        llc_rows = result.llc_rows()
+        property_rows = result.property_rows(options['order'], limit=max(options['top'], 0))
+        elapsed = time.perf_counter() - started
+
+        header = ''.join(f'{title:>{width}}' for _, title, width in COLUMNS)
+        self.stdout.write(f"{result.since} to {result.as_of}: {result.payment_count_total} payment(s), {len(result.pk)} propert(ies).")
+        self.stdout.write(f"\n{'LLC':<30}{'Props':>6}{header}")
+        for row in llc_rows:
+            self.stdout.write(f"{row['name'][:29]:<30}{row['properties']:>6}{_cells(row)}")
+        if property_rows:
+            self.stdout.write(f"\n{'Property':<30}{'LLC':<20}{header}")
+            for row in property_rows:
+                self.stdout.write(f"{row['address'][:29]:<30}{row['llc'][:19]:<20}{_cells(row)}")
+        self.stdout.write(self.style.SUCCESS(f"\nAnalyzed in {elapsed:.2f}s."))
@@ -0,0 +1,58 @@
+# tracker/management/commands/post_rent_charges.py
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.ledger import ID_BATCH_SIZE, run_monthly_billing
+
+
+def _month(value):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Invalid month {value!r}; use YYYY-MM.")
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Posts this month's rent charge for every occupied property, and late fees once the grace period "
+        "is over. Safe to run daily from cron: anything already posted is skipped, and an interrupted run "
+        "picks up where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=_month, help='Rent month to bill, as YYYY-MM (default: the current month)')
+        parser.add_argument('--as-of', type=_date, help='Date to assess late fees on, as YYYY-MM-DD (default: today)')
+        parser.add_argument('--grace-days', type=int, default=None, help='Days after the 1st before rent is late (default: settings.LATE_FEE_GRACE_DAYS)')
+        parser.add_argument('--late-fee', default=None, help='Late fee amount (default: settings.LATE_FEE_AMOUNT)')
+        parser.add_argument('--no-late-fees', action='store_true', help='Only post rent charges')
+        parser.add_argument('--chunk-size', type=int, default=ID_BATCH_SIZE, help='Properties per transaction')
+
+    def handle(self, *args, **options):
+        as_of = options['as_of'] or datetime.date.today()
+        period = options['month'] or as_of.replace(day=1)
+        grace_days = options['grace_days'] if options['grace_days'] is not None else settings.LATE_FEE_GRACE_DAYS
+        try:
+            fee = Decimal('0') if options['no_late_fees'] else Decimal(options['late_fee'] or settings.LATE_FEE_AMOUNT)
+        except InvalidOperation:
+            raise CommandError("The late fee must be a number.")
+        if grace_days < 0 or fee < 0 or options['chunk_size'] < 1:
+            raise CommandError("--grace-days and --late-fee can't be negative, and --chunk-size must be at least 1.")
+
+        self.stdout.write(f"Billing {period:%B %Y} (late fees of ${fee} after {grace_days} day(s) of grace, as of {as_of})...")
+        counts = run_monthly_billing(
+            period, fee, grace_days, as_of=as_of, chunk_size=options['chunk_size'],
+            progress=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Posted {charges} rent charge(s) and {late_fees} late fee(s).".format(**counts)
+        ))
@@ -0,0 +1,26 @@
+# tracker/management/commands/rebuild_rollups.py
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.rollups import rebuild
+
+
+def _month(value):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Invalid month {value!r}; use YYYY-MM.")
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the monthly per-LLC income and obligation rollups from payments and property history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--llc', type=int, action='append', dest='llc_ids', help='Only this LLC id (can be given more than once)')
+        parser.add_argument('--from', type=_month, dest='first_month', help='First month, as YYYY-MM (default: the oldest payment or purchase)')
+        parser.add_argument('--to', type=_month, dest='last_month', help='Last month, as YYYY-MM (default: this month)')
+
+    def handle(self, *args, **options):
+        count = rebuild(options['llc_ids'], options['first_month'], options['last_month'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} monthly rollup(s)."))
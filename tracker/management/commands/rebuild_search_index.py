@@ -0,0 +1,22 @@
+# tracker/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from tracker.models import SearchDocument
+from tracker.search import install_search_index, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search documents for tenants, properties and payments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', action='append', choices=SearchDocument.Kind.values,
+            help='Only rebuild this kind of record (can be given more than once)',
+        )
+
+    def handle(self, *args, **options):
+        install_search_index() # In case migrate ran before the search index existed
+        counts = rebuild(options['kind'])
+        for kind, count in counts.items():
+            self.stdout.write(f"Indexed {count} {kind} record(s).")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
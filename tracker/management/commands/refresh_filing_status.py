@@ -0,0 +1,42 @@
+# tracker/management/commands/refresh_filing_status.py
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import compliance
+from tracker.models import LLC
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves LLC filing statuses along with the date: due filings become overdue once their deadline "
+        "passes, and every LLC is due again for the new year. Run daily from cron; only LLCs whose "
+        "status can have changed are read."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', type=_date, help='Date to assess statuses on, as YYYY-MM-DD (default: today)')
+        parser.add_argument('--all', action='store_true', help='Recompute every LLC, e.g. after loading data without signals')
+        parser.add_argument('--upcoming', type=int, metavar='DAYS', help='Also list unfiled LLCs due within DAYS days')
+
+    def handle(self, *args, **options):
+        today = options['as_of'] or datetime.date.today()
+        llcs = LLC.objects.all() if options['all'] else compliance.stale(today)
+        changed = compliance.refresh(llcs, today)
+        self.stdout.write(self.style.SUCCESS(f"Updated the filing status of {len(changed)} LLC(s) as of {today}."))
+
+        if options['upcoming'] is not None:
+            due = (
+                LLC.objects
+                .filter(filing_bucket=LLC.FilingBucket.DUE, filing_due__lte=today + datetime.timedelta(days=options['upcoming']))
+                .order_by('filing_bucket', 'filing_due', 'name')
+            )
+            for llc in due:
+                self.stdout.write(f"{llc.filing_due}  {llc.name}")
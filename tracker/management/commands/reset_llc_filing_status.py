@@ -1,19 +1,16 @@
 # tracker/management/commands/reset_llc_filing_status.py
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from tracker.models import LLC
-import datetime
+
 
 class Command(BaseCommand):
-    help = 'Resets the filing_current status for all LLCs to False. Intended to be run at the start of a new year.'
+    help = (
+        "Deprecated: use refresh_filing_status, which moves every LLC to due for the new year on its own "
+        "when run daily. Kept so existing yearly cron entries keep working; runs refresh_filing_status."
+    )
 
     def handle(self, *args, **kwargs):
-        current_year = datetime.date.today().year
-        self.stdout.write(
-            f"Starting reset of LLC filing status for the year {current_year}..."
-        )
-
-        updated_count = LLC.objects.update(filing_current=False)
-
-        self.stdout.write(self.style.SUCCESS(
-            f"Successfully reset 'filing_current' to False for {updated_count} LLC(s)."
-        ))
\ No newline at end of file
+        self.stderr.write(self.style.WARNING(
+            "reset_llc_filing_status is deprecated and will be removed; schedule refresh_filing_status daily instead."
+        ))
+        call_command('refresh_filing_status', stdout=self.stdout, stderr=self.stderr)
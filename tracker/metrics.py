@@ -0,0 +1,173 @@
+# tracker/metrics.py
+"""
+Precomputed per-LLC dashboard metrics, stored in Django's cache framework.
+
+Each LLC's numbers live under their own cache key, so a change to one LLC's
+properties or payments (see the receivers in signals.py) only throws away that
+LLC's entry. Missing entries are recomputed together in one aggregate query.
+The a-prefixed functions do the same for async views, with the async ORM
+and cache APIs.
+"""
+import datetime
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import LLC, Payment, Property
+
+# Default lifetime of a cached entry, in seconds. Entries are also dropped by the
+# signal receivers whenever the underlying data changes, so this only bounds how
+# stale numbers can get from changes that bypass signals (e.g. raw SQL).
+DEFAULT_TIMEOUT = 60 * 60
+
+LLC_IDS_KEY = 'tracker:metrics:llc_ids'
+ZERO = Decimal('0.00')
+
+
+def _timeout():
+    return getattr(settings, 'TRACKER_METRICS_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def _llc_key(llc_id, today):
+    # "This month" and the filing status both depend on the date, so the key does too.
+    return f'tracker:metrics:{today.isoformat()}:llc:{llc_id}'
+
+
+def _metrics_queryset(llc_ids, today):
+    month_start = today.replace(day=1)
+    next_month = month_start + relativedelta(months=1)
+    occupied = Q(properties__status=Property.StatusChoices.OCCUPIED)
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    collected = (
+        Payment.objects
+        .filter(property__llc=OuterRef('pk'), payment_date__gte=month_start, payment_date__lt=next_month)
+        .order_by()
+        .values('property__llc')
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    return (
+        LLC.objects.filter(pk__in=llc_ids)
+        .annotate(
+            property_count=Count('properties'),
+            occupied_count=Count('properties', filter=occupied),
+            rent_roll=Coalesce(Sum('properties__rent_amount', filter=occupied), Value(ZERO), output_field=money),
+            collected=Coalesce(Subquery(collected, output_field=money), Value(ZERO), output_field=money),
+        )
+    )
+
+
+def _metrics_row(llc):
+    occupancy = (llc.occupied_count / llc.property_count) if llc.property_count else 0.0
+    return {
+        'id': llc.pk,
+        'name': llc.name,
+        'filing_status': llc.filing_status,
+        'property_count': llc.property_count,
+        'occupied_count': llc.occupied_count,
+        'occupancy_rate': round(occupancy * 100, 1),
+        'rent_roll': llc.rent_roll,
+        # Expected this month is the scheduled rent on occupied units.
+        'expected': llc.rent_roll,
+        'collected': llc.collected,
+    }
+
+
+def compute_llc_metrics(llc_ids, today=None):
+    """Computes the metrics for the given LLCs with a single aggregate query."""
+    today = today or datetime.date.today()
+    return {llc.pk: _metrics_row(llc) for llc in _metrics_queryset(llc_ids, today)}
+
+
+async def acompute_llc_metrics(llc_ids, today=None):
+    """compute_llc_metrics() with the async ORM."""
+    today = today or datetime.date.today()
+    return {llc.pk: _metrics_row(llc) async for llc in _metrics_queryset(llc_ids, today).aiterator()}
+
+
+def get_llc_ids():
+    llc_ids = cache.get(LLC_IDS_KEY)
+    if llc_ids is None:
+        llc_ids = list(LLC.objects.order_by('name').values_list('pk', flat=True))
+        cache.set(LLC_IDS_KEY, llc_ids, _timeout())
+    return llc_ids
+
+
+async def aget_llc_ids():
+    llc_ids = await cache.aget(LLC_IDS_KEY)
+    if llc_ids is None:
+        llc_ids = [pk async for pk in LLC.objects.order_by('name').values_list('pk', flat=True)]
+        await cache.aset(LLC_IDS_KEY, llc_ids, _timeout())
+    return llc_ids
+
+
+def _ordered(llc_ids, rows):
+    ordered = [rows[llc_id] for llc_id in llc_ids if llc_id in rows]
+    return ordered, summarize(ordered)
+
+
+def get_dashboard_metrics(today=None):
+    """
+    Returns (per-LLC rows, portfolio totals) for the dashboard. Rows come
+    from the cache; only LLCs whose entry is missing are recomputed.
+    """
+    today = today or datetime.date.today()
+    llc_ids = get_llc_ids()
+    keys = {llc_id: _llc_key(llc_id, today) for llc_id in llc_ids}
+    cached = cache.get_many(keys.values())
+    rows = {llc_id: cached[key] for llc_id, key in keys.items() if key in cached}
+
+    missing = [llc_id for llc_id in llc_ids if llc_id not in rows]
+    if missing:
+        fresh = compute_llc_metrics(missing, today)
+        cache.set_many({keys[llc_id]: row for llc_id, row in fresh.items()}, _timeout())
+        rows.update(fresh)
+    return _ordered(llc_ids, rows)
+
+
+async def aget_dashboard_metrics(today=None):
+    """get_dashboard_metrics() for async views: the same cache entries, read and filled asynchronously."""
+    today = today or datetime.date.today()
+    llc_ids = await aget_llc_ids()
+    keys = {llc_id: _llc_key(llc_id, today) for llc_id in llc_ids}
+    cached = await cache.aget_many(keys.values())
+    rows = {llc_id: cached[key] for llc_id, key in keys.items() if key in cached}
+
+    missing = [llc_id for llc_id in llc_ids if llc_id not in rows]
+    if missing:
+        fresh = await acompute_llc_metrics(missing, today)
+        await cache.aset_many({keys[llc_id]: row for llc_id, row in fresh.items()}, _timeout())
+        rows.update(fresh)
+    return _ordered(llc_ids, rows)
+
+
+def summarize(rows):
+    """Portfolio-wide totals over per-LLC metric rows."""
+    property_count = sum(r['property_count'] for r in rows)
+    occupied_count = sum(r['occupied_count'] for r in rows)
+    return {
+        'property_count': property_count,
+        'occupied_count': occupied_count,
+        'occupancy_rate': round(occupied_count / property_count * 100, 1) if property_count else 0.0,
+        'rent_roll': sum((r['rent_roll'] for r in rows), ZERO),
+        'expected': sum((r['expected'] for r in rows), ZERO),
+        'collected': sum((r['collected'] for r in rows), ZERO),
+        'red_count': sum(1 for r in rows if r['filing_status'] == 'red'),
+        'yellow_count': sum(1 for r in rows if r['filing_status'] == 'yellow'),
+    }
+
+
+def invalidate_llc(*llc_ids, today=None):
+    """Drops the cached metrics for the given LLCs; they're rebuilt on next read."""
+    today = today or datetime.date.today()
+    cache.delete_many([_llc_key(llc_id, today) for llc_id in llc_ids if llc_id is not None])
+
+
+def invalidate_llc_list():
+    """Drops the cached list of LLC ids (after an LLC is added or removed)."""
+    cache.delete(LLC_IDS_KEY)
@@ -1,6 +1,15 @@
 # tracker/middleware.py
+import contextlib
+import logging
 import threading
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+
 _thread_locals = threading.local()
 
 def get_current_user():
@@ -30,3 +39,71 @@ class CurrentUserMiddleware:
             del _thread_locals.user
 
         return response
+
+
+class RequestTimingMiddleware:
+    """
+    Measures each request: SQL query count, database time, template render
+    time and wall time (see tracker/instrumentation.py).
+
+    The numbers are aggregated per URL name for the request_stats view and,
+    when settings.TRACKER_TIMING_HEADERS is on, sent back as Server-Timing and
+    X-Query-Count headers. Views listed in settings.TRACKER_QUERY_BUDGETS that
+    run more queries than their budget are logged, or raise
+    QueryBudgetExceeded when settings.TRACKER_ENFORCE_QUERY_BUDGETS is on (as
+    it is for the test suite), so N+1 regressions fail tests.
+    Should be first in MIDDLEWARE so the other middleware is measured too.
+    Works in both sync and async chains, so async views stay async under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self._measuring() as metrics:
+            response = self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        with self._measuring() as metrics:
+            response = await self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    @contextlib.contextmanager
+    def _measuring(self):
+        # Queries are recorded by instrumentation.record_query(), on whichever
+        # thread runs them, through the context variable set here.
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.start(metrics)
+        try:
+            yield metrics
+        finally:
+            instrumentation.stop(token)
+            metrics.finish()
+
+    def _finish(self, request, response, metrics):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match and match.view_name else '<unresolved>'
+        instrumentation.request_stats.record(view_name, metrics)
+
+        if getattr(settings, 'TRACKER_TIMING_HEADERS', settings.DEBUG):
+            response['X-Query-Count'] = str(metrics.queries)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+                f'render;dur={metrics.render_time * 1000:.2f}',
+                f'total;dur={metrics.wall_time * 1000:.2f}',
+            ])
+
+        budget = getattr(settings, 'TRACKER_QUERY_BUDGETS', {}).get(view_name)
+        if budget is not None and metrics.queries > budget:
+            message = f"{view_name} ran {metrics.queries} queries (budget {budget}) for {request.path}"
+            if getattr(settings, 'TRACKER_ENFORCE_QUERY_BUDGETS', False):
+                raise instrumentation.QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
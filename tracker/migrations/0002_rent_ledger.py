@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:32
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantBalance',
+            fields=[
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger_balance', serialize=False, to='tracker.tenant')),
+                ('balance', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PropertyBalance',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger_balance', serialize=False, to='tracker.property')),
+                ('balance', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('CHG', 'Rent Charge'), ('PAY', 'Payment'), ('REV', 'Payment Reversal')], max_length=3)),
+                ('entry_date', models.DateField(help_text='Accounting date of the entry')),
+                ('period', models.DateField(blank=True, help_text='First day of the rent month a charge is for', null=True)),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Signed amount: positive increases the balance owed, negative reduces it', max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payment', models.ForeignKey(blank=True, db_constraint=False, help_text='The payment this entry was posted from (payments and reversals only)', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='tracker.payment')),
+                ('property', models.ForeignKey(help_text='The property this entry is posted to', on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='tracker.property')),
+                ('tenant', models.ForeignKey(blank=True, help_text='The tenant this entry is posted to (if any)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='tracker.tenant')),
+            ],
+            options={
+                'verbose_name_plural': 'Ledger Entries',
+                'ordering': ['entry_date', 'pk'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('entry_type', 'CHG')), fields=('property', 'period'), name='unique_rent_charge_per_property_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_search_documents'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='payment',
+            options={'ordering': ['-payment_date', 'tenant_id']},
+        ),
+        migrations.AlterUniqueTogether(
+            name='property',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='property',
+            field=models.ForeignKey(db_index=False, help_text='The property the payment is for', on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='tracker.property'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='tenant',
+            field=models.ForeignKey(db_index=False, help_text='The tenant who made the payment', on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='tracker.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='llc',
+            field=models.ForeignKey(db_index=False, help_text='The LLC that owns this property', on_delete=django.db.models.deletion.PROTECT, related_name='properties', to='tracker.llc'),
+        ),
+        migrations.AlterField(
+            model_name='propertyfinancialhistory',
+            name='property',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='financial_history', to='tracker.property'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='property',
+            unique_together={('llc', 'street_number', 'street_name')},
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['property', 'payment_date'], name='payment_property_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['tenant', 'payment_date'], name='payment_tenant_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-payment_date', 'tenant'], name='payment_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['llc', 'status'], name='property_llc_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyfinancialhistory',
+            index=models.Index(fields=['property', 'field_name', 'date_changed'], name='fin_history_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['last_name', 'first_name'], name='tenant_name_idx'),
+        ),
+    ]
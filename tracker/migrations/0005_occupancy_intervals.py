@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:36
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_initial_intervals(apps, schema_editor):
+    """
+    One open interval per existing property, like occupancy.backfill() (which
+    can't be used here because it imports the current models).
+    """
+    Property = apps.get_model('tracker', 'Property')
+    Tenant = apps.get_model('tracker', 'Tenant')
+    OccupancyInterval = apps.get_model('tracker', 'OccupancyInterval')
+    primary_tenant = (
+        Tenant.objects.filter(property=models.OuterRef('pk'))
+        .order_by(models.F('move_in_date').asc(nulls_last=True), 'pk')
+    )
+    rows = (
+        Property.objects
+        .annotate(
+            primary_tenant_id=models.Subquery(primary_tenant.values('pk')[:1]),
+            move_in_date=models.Subquery(primary_tenant.values('move_in_date')[:1]),
+        )
+        .values_list('pk', 'llc_id', 'status', 'primary_tenant_id', 'move_in_date', 'date_purchased')
+    )
+    today = datetime.date.today()
+    OccupancyInterval.objects.bulk_create([
+        OccupancyInterval(
+            property_id=pk, llc_id=llc_id, status=status, tenant_id=tenant_id,
+            start_date=(move_in_date if status == 'OCC' else None) or purchased or today,
+        )
+        for pk, llc_id, status, tenant_id, move_in_date, purchased in rows.iterator(chunk_size=500)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_add_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('OCC', 'Occupied'), ('VAC', 'Vacant'), ('OFF', 'Office'), ('LOT', 'Lot Vacant'), ('OTH', 'Other')], max_length=3)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, help_text='First day of the next interval; empty while current', null=True)),
+                ('llc', models.ForeignKey(db_index=False, help_text='Owner during the interval, so history stays with the LLC it happened under', on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_intervals', to='tracker.llc')),
+                ('property', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_intervals', to='tracker.property')),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occupancy_intervals', to='tracker.tenant')),
+            ],
+            options={
+                'ordering': ['property', 'start_date'],
+                'indexes': [models.Index(fields=['property', 'start_date'], name='occupancy_property_start_idx'), models.Index(fields=['llc', 'start_date', 'end_date'], name='occupancy_llc_dates_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('end_date__isnull', True)), fields=('property',), name='one_open_interval_per_property')],
+            },
+        ),
+        migrations.RunPython(open_initial_intervals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_occupancy_intervals'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='entry_type',
+            field=models.CharField(choices=[('CHG', 'Rent Charge'), ('PAY', 'Payment'), ('REV', 'Payment Reversal'), ('FEE', 'Late Fee')], max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='period',
+            field=models.DateField(blank=True, help_text='First day of the rent month a charge or late fee is for', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('entry_type', 'FEE')), fields=('property', 'period'), name='unique_late_fee_per_property_period'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:46
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_late_fee_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('income', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Sum of payments received', max_digits=14)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('obligations', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text="Home plus lot payments on the LLC's properties, as of the end of the month", max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('llc', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='tracker.llc')),
+            ],
+            options={
+                'ordering': ['llc_id', 'year', 'month'],
+                'constraints': [models.UniqueConstraint(fields=('llc', 'year', 'month'), name='unique_rollup_per_llc_month')],
+            },
+        ),
+    ]
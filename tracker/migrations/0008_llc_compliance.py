@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:31
+
+import django.core.validators
+import calendar
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_current_filings(apps, schema_editor):
+    """
+    Turns each LLC's "filed for this year" flag into an LLCFiling and stores
+    its deadline and status, like compliance.refresh() (which can't be used
+    here because it imports the current models). No state has a deadline
+    of its own yet, so every LLC gets LLC_FILING_DEADLINE.
+    """
+    LLC = apps.get_model('tracker', 'LLC')
+    LLCFiling = apps.get_model('tracker', 'LLCFiling')
+    today = datetime.date.today()
+    month, day = (int(part) for part in getattr(settings, 'LLC_FILING_DEADLINE', '04-15').split('-'))
+
+    def deadline(year):
+        return datetime.date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+    LLCFiling.objects.bulk_create([
+        LLCFiling(llc_id=pk, year=today.year, filed_on=last if last and last.year == today.year else today)
+        for pk, last in LLC.objects.filter(filing_current=True).values_list('pk', 'last_filing_date')
+    ], batch_size=500)
+    llcs = list(LLC.objects.only('creation_date', 'filing_current'))
+    for llc in llcs:
+        llc.filing_due = deadline(today.year)
+        if llc.creation_date.year == today.year and llc.creation_date > llc.filing_due:
+            llc.filing_due = deadline(today.year + 1)
+        llc.filing_bucket = 2 if llc.filing_current else 0 if today >= llc.filing_due else 1
+    LLC.objects.bulk_update(llcs, ['filing_due', 'filing_bucket'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_monthly_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilingDeadline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(help_text="Two-letter state code, e.g. 'TX'", max_length=2, unique=True)),
+                ('rule', models.CharField(choices=[('FIXED', 'Same date every year'), ('ANNIV', 'End of the formation anniversary month')], default='FIXED', max_length=5)),
+                ('month', models.PositiveSmallIntegerField(default=4, help_text='Month of the deadline (fixed date rule)', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)])),
+                ('day', models.PositiveSmallIntegerField(default=15, help_text="Day of the deadline (fixed date rule); past the month's end means its last day", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(31)])),
+            ],
+            options={
+                'ordering': ['state'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LLCFiling',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(help_text='Year the filing is for')),
+                ('filed_on', models.DateField(help_text='Date the filing was made')),
+                ('notes', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['llc_id', '-year'],
+            },
+        ),
+        migrations.AddField(
+            model_name='llc',
+            name='filing_bucket',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Overdue'), (1, 'Due'), (2, 'Filed')], default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='llc',
+            name='filing_due',
+            field=models.DateField(blank=True, editable=False, help_text="This year's filing deadline", null=True),
+        ),
+        migrations.AddField(
+            model_name='llc',
+            name='state',
+            field=models.CharField(blank=True, help_text='Two-letter code of the state of formation; sets the filing deadline', max_length=2),
+        ),
+        migrations.AddIndex(
+            model_name='llc',
+            index=models.Index(fields=['filing_bucket', 'filing_due', 'name'], name='llc_filing_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='llcfiling',
+            name='llc',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='filings', to='tracker.llc'),
+        ),
+        migrations.AddConstraint(
+            model_name='llcfiling',
+            constraint=models.UniqueConstraint(fields=('llc', 'year'), name='unique_filing_per_llc_year'),
+        ),
+        migrations.RunPython(record_current_filings, migrations.RunPython.noop),
+    ]
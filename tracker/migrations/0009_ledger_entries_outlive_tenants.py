@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_llc_compliance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='property',
+            field=models.ForeignKey(db_constraint=False, help_text='The property this entry is posted to', on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='tracker.property'),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='tenant',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='The tenant this entry is posted to (if any)', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='tracker.tenant'),
+        ),
+    ]
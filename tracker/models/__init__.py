@@ -3,4 +3,9 @@
 from .tenant import Tenant
 from .llc import LLC
 from .payment import Payment
-from .property import Property, PropertyFinancialHistory
\ No newline at end of file
+from .property import Property, PropertyFinancialHistory
+from .ledger import LedgerEntry, TenantBalance, PropertyBalance
+from .search import SearchDocument
+from .occupancy import OccupancyInterval
+from .rollup import MonthlyRollup
+from .compliance import FilingDeadline, LLCFiling
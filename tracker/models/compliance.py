@@ -0,0 +1,56 @@
+# tracker/models/compliance.py
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+
+from .llc import LLC
+
+
+class FilingDeadline(models.Model):
+    """
+    When LLCs formed in a state must make their annual filing. LLCs in a
+    state without a row use settings.LLC_FILING_DEADLINE.
+    """
+    class Rule(models.TextChoices):
+        FIXED_DATE = 'FIXED', 'Same date every year'
+        ANNIVERSARY = 'ANNIV', 'End of the formation anniversary month'
+
+    state = models.CharField(max_length=2, unique=True, help_text="Two-letter state code, e.g. 'TX'")
+    rule = models.CharField(max_length=5, choices=Rule.choices, default=Rule.FIXED_DATE)
+    month = models.PositiveSmallIntegerField(
+        default=4, validators=[MinValueValidator(1), MaxValueValidator(12)],
+        help_text="Month of the deadline (fixed date rule)"
+    )
+    day = models.PositiveSmallIntegerField(
+        default=15, validators=[MinValueValidator(1), MaxValueValidator(31)],
+        help_text="Day of the deadline (fixed date rule); past the month's end means its last day"
+    )
+
+    class Meta:
+        ordering = ['state']
+
+    def __str__(self):
+        if self.rule == self.Rule.ANNIVERSARY:
+            return f"{self.state}: end of anniversary month"
+        return f"{self.state}: {self.month:02d}-{self.day:02d}"
+
+
+class LLCFiling(models.Model):
+    """An LLC's annual filing for one year (annual report, franchise tax report...)."""
+    llc = models.ForeignKey(
+        LLC,
+        on_delete=models.CASCADE,
+        related_name='filings',
+        db_index=False, # Covered by unique_filing_per_llc_year
+    )
+    year = models.PositiveSmallIntegerField(help_text="Year the filing is for")
+    filed_on = models.DateField(help_text="Date the filing was made")
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['llc_id', '-year']
+        constraints = [
+            models.UniqueConstraint(fields=['llc', 'year'], name='unique_filing_per_llc_year'),
+        ]
+
+    def __str__(self):
+        return f"{self.llc_id} {self.year}: filed {self.filed_on}"
@@ -0,0 +1,113 @@
+# tracker/models/ledger.py
+from django.db import models
+from decimal import Decimal
+
+from .tenant import Tenant
+from .property import Property
+from .payment import Payment
+
+
+class LedgerEntry(models.Model):
+    """
+    One append-only line in the rent ledger.
+
+    Amounts are signed from the tenant's point of view: charges are positive
+    (money owed) and payments are negative (money received). Entries are never
+    edited or deleted; a changed or deleted payment is undone with a reversal.
+    """
+    class EntryType(models.TextChoices):
+        CHARGE = 'CHG', 'Rent Charge'
+        PAYMENT = 'PAY', 'Payment'
+        REVERSAL = 'REV', 'Payment Reversal'
+        LATE_FEE = 'FEE', 'Late Fee'
+
+    # DO_NOTHING without a DB constraint keeps the tenant, property or payment id on
+    # the entry after the row itself is deleted, so the audit trail still says where
+    # money came from, and entries (which are never deleted) don't block deletes.
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='ledger_entries',
+        help_text="The tenant this entry is posted to (if any)"
+    )
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='ledger_entries',
+        help_text="The property this entry is posted to"
+    )
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='ledger_entries',
+        help_text="The payment this entry was posted from (payments and reversals only)"
+    )
+    entry_type = models.CharField(max_length=3, choices=EntryType.choices)
+    entry_date = models.DateField(help_text="Accounting date of the entry")
+    period = models.DateField(
+        null=True,
+        blank=True,
+        help_text="First day of the rent month a charge or late fee is for"
+    )
+    amount = models.DecimalField(
+        max_digits=10, decimal_places=2,
+        help_text="Signed amount: positive increases the balance owed, negative reduces it"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Ledger Entries"
+        ordering = ['entry_date', 'pk']
+        constraints = [
+            # A property can only be charged rent once per month; this makes charge posting idempotent.
+            models.UniqueConstraint(
+                fields=['property', 'period'],
+                condition=models.Q(entry_type='CHG'),
+                name='unique_rent_charge_per_property_period',
+            ),
+            models.UniqueConstraint(
+                fields=['property', 'period'],
+                condition=models.Q(entry_type='FEE'),
+                name='unique_late_fee_per_property_period',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entry_type_display()} ${self.amount} on {self.entry_date} ({self.property_id})"
+
+
+class TenantBalance(models.Model):
+    """Running ledger balance for one tenant, kept up to date as entries are posted."""
+    tenant = models.OneToOneField(
+        Tenant,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ledger_balance'
+    )
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.tenant}: ${self.balance}"
+
+
+class PropertyBalance(models.Model):
+    """Running ledger balance for one property, kept up to date as entries are posted."""
+    property = models.OneToOneField(
+        Property,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ledger_balance'
+    )
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.property}: ${self.balance}"
@@ -1,10 +1,17 @@
 # tracker/models/llc.py
 from django.db import models
-import datetime
 
 
 class LLC(models.Model):
     """Represents a Limited Liability Company that owns properties."""
+    class FilingBucket(models.IntegerChoices):
+        """Filing statuses, in the order the LLC list sorts them (most urgent first)."""
+        OVERDUE = 0, 'Overdue'
+        DUE = 1, 'Due'
+        FILED = 2, 'Filed'
+
+    FILING_COLORS = {FilingBucket.OVERDUE: 'red', FilingBucket.DUE: 'yellow', FilingBucket.FILED: 'green'}
+
     name = models.CharField(max_length=200, unique=True, help_text="Name of the LLC")
     creation_date = models.DateField(help_text="Date the LLC was officially created")
     last_filing_date = models.DateField(
@@ -15,35 +22,36 @@ class LLC(models.Model):
         default=False,
         help_text="Has the annual filing for the current year been completed?"
     )
+    state = models.CharField(
+        max_length=2, blank=True,
+        help_text="Two-letter code of the state of formation; sets the filing deadline"
+    )
+    # Kept by tracker/compliance.py; see FilingBucket.
+    filing_due = models.DateField(null=True, blank=True, editable=False, help_text="This year's filing deadline")
+    filing_bucket = models.PositiveSmallIntegerField(choices=FilingBucket.choices, default=FilingBucket.DUE, editable=False)
 
     class Meta:
         verbose_name = "LLC"
         verbose_name_plural = "LLCs"
         ordering = ['name']
+        indexes = [
+            # The LLC list filtered and sorted by filing status, most urgent first.
+            models.Index(fields=['filing_bucket', 'filing_due', 'name'], name='llc_filing_status_idx'),
+        ]
 
     def __str__(self):
         return self.name
-    
+
     @property
     def filing_status(self):
         """
-        Determines the filing status based on the filing_current flag
-        and the annual April 15th deadline.
+        The filing status as a color, from the stored filing_bucket:
 
-        - green: The filing for the current year is marked as complete.
-        - yellow: The filing is not complete, and the deadline is approaching.
-        - red: The filing is not complete, and the deadline has passed.
+        - green: The filing for the current year has been made.
+        - yellow: The filing is not made yet, and the deadline is ahead.
+        - red: The filing is not made, and the deadline has passed.
 
         Returns:
             str: 'green', 'yellow', or 'red'
         """
-        if self.filing_current:
-            return 'green'
-
-        today = datetime.date.today()
-        deadline = datetime.date(today.year, 4, 15)
-
-        if today >= deadline:
-            return 'red'
-        else:  # today is before the deadline
-            return 'yellow'
+        return self.FILING_COLORS[self.filing_bucket]
@@ -0,0 +1,54 @@
+# tracker/models/occupancy.py
+from django.db import models
+
+from .llc import LLC
+from .property import Property
+from .tenant import Tenant
+
+
+class OccupancyInterval(models.Model):
+    """
+    A stretch of time during which a property kept the same status, owner
+    LLC and (primary) tenant. Intervals are half-open, [start_date, end_date):
+    the day a change happens belongs to the new interval. The current interval
+    has no end_date. Maintained by tracker/occupancy.py from signals.
+    """
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='occupancy_intervals',
+        db_index=False, # Covered by occupancy_property_start_idx
+    )
+    llc = models.ForeignKey(
+        LLC,
+        on_delete=models.CASCADE, # An LLC can only be deleted once it owns nothing; its old history goes with it
+        related_name='occupancy_intervals',
+        db_index=False, # Covered by occupancy_llc_dates_idx
+        help_text="Owner during the interval, so history stays with the LLC it happened under"
+    )
+    status = models.CharField(max_length=3, choices=Property.StatusChoices.choices)
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occupancy_intervals',
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True, help_text="First day of the next interval; empty while current")
+
+    class Meta:
+        ordering = ['property', 'start_date']
+        indexes = [
+            models.Index(fields=['property', 'start_date'], name='occupancy_property_start_idx'),
+            # Month reports select the intervals overlapping a date range, per LLC.
+            models.Index(fields=['llc', 'start_date', 'end_date'], name='occupancy_llc_dates_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['property'], condition=models.Q(end_date__isnull=True), name='one_open_interval_per_property',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id}: {self.get_status_display()} from {self.start_date} to {self.end_date or 'now'}"
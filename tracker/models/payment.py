@@ -5,21 +5,23 @@ from decimal import Decimal
 
 from .tenant import Tenant
 from .property import Property
+from .snapshot import SnapshotMixin
 
 
-
-class Payment(models.Model):
+class Payment(SnapshotMixin, models.Model):
     """Represents a single payment made by a tenant towards a property."""
     tenant = models.ForeignKey(
         Tenant,
         on_delete=models.PROTECT, # Keep payment history even if the tenant record is somehow deleted? Or CASCADE? PROTECT is safer.
         related_name='payments',
+        db_index=False, # Covered by payment_tenant_date_idx
         help_text="The tenant who made the payment"
     )
     property = models.ForeignKey(
         Property,
         on_delete=models.PROTECT, # Keep payment history even if property record is deleted.
         related_name='payments',
+        db_index=False, # Covered by payment_property_date_idx
         help_text="The property the payment is for"
     )
     payment_date = models.DateField(help_text="Date the payment was received")
@@ -31,7 +33,19 @@ class Payment(models.Model):
     notes = models.TextField(blank=True, help_text="Optional notes (e.g., check number, payment method, period covered)")
 
     class Meta:
-        ordering = ['-payment_date', 'tenant'] # Show most recent first
+        # Most recent first. Ties break on tenant_id rather than 'tenant' (which would sort by
+        # the tenant's name through a join), so payment_recent_idx can serve the ordering.
+        ordering = ['-payment_date', 'tenant_id']
+        indexes = [
+            # A property's or tenant's payments, usually within a date range.
+            models.Index(fields=['property', 'payment_date'], name='payment_property_date_idx'),
+            models.Index(fields=['tenant', 'payment_date'], name='payment_tenant_date_idx'),
+            # The default ordering, so payment lists read newest-first without a sort.
+            models.Index(fields=['-payment_date', 'tenant'], name='payment_recent_idx'),
+        ]
+
+    # Remembered as loaded so an edit can update the monthly rollup it moved out of (see SnapshotMixin).
+    SNAPSHOT_FIELDS = ('property_id', 'payment_date', 'amount')
 
     def __str__(self):
         return f"Payment: ${self.amount} by {self.tenant} on {self.payment_date} for {self.property.street_number} {self.property.street_name}"
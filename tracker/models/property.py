@@ -1,12 +1,64 @@
 # tracker/models/property.py
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
 from .llc import LLC
+from .snapshot import SnapshotMixin
 
 
-class Property(models.Model):
+class PropertyQuerySet(models.QuerySet):
+    def update_with_history(self, changed_by=None, **changes):
+        """
+        Like update(), but also records PropertyFinancialHistory for every
+        tracked financial field that changes, and sends properties_bulk_updated
+        so caches and derived tables can catch up (update() sends no signals).
+
+        Runs in one transaction with a fixed number of queries however many rows
+        match (up to the backend's batch size): one read of the current values,
+        one UPDATE, one read of the stored results and the history inserts.
+        New values are read back rather than computed here, so the history
+        records whatever rounding the database applied. Values may be expressions, e.g.
+        `update_with_history(rent_amount=F('rent_amount') * Decimal('1.03'))`.
+        Returns the number of rows updated, like update().
+        """
+        from ..middleware import get_current_user
+        from ..signals import properties_bulk_updated
+
+        if changed_by is None:
+            changed_by = get_current_user()
+        if changed_by is not None and not changed_by.is_authenticated:
+            changed_by = None
+
+        tracked = [f for f in PropertyFinancialHistory.TrackedField.values if f in changes]
+        with transaction.atomic(using=self.db):
+            rows = list(self.select_for_update().values('pk', *self.model.SNAPSHOT_FIELDS))
+            if not rows:
+                return 0
+            updated = self.update(**changes)
+            # The matched rows may no longer match the filter, so re-read them by pk.
+            stored = (
+                self.model._base_manager.using(self.db).only(*tracked).in_bulk([row['pk'] for row in rows])
+                if tracked else {}
+            )
+
+            history = []
+            for row in rows:
+                for field in tracked:
+                    new_value = getattr(stored[row['pk']], field)
+                    if row[field] != new_value:
+                        history.append(PropertyFinancialHistory(
+                            property_id=row['pk'], field_name=field,
+                            old_value=row[field], new_value=new_value, changed_by=changed_by,
+                        ))
+            PropertyFinancialHistory.objects.bulk_create(history, batch_size=1000)
+
+            previous = {row['pk']: {f: row[f] for f in self.model.SNAPSHOT_FIELDS} for row in rows}
+            properties_bulk_updated.send(sender=self.model, previous=previous, changes=changes)
+        return updated
+
+
+class Property(SnapshotMixin, models.Model):
     """Represents a rentable mobile home property."""
     class StatusChoices(models.TextChoices):
         OCCUPIED = 'OCC', 'Occupied'
@@ -19,6 +71,7 @@ class Property(models.Model):
         LLC,
         on_delete=models.PROTECT, # Prevent deleting LLC if it owns properties
         related_name='properties',
+        db_index=False, # Covered by the address constraint and property_llc_status_idx
         help_text="The LLC that owns this property"
     )
     street_number = models.CharField(max_length=20, help_text="e.g., '123', '456A'")
@@ -63,15 +116,27 @@ class Property(models.Model):
     power_provider = models.CharField(max_length=100, blank=True, help_text="Name of the electric utility provider")
     water_provider = models.CharField(max_length=100, blank=True, help_text="Name of the water utility provider")
 
+    objects = PropertyQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Properties"
         ordering = ['llc', 'street_number', 'street_name']
-        # Unique constraint for address within an LLC (optional but good)
-        unique_together = (('llc', 'street_name', 'street_number'),)
+        # Unique constraint for address within an LLC (optional but good). The column
+        # order matches the property list's (llc_id, street_number, street_name) ordering,
+        # so its index also serves that sort.
+        unique_together = (('llc', 'street_number', 'street_name'),)
+        indexes = [
+            # Occupancy and rent roll per LLC filter on status.
+            models.Index(fields=['llc', 'status'], name='property_llc_status_idx'),
+        ]
+
+    # Fields remembered as loaded from the database (see SnapshotMixin).
+    SNAPSHOT_FIELDS = ('llc_id', 'status', 'rent_amount', 'home_payment', 'lot_payment')
 
     def __str__(self):
         return f"{self.street_number} {self.street_name} ({self.llc.name})"
 
+
 class PropertyFinancialHistory(models.Model):
     """Tracks changes to financial fields on the Property model."""
     class TrackedField(models.TextChoices):
@@ -82,7 +147,8 @@ class PropertyFinancialHistory(models.Model):
     property = models.ForeignKey(
         Property,
         on_delete=models.CASCADE, # If property is deleted, its history is deleted too.
-        related_name='financial_history'
+        related_name='financial_history',
+        db_index=False, # Covered by fin_history_lookup_idx
     )
     field_name = models.CharField(
         max_length=20,
@@ -103,6 +169,10 @@ class PropertyFinancialHistory(models.Model):
     class Meta:
         verbose_name_plural = "Property Financial History"
         ordering = ['-date_changed']
+        indexes = [
+            # The point-in-time lookups in reports.py: first change to a field after a date.
+            models.Index(fields=['property', 'field_name', 'date_changed'], name='fin_history_lookup_idx'),
+        ]
 
     def __str__(self):
         return f"Change on {self.property} ({self.get_field_name_display()}) on {self.date_changed.strftime('%Y-%m-%d')}"
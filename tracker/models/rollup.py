@@ -0,0 +1,41 @@
+# tracker/models/rollup.py
+from django.db import models
+from decimal import Decimal
+
+from .llc import LLC
+
+
+class MonthlyRollup(models.Model):
+    """
+    One LLC's money for one calendar month: payments received (income) and
+    the home and lot payments owed on its properties (obligations). Kept up to
+    date by tracker/rollups.py, so statements never have to rescan payments.
+    """
+    llc = models.ForeignKey(
+        LLC,
+        on_delete=models.CASCADE,
+        related_name='monthly_rollups',
+        db_index=False, # Covered by unique_rollup_per_llc_month
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'), help_text="Sum of payments received")
+    payment_count = models.PositiveIntegerField(default=0)
+    obligations = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0'),
+        help_text="Home plus lot payments on the LLC's properties, as of the end of the month"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['llc_id', 'year', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['llc', 'year', 'month'], name='unique_rollup_per_llc_month'),
+        ]
+
+    @property
+    def net(self):
+        return self.income - self.obligations
+
+    def __str__(self):
+        return f"{self.llc_id} {self.year}-{self.month:02d}: ${self.income} in, ${self.obligations} out"
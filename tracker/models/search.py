@@ -0,0 +1,27 @@
+# tracker/models/search.py
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable row per tenant, property or payment, kept in sync by the
+    receivers in signals.py. The full-text index itself is backend-specific
+    and created after migrate (see tracker/search.py).
+    """
+    class Kind(models.TextChoices):
+        TENANT = 'tenant', 'Tenant'
+        PROPERTY = 'property', 'Property'
+        PAYMENT = 'payment', 'Payment'
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
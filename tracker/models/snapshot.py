@@ -0,0 +1,47 @@
+# tracker/models/snapshot.py
+
+
+class SnapshotMixin:
+    """
+    Remembers the values of SNAPSHOT_FIELDS as loaded from the database (in
+    `_loaded_values`), so signal receivers can tell what a save changed
+    without reading the row again (see signals.py).
+    """
+    SNAPSHOT_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        # Deferred fields (e.g. from only()) aren't in the snapshot; callers fall back to a query.
+        instance._loaded_values = {f: loaded[f] for f in cls.SNAPSHOT_FIELDS if f in loaded}
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the previous values by now; start tracking from this save.
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {f: getattr(self, f) for f in self.SNAPSHOT_FIELDS if f not in deferred}
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # The reloaded fields hold the database values now, so the snapshot must too.
+        deferred = self.get_deferred_fields()
+        reloaded = [
+            f for f in self.SNAPSHOT_FIELDS
+            if f not in deferred and (fields is None or {f, self._meta.get_field(f).name} & set(fields))
+        ]
+        self._loaded_values = {**getattr(self, '_loaded_values', {}), **{f: getattr(self, f) for f in reloaded}}
+
+    def snapshot_changed(self, *fields):
+        """
+        True if any of `fields` (all in SNAPSHOT_FIELDS) differs from its loaded
+        value. Fields that are still deferred can't have changed; fields with no
+        loaded value (a hand-built instance) count as changed.
+        """
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', {})
+        return any(
+            f not in loaded or loaded[f] != getattr(self, f)
+            for f in fields if f not in deferred
+        )
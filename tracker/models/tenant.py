@@ -2,9 +2,10 @@
 from django.db import models
 
 from .property import Property
+from .snapshot import SnapshotMixin
 
 
-class Tenant(models.Model):
+class Tenant(SnapshotMixin, models.Model):
     """Represents a tenant renting a property."""
     class IdentificationTypeChoices(models.TextChoices):
         DRIVERS_LICENSE = 'DL', "Driver's License"
@@ -39,6 +40,13 @@ class Tenant(models.Model):
 
     class Meta:
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['last_name', 'first_name'], name='tenant_name_idx'),
+        ]
+
+    # Remembered as loaded so a move between properties can update both, and a
+    # changed move-in date can change who the primary tenant is (see SnapshotMixin).
+    SNAPSHOT_FIELDS = ('property_id', 'move_in_date')
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
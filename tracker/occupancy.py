@@ -0,0 +1,193 @@
+# tracker/occupancy.py
+"""
+Occupancy history: maintaining OccupancyInterval rows, and month reports
+(occupancy rate and vacancy loss per LLC) computed from them in SQL.
+
+record_changes() compares each property's current status, LLC and primary
+tenant with its open interval. When something differs it closes that interval
+and opens a new one. It's called from the signal receivers for single saves
+and from properties_bulk_updated for bulk status changes.
+"""
+import datetime
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, Func, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .ledger import ID_BATCH_SIZE, _batched, primary_tenant_subquery
+from .models import OccupancyInterval, Property
+from .reports import value_as_of
+
+Status = Property.StatusChoices
+
+# Vacancy loss only counts units that could have been rented (not offices or "other").
+RENTABLE_VACANT = (Status.VACANT, Status.LOT_VACANT)
+
+
+def _current_state(property_ids):
+    """{property id: (llc id, status, primary tenant id)} as they are now."""
+    rows = (
+        Property.objects.filter(pk__in=property_ids)
+        .annotate(primary_tenant_id=Subquery(primary_tenant_subquery()))
+        .values_list('pk', 'llc_id', 'status', 'primary_tenant_id')
+    )
+    return {pk: (llc_id, status, tenant_id) for pk, llc_id, status, tenant_id in rows}
+
+
+def record_changes(property_ids, on=None):
+    """
+    Brings the open intervals of `property_ids` up to date, as of the date `on`
+    (default: today). Runs a fixed number of queries per batch of properties.
+    A second change on the same day amends that day's interval instead of
+    leaving a zero-length one behind.
+    """
+    on = on or datetime.date.today()
+    for batch in _batched(property_ids):
+        state = _current_state(batch)
+        open_intervals = {
+            interval.property_id: interval
+            for interval in OccupancyInterval.objects.filter(property_id__in=batch, end_date__isnull=True)
+        }
+        to_close, to_amend, to_open = [], [], []
+        for property_id, (llc_id, status, tenant_id) in state.items():
+            interval = open_intervals.get(property_id)
+            if interval is not None and (interval.llc_id, interval.status, interval.tenant_id) == (llc_id, status, tenant_id):
+                continue
+            if interval is not None and interval.start_date >= on:
+                interval.llc_id, interval.status, interval.tenant_id = llc_id, status, tenant_id
+                to_amend.append(interval)
+                continue
+            if interval is not None:
+                to_close.append(interval.pk)
+            to_open.append(OccupancyInterval(
+                property_id=property_id, llc_id=llc_id, status=status, tenant_id=tenant_id, start_date=on,
+            ))
+        with transaction.atomic():
+            if to_close:
+                OccupancyInterval.objects.filter(pk__in=to_close).update(end_date=on)
+            if to_amend:
+                OccupancyInterval.objects.bulk_update(to_amend, ['llc', 'status', 'tenant'])
+            OccupancyInterval.objects.bulk_create(to_open)
+
+
+def backfill(default_start=None):
+    """
+    Opens a first interval for every property that has none (e.g. ones that
+    existed before interval tracking, or were bulk created). It starts at the
+    primary tenant's move-in date for occupied properties, else the purchase
+    date, else `default_start` (today). Returns the number created.
+    """
+    default_start = default_start or datetime.date.today()
+    move_in = primary_tenant_subquery().values('move_in_date')
+    rows = (
+        Property.objects
+        .exclude(Exists(OccupancyInterval.objects.filter(property=OuterRef('pk'))))
+        .annotate(primary_tenant_id=Subquery(primary_tenant_subquery()), move_in_date=Subquery(move_in))
+        .order_by('pk')
+        .values_list('pk', 'llc_id', 'status', 'primary_tenant_id', 'move_in_date', 'date_purchased')
+    )
+    intervals = [
+        OccupancyInterval(
+            property_id=pk, llc_id=llc_id, status=status, tenant_id=tenant_id,
+            start_date=(move_in_date if status == Status.OCCUPIED else None) or purchased or default_start,
+        )
+        for pk, llc_id, status, tenant_id, move_in_date, purchased in rows.iterator(chunk_size=ID_BATCH_SIZE)
+    ]
+    OccupancyInterval.objects.bulk_create(intervals, batch_size=ID_BATCH_SIZE)
+    return len(intervals)
+
+
+# --- Reports ---
+
+class DaysBetween(Func):
+    """Whole days from `start` to `end` (both date expressions), i.e. end - start."""
+    output_field = IntegerField()
+
+    def __init__(self, end, start, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (end, end_params), (start, start_params) = (compiler.compile(e) for e in self.get_source_expressions())
+        if connection.vendor == 'sqlite':
+            sql = f'CAST(julianday({end}) - julianday({start}) AS INTEGER)'
+        elif connection.vendor == 'mysql':
+            sql = f'DATEDIFF({end}, {start})'
+        else: # PostgreSQL (and Oracle): date - date is a number of days
+            sql = f'({end} - {start})'
+        return sql, (*end_params, *start_params)
+
+
+def _month_bounds(month):
+    start = month.replace(day=1)
+    return start, start + relativedelta(months=1)
+
+
+def occupancy_for_month(month, queryset=None):
+    """
+    Per-LLC occupancy for the month containing `month`, in one aggregate query:
+    unit days, occupied days, vacant days, occupancy rate (% of unit days) and
+    vacancy loss (rent that vacant days would have brought in, at the rent in
+    effect at the start of the month). `queryset` can narrow the intervals,
+    e.g. to one LLC.
+    """
+    start, end = _month_bounds(month)
+    days_in_month = (end - start).days
+    overlap_days = DaysBetween(
+        Least(Coalesce('end_date', Value(end)), Value(end)),
+        Greatest('start_date', Value(start)),
+    )
+    money = DecimalField(max_digits=14, decimal_places=2)
+    daily_rent = ExpressionWrapper(
+        value_as_of('rent_amount', start, property_ref='property') / Value(Decimal(days_in_month)), output_field=money,
+    )
+    vacant = Q(status__in=RENTABLE_VACANT)
+    queryset = queryset if queryset is not None else OccupancyInterval.objects.all()
+    rows = (
+        queryset
+        .filter(start_date__lt=end)
+        .filter(Q(end_date__isnull=True) | Q(end_date__gt=start))
+        .order_by()
+        .values('llc_id', 'llc__name')
+        .annotate(
+            properties=Count('property', distinct=True),
+            unit_days=Sum(overlap_days),
+            occupied_days=Coalesce(Sum(overlap_days, filter=Q(status=Status.OCCUPIED)), 0),
+            vacant_days=Coalesce(Sum(overlap_days, filter=vacant), 0),
+            vacancy_loss=Coalesce(Sum(overlap_days * daily_rent, filter=vacant, output_field=money), Value(Decimal('0')), output_field=money),
+        )
+        .order_by('llc__name')
+    )
+    results = []
+    for row in rows:
+        row['month'] = start
+        row['occupancy_rate'] = round(row['occupied_days'] / row['unit_days'] * 100, 1) if row['unit_days'] else 0.0
+        row['vacancy_loss'] = Decimal(row['vacancy_loss']).quantize(Decimal('0.01'))
+        results.append(row)
+    return results
+
+
+def summarize_month(rows):
+    """Portfolio-wide totals over occupancy_for_month() rows."""
+    unit_days = sum(r['unit_days'] for r in rows)
+    occupied_days = sum(r['occupied_days'] for r in rows)
+    return {
+        'properties': sum(r['properties'] for r in rows),
+        'unit_days': unit_days,
+        'occupied_days': occupied_days,
+        'vacant_days': sum(r['vacant_days'] for r in rows),
+        'occupancy_rate': round(occupied_days / unit_days * 100, 1) if unit_days else 0.0,
+        'vacancy_loss': sum((r['vacancy_loss'] for r in rows), Decimal('0.00')),
+    }
+
+
+def occupancy_timeline(first_month, last_month, queryset=None):
+    """[{month, llcs, portfolio}] for each month from first_month to last_month, one query per month."""
+    month, last_month = first_month.replace(day=1), last_month.replace(day=1)
+    timeline = []
+    while month <= last_month:
+        rows = occupancy_for_month(month, queryset)
+        timeline.append({'month': month, 'llcs': rows, 'portfolio': summarize_month(rows)})
+        month += relativedelta(months=1)
+    return timeline
@@ -0,0 +1,162 @@
+# tracker/pagination.py
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor from the query string can't be decoded."""
+
+
+def encode_cursor(values):
+    """Encodes a tuple of ordering values into an opaque, URL-safe string."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length, fields=None):
+    """
+    Decodes a cursor made by encode_cursor(), checking it has `length` values.
+    With `fields` (one model field per value), each value is also converted by
+    its field's to_python(), so a tampered cursor fails here, not in the query.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {cursor!r}") from e
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(f"Malformed cursor: {cursor!r}")
+    if fields is not None:
+        try:
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+        except (ValidationError, TypeError, ValueError) as e:
+            raise InvalidCursor(f"Malformed cursor: {cursor!r}") from e
+        if any(value is None and not field.null for field, value in zip(fields, values)):
+            raise InvalidCursor(f"Malformed cursor: {cursor!r}")
+    return values
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset.
+
+    The rows are only fetched on first access, so a template that never touches
+    the page (e.g. because the fragment is cached) never hits the database.
+    One extra row is fetched to find out whether there is a page after this one.
+    """
+    def __init__(self, paginator, after=None, before=None):
+        self.paginator = paginator
+        self.after = after
+        self.before = before
+
+    def _query(self):
+        """The queryset for this page, with one row extra, and whether it runs backwards."""
+        paginator = self.paginator
+        size = paginator.page_size
+        if self.before is not None:
+            # Walk backwards from the cursor; _split() flips the rows back into display order.
+            queryset = paginator.queryset.filter(paginator.seek_filter(self.before, reverse=True))
+            return queryset.order_by(*paginator.reversed_ordering)[:size + 1], True
+        queryset = paginator.queryset
+        if self.after is not None:
+            queryset = queryset.filter(paginator.seek_filter(self.after))
+        return queryset.order_by(*paginator.ordering)[:size + 1], False
+
+    def _split(self, rows, backwards):
+        size = self.paginator.page_size
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if backwards:
+            rows.reverse()
+        return rows, has_more
+
+    @cached_property
+    def _rows(self):
+        queryset, backwards = self._query()
+        return self._split(list(queryset), backwards)
+
+    async def aload(self):
+        """Fetches the rows with the async ORM, for async views (templates then read them without querying)."""
+        if '_rows' not in self.__dict__:
+            queryset, backwards = self._query()
+            self.__dict__['_rows'] = self._split([row async for row in queryset], backwards)
+        return self
+
+    @property
+    def object_list(self):
+        return self._rows[0]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        if self.before is not None:
+            return bool(self.object_list)  # We came back from a later page.
+        return self._rows[1]
+
+    def has_previous(self):
+        if self.before is not None:
+            return self._rows[1]
+        return self.after is not None and bool(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.cursor_for(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.cursor_for(self.object_list[0])
+        return None
+
+
+class KeysetPaginator:
+    """
+    Cursor ("seek") pagination over a fixed, unique ordering.
+
+    Unlike OFFSET pagination, fetching page N costs the same as fetching page 1:
+    each page is a single indexed range scan starting at the last row seen.
+    `ordering` must be plain (ascending) field names that together identify a row.
+    """
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.reversed_ordering = [f'-{field}' for field in self.ordering]
+        self.page_size = page_size
+        opts = queryset.model._meta
+        self.fields = [opts.pk if name == 'pk' else opts.get_field(name) for name in self.ordering]
+
+    def cursor_for(self, obj):
+        return encode_cursor(getattr(obj, field) for field in self.ordering)
+
+    def seek_filter(self, cursor, reverse=False):
+        """
+        Builds the row-value comparison `(a, b, c) > (x, y, z)` as nested ORs,
+        which every database backend Django supports can run as an index seek.
+        """
+        values = decode_cursor(cursor, len(self.ordering), self.fields)
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            prefix = {self.ordering[j]: values[j] for j in range(i)}
+            condition |= Q(**prefix, **{f'{field}__{lookup}': values[i]})
+        return condition
+
+    def get_page(self, after=None, before=None):
+        # Validate eagerly so a bad cursor can be reported by the view.
+        for cursor in (after, before):
+            if cursor is not None:
+                decode_cursor(cursor, len(self.ordering), self.fields)
+        return KeysetPage(self, after=after, before=before)
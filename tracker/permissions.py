@@ -0,0 +1,193 @@
+# tracker/permissions.py
+"""
+Permission lookups that don't scale with the page.
+
+CachedModelBackend keeps each user's full permission set in Django's cache
+across requests, so a request asks the database at most once per user (and
+usually not at all). Entries are keyed by a version token that the receivers
+in signals.py replace whenever group membership, a user's direct permissions,
+a group's permissions or the permission table itself change.
+
+Within a request, permission_snapshot() resolves the set once and answers
+every check from memory. The `permissions` context processor hands it to
+templates as `perms`, so the edit/delete buttons on each row of a long list
+are set lookups instead of walks through the auth backends.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.functional import cached_property
+
+VERSION_KEY = 'tracker:perms:version'
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def _timeout():
+    return getattr(settings, 'TRACKER_PERMISSION_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def _new_version():
+    return str(time.time_ns())
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def _aversion():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, _new_version(), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def _user_key(user_obj, version):
+    # date_joined tells apart users that reuse a deleted user's id;
+    # is_superuser is in the key because it changes the set without any m2m change.
+    joined = user_obj.date_joined.timestamp() if user_obj.date_joined else 0
+    return f'tracker:perms:{version}:user:{user_obj.pk}:{joined}:{int(user_obj.is_superuser)}'
+
+
+def _bump_version():
+    cache.set(VERSION_KEY, _new_version(), None)
+
+
+def invalidate():
+    """
+    Drops every cached permission set, now and again when the transaction
+    commits, so a request that read the old rows in between can't leave them
+    cached. Until then this connection bypasses the cache (see _uncommitted_changes()).
+    """
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def _uncommitted_changes():
+    """
+    True while this connection's transaction has changed permissions: what it
+    reads must not be cached, as it would outlive a rollback. Django drops the
+    pending on_commit callback on rollback, which ends this too.
+    """
+    return any(func is _bump_version for _, func, _ in connection.run_on_commit)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_all_permissions() is cached across requests (see the module docstring)."""
+
+    def _cacheable(self, user_obj, obj):
+        return user_obj.is_active and not user_obj.is_anonymous and obj is None
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not self._cacheable(user_obj, obj):
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            if _uncommitted_changes():
+                return super().get_all_permissions(user_obj)
+            key = _user_key(user_obj, _version())
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, _timeout())
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
+
+    async def aget_all_permissions(self, user_obj, obj=None):
+        if not self._cacheable(user_obj, obj):
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            if await sync_to_async(_uncommitted_changes)():
+                perms = {*await self.aget_user_permissions(user_obj), *await self.aget_group_permissions(user_obj)}
+            else:
+                key = _user_key(user_obj, await _aversion())
+                perms = await cache.aget(key)
+                if perms is None:
+                    perms = {*await self.aget_user_permissions(user_obj), *await self.aget_group_permissions(user_obj)}
+                    await cache.aset(key, perms, _timeout())
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
+
+
+class AppPermissions:
+    """`perms.<app_label>` of a PermissionSnapshot."""
+    def __init__(self, snapshot, app_label):
+        self.snapshot, self.app_label = snapshot, app_label
+
+    def __getitem__(self, codename):
+        return self.snapshot.has_perm(f'{self.app_label}.{codename}')
+
+    def __contains__(self, codename):
+        return self[codename]
+
+    def __bool__(self):
+        return self.snapshot.has_module_perms(self.app_label)
+
+    def __iter__(self):
+        # Like django.contrib.auth.context_processors.PermLookupDict, to stop {% for %} guessing.
+        raise TypeError("AppPermissions is not iterable.")
+
+
+class PermissionSnapshot:
+    """
+    A user's permissions, resolved once on first use. Answers has_perm() the
+    way User.has_perm() does for users authenticated by the model backend,
+    and works in templates like Django's PermWrapper: {{ perms.tracker }},
+    {{ perms.tracker.view_llc }} and {% if 'tracker.view_llc' in perms %}.
+    """
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def _resolved(self):
+        user = self.user
+        if not user.is_active:
+            return False, frozenset()
+        return user.is_superuser, frozenset(user.get_all_permissions())
+
+    @cached_property
+    def _app_labels(self):
+        return {perm.split('.', 1)[0] for perm in self._resolved[1]}
+
+    def has_perm(self, perm):
+        is_superuser, perms = self._resolved
+        return is_superuser or perm in perms
+
+    def has_perms(self, perm_list):
+        return all(self.has_perm(perm) for perm in perm_list)
+
+    def has_module_perms(self, app_label):
+        return self._resolved[0] or app_label in self._app_labels
+
+    def __getitem__(self, app_label):
+        return AppPermissions(self, app_label)
+
+    def __contains__(self, perm_name):
+        if '.' not in perm_name:
+            return self.has_module_perms(perm_name)
+        return self.has_perm(perm_name)
+
+    def __iter__(self):
+        raise TypeError("PermissionSnapshot is not iterable.")
+
+
+def permission_snapshot(request):
+    """The PermissionSnapshot of request.user, made once per request."""
+    snapshot = getattr(request, '_tracker_permissions', None)
+    if snapshot is None:
+        snapshot = PermissionSnapshot(getattr(request, 'user', None) or AnonymousUser())
+        request._tracker_permissions = snapshot
+    return snapshot
+
+
+def permissions(request):
+    """Context processor: `perms` backed by the request's PermissionSnapshot (listed after the auth one)."""
+    return {'perms': permission_snapshot(request)}
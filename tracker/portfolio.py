@@ -0,0 +1,217 @@
+# tracker/portfolio.py
+"""
+Synthetic LLC -> Property -> Tenant -> Payment data at production-like sizes,
+for load testing and benchmarks (see the generate_portfolio and benchmark
+management commands). Never run this against a real database.
+
+Everything is written with bulk_create in batches. Payments go through the
+same path as a bulk import (payments_bulk_created), so the ledger, search
+index and cached metrics are built alongside them.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+
+from . import compliance, fragments, ledger, metrics, occupancy, search
+from .models import LLC, LLCFiling, Payment, Property, Tenant
+from .signals import payments_bulk_created
+
+DEFAULT_BATCH_SIZE = 2000
+
+FIRST_NAMES = [
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Carlos', 'Maria',
+    'Daniel', 'Karen', 'Luis', 'Nancy', 'Anthony', 'Lisa', 'Kevin', 'Betty', 'Jose', 'Ashley',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+]
+STREET_NAMES = [
+    'Main St', 'Oak Ave', 'Pine Rd', 'Maple Dr', 'Cedar Ln', 'Elm St', 'Lakeview Dr', 'Hillcrest Rd',
+    'Sunset Blvd', 'Park Ave', 'Willow Way', 'Meadow Ln', 'River Rd', 'Birch Ct', 'Spring St', 'Valley Dr',
+]
+LLC_WORDS = ['Oak', 'River', 'Summit', 'Prairie', 'Harbor', 'Granite', 'Cedar', 'Sunrise', 'Pioneer', 'Liberty']
+MAKES = ['Clayton', 'Champion', 'Fleetwood', 'Skyline', 'Palm Harbor', 'Cavco', 'Oakwood', 'Redman']
+SIZES = ['14x60', '14x70', '16x76', '28x52', 'Double Wide', 'Single Wide']
+
+
+class PortfolioGenerator:
+    """
+    Generates `llcs` LLCs owning `properties` properties in total, an
+    `occupancy` share of them with a tenant, and monthly payments going back
+    `years` years. The same `seed` always produces the same data.
+    """
+    def __init__(self, llcs=10, properties=500, years=2, occupancy=0.9, seed=None,
+                 batch_size=DEFAULT_BATCH_SIZE, rent_charges=False, today=None, progress=None):
+        self.llc_count = llcs
+        self.property_count = properties
+        self.years = years
+        self.occupancy = occupancy
+        self.random = random.Random(seed)
+        self.batch_size = max(1, batch_size)
+        self.rent_charges = rent_charges
+        self.today = today or datetime.date.today()
+        self.start = self.today - relativedelta(years=years)
+        self.progress = progress or (lambda message: None)
+        self.counts = {'llcs': 0, 'properties': 0, 'tenants': 0, 'payments': 0, 'rent_charges': 0}
+
+    def _date_between(self, start, end):
+        return start + datetime.timedelta(days=self.random.randint(0, max(0, (end - start).days)))
+
+    def _money(self, low, high, step=25):
+        return Decimal(self.random.randrange(low, high + 1, step))
+
+    def _create_llcs(self):
+        offset = LLC.objects.count() # Keeps names unique when generating into a database with data
+        llcs = [
+            LLC(
+                name=f'{self.random.choice(LLC_WORDS)} {self.random.choice(LLC_WORDS)} Holdings {offset + i + 1:04d} LLC',
+                creation_date=self._date_between(self.start - relativedelta(years=5), self.start),
+                filing_current=self.random.random() < 0.7,
+            )
+            for i in range(self.llc_count)
+        ]
+        llcs = LLC.objects.bulk_create(llcs, batch_size=self.batch_size)
+        LLCFiling.objects.bulk_create(
+            [LLCFiling(llc=llc, year=self.today.year, filed_on=self._date_between(self.today.replace(month=1, day=1), self.today)) for llc in llcs if llc.filing_current],
+            batch_size=self.batch_size,
+        )
+        compliance.refresh(llcs, self.today) # bulk_create() sends no post_save
+        self.counts['llcs'] = len(llcs)
+        return llcs
+
+    def _build_properties(self, llcs):
+        street_numbers = {llc.pk: 100 for llc in llcs}
+        for _ in range(self.property_count):
+            llc = self.random.choice(llcs)
+            street_numbers[llc.pk] += self.random.randint(1, 4)
+            occupied = self.random.random() < self.occupancy
+            yield Property(
+                llc=llc,
+                street_number=str(street_numbers[llc.pk]),
+                street_name=self.random.choice(STREET_NAMES),
+                date_purchased=self._date_between(self.start - relativedelta(years=3), self.today - relativedelta(months=1)),
+                size=self.random.choice(SIZES),
+                status=Property.StatusChoices.OCCUPIED if occupied else Property.StatusChoices.VACANT,
+                rent_amount=self._money(450, 1200),
+                home_payment=self._money(0, 400),
+                lot_payment=self._money(0, 250),
+                make=self.random.choice(MAKES),
+                year=self.random.randint(1985, self.today.year),
+                security_deposit=self._money(300, 1000, 50),
+                bedrooms=self.random.randint(1, 4),
+                bathrooms=Decimal(self.random.choice(['1.0', '1.5', '2.0'])),
+            )
+
+    def _create_in_batches(self, model, objects):
+        created, batch = [], []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                created.extend(model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created.extend(model.objects.bulk_create(batch))
+        return created
+
+    def _build_tenants(self, properties):
+        for prop in properties:
+            if prop.status != Property.StatusChoices.OCCUPIED:
+                continue
+            moved_in = self._date_between(max(prop.date_purchased, self.start), self.today - relativedelta(months=1))
+            yield Tenant(
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=self.random.choice(LAST_NAMES),
+                phone_number=f'({self.random.randint(200, 989)}) {self.random.randint(200, 999)}-{self.random.randint(0, 9999):04d}',
+                is_approved=True,
+                date_approved=moved_in - datetime.timedelta(days=self.random.randint(3, 30)),
+                move_in_date=moved_in,
+                property=prop,
+            )
+
+    def _payment_note(self):
+        kind = self.random.random()
+        if kind < 0.45:
+            return f'Check #{self.random.randint(1000, 99999)}'
+        if kind < 0.7:
+            return f'Money order {self.random.randint(100000, 999999)}'
+        if kind < 0.9:
+            return 'ACH'
+        return 'Cash'
+
+    def _build_payments(self, tenants, rents):
+        """Monthly payments from each tenant's move-in; a few are late, partial or missed."""
+        for tenant in tenants:
+            rent = rents[tenant.property_id]
+            month = (tenant.move_in_date + relativedelta(months=1)).replace(day=1) # First rent is due the month after move-in
+            while month <= self.today:
+                roll = self.random.random()
+                if roll >= 0.03: # ~3% of months are missed
+                    late = roll > 0.9
+                    day = self.random.randint(6, 20) if late else self.random.randint(1, 5)
+                    paid_on = month.replace(day=day)
+                    if paid_on <= self.today:
+                        amount = (rent / 2).quantize(Decimal('0.01')) if roll > 0.97 else rent
+                        yield Payment(
+                            tenant=tenant, property_id=tenant.property_id, payment_date=paid_on,
+                            amount=amount, notes=self._payment_note(),
+                        )
+                month += relativedelta(months=1)
+
+    def _create_payments(self, tenants, rents):
+        batch = []
+
+        def flush():
+            # Each batch commits on its own, so the search index catches up as we go.
+            with transaction.atomic():
+                created = Payment.objects.bulk_create(batch)
+                payments_bulk_created.send(sender=Payment, payments=created)
+            self.counts['payments'] += len(created)
+            batch.clear()
+            if self.counts['payments'] // self.batch_size % 25 == 0:
+                self.progress(f"  {self.counts['payments']} payments...")
+
+        for payment in self._build_payments(tenants, rents):
+            batch.append(payment)
+            if len(batch) >= self.batch_size:
+                flush()
+        if batch:
+            flush()
+
+    def _post_rent_charges(self):
+        month = self.start.replace(day=1)
+        while month <= self.today:
+            self.counts['rent_charges'] += len(ledger.post_monthly_rent_charges(month))
+            month += relativedelta(months=1)
+
+    def run(self):
+        """Generates the portfolio and returns the number of rows created per kind."""
+        self.progress(f"Creating {self.llc_count} LLCs and {self.property_count} properties...")
+        with transaction.atomic():
+            llcs = self._create_llcs()
+            properties = self._create_in_batches(Property, self._build_properties(llcs))
+            tenants = self._create_in_batches(Tenant, self._build_tenants(properties))
+        self.counts['properties'] = len(properties)
+        self.counts['tenants'] = len(tenants)
+
+        # bulk_create skips post_save, so index and invalidate the new rows directly.
+        if properties:
+            search.index_queryset(search.Kind.PROPERTY, Property.objects.filter(pk__gte=properties[0].pk, pk__lte=properties[-1].pk))
+        if tenants:
+            search.index_queryset(search.Kind.TENANT, Tenant.objects.filter(pk__gte=tenants[0].pk, pk__lte=tenants[-1].pk))
+        metrics.invalidate_llc_list()
+        metrics.invalidate_llc(*[llc.pk for llc in llcs])
+        fragments.bump(LLC, Property, Tenant)
+        occupancy.backfill(default_start=self.start) # Occupancy history from each move-in or purchase
+
+        self.progress(f"Creating payments for {len(tenants)} tenants...")
+        self._create_payments(tenants, {p.pk: p.rent_amount for p in properties})
+        if self.rent_charges:
+            self.progress("Posting monthly rent charges...")
+            self._post_rent_charges()
+        return self.counts
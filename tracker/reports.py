@@ -0,0 +1,80 @@
+# tracker/reports.py
+"""
+Point-in-time ("as of") queries over PropertyFinancialHistory.
+
+Every history row stores the value a field had before the change. So the value
+on date D is the old_value of the first change made after D, or the current
+value if nothing has changed since. That lookup is a correlated subquery, so a
+whole portfolio is reconstructed in one SQL statement with no per-property
+replay in Python.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Property, PropertyFinancialHistory
+
+TRACKED_FIELDS = tuple(PropertyFinancialHistory.TrackedField.values)
+
+
+def _end_of_day(as_of):
+    """First instant after `as_of`, in the current time zone: changes before it are in effect."""
+    next_day = datetime.datetime.combine(as_of + datetime.timedelta(days=1), datetime.time.min)
+    return timezone.make_aware(next_day) if settings.USE_TZ else next_day
+
+
+def value_as_of(field, as_of, property_ref='pk'):
+    """
+    An expression for the value `field` had at the end of `as_of`, for use in
+    annotate(). `property_ref` is the path to the property from the outer
+    query: 'pk' on Property querysets, e.g. 'property' on models that point to one.
+    """
+    if field not in TRACKED_FIELDS:
+        raise ValueError(f"{field!r} is not a tracked financial field")
+    first_later_change = (
+        PropertyFinancialHistory.objects
+        .filter(property=OuterRef(property_ref), field_name=field, date_changed__gte=_end_of_day(as_of))
+        .order_by('date_changed', 'pk')
+        .values('old_value')[:1]
+    )
+    current = F(field) if property_ref == 'pk' else F(f'{property_ref}__{field}')
+    money = DecimalField(max_digits=8, decimal_places=2)
+    return Coalesce(Subquery(first_later_change, output_field=money), current, output_field=money)
+
+
+def financials_as_of(as_of, queryset=None):
+    """
+    Annotates properties with rent_amount_as_of, home_payment_as_of and
+    lot_payment_as_of. Properties purchased after `as_of` are left out.
+    """
+    queryset = queryset if queryset is not None else Property.objects.all()
+    return (
+        queryset
+        .filter(Q(date_purchased__isnull=True) | Q(date_purchased__lte=as_of))
+        .annotate(**{f'{field}_as_of': value_as_of(field, as_of) for field in TRACKED_FIELDS})
+    )
+
+
+def rent_roll_by_llc(as_of, queryset=None):
+    """Scheduled rent and obligations per LLC as of a date, aggregated in the database."""
+    return (
+        financials_as_of(as_of, queryset)
+        .order_by()
+        .values('llc_id', 'llc__name')
+        .annotate(
+            property_count=Count('pk'),
+            rent_total=Sum('rent_amount_as_of'),
+            home_payment_total=Sum('home_payment_as_of'),
+            lot_payment_total=Sum('lot_payment_as_of'),
+        )
+        .order_by('llc__name')
+    )
+
+
+def rent_for_month(year, month, queryset=None):
+    """Total scheduled rent for a month (the rent in effect on its first day)."""
+    as_of = datetime.date(year, month, 1)
+    return financials_as_of(as_of, queryset).aggregate(total=Sum('rent_amount_as_of'))['total'] or 0
@@ -0,0 +1,296 @@
+# tracker/rollups.py
+"""
+Monthly per-LLC rollups (models/rollup.py) and the financial statements
+built from them.
+
+A rollup cell is one (LLC, month). Saving or deleting a payment marks the
+cells it lands in (old and new) for an income refresh. A change to a
+property's LLC, home payment or lot payment marks the current month of the
+LLCs involved for an obligations refresh. A change of LLC also marks, for
+both LLCs, every month the property has payments in for an income refresh
+and every stored month since its purchase for an obligations refresh.
+Marked cells are recomputed from the raw rows when the transaction commits,
+a few aggregate queries for the whole batch, like the search index in
+search.py. Cells nobody has asked for yet are filled in the first time a
+statement needs them. After that, statements read nothing but rollup rows.
+
+Income and obligations follow the LLC that owns the property when the cell
+is computed, so a property that changes hands takes its past months with it,
+the same attribution rebuild() uses.
+"""
+import datetime
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, DecimalField, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import LLC, MonthlyRollup, Payment, Property
+from .reports import value_as_of
+
+ZERO = Decimal('0.00')
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def _months(first, last):
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month += relativedelta(months=1)
+
+
+# --- Computing cells ---
+
+def _income(cells):
+    """{(llc id, month): (income, payment count)} for `cells`, in one grouped query."""
+    if not cells:
+        return {}
+    llc_ids = {llc_id for llc_id, _ in cells}
+    first = min(month for _, month in cells)
+    last = max(month for _, month in cells) + relativedelta(months=1)
+    rows = (
+        Payment.objects
+        .filter(property__llc_id__in=llc_ids, payment_date__gte=first, payment_date__lt=last)
+        .annotate(month=TruncMonth('payment_date'))
+        .order_by()
+        .values('property__llc_id', 'month')
+        .annotate(total=Sum('amount'), count=Count('pk'))
+    )
+    return {(row['property__llc_id'], row['month']): (row['total'], row['count']) for row in rows}
+
+
+def _obligations(cells, months_per_query=60):
+    """
+    {(llc id, month): home + lot payments owed} for `cells`. Each month is
+    one aggregate column (values as of that month's end), so a query covers
+    many months.
+    """
+    months = sorted({month for _, month in cells})
+    llc_ids = {llc_id for llc_id, _ in cells}
+    results = {}
+    for start in range(0, len(months), months_per_query):
+        columns = {}
+        for i, month in enumerate(months[start:start + months_per_query]):
+            month_end = month + relativedelta(months=1) - datetime.timedelta(days=1)
+            owned = Q(date_purchased__isnull=True) | Q(date_purchased__lte=month_end)
+            columns[f'm{i}'] = (month, Coalesce(
+                Sum(value_as_of('home_payment', month_end) + value_as_of('lot_payment', month_end), filter=owned),
+                Value(ZERO), output_field=MONEY,
+            ))
+        rows = (
+            Property.objects
+            .filter(llc_id__in=llc_ids)
+            .order_by()
+            .values('llc_id')
+            .annotate(**{alias: expression for alias, (_, expression) in columns.items()})
+        )
+        for row in rows:
+            results.update({(row['llc_id'], month): row[alias] for alias, (month, _) in columns.items()})
+    return {cell: results[cell] for cell in cells if cell in results}
+
+
+def refresh(income_cells=(), obligation_cells=()):
+    """
+    Recomputes the income of `income_cells` and the obligations of
+    `obligation_cells` ((llc id, first of month) pairs) and upserts the rows.
+    Cells without a row yet get both computed. Returns the rows.
+    """
+    income_cells, obligation_cells = set(income_cells), set(obligation_cells)
+    cells = income_cells | obligation_cells
+    if not cells:
+        return []
+    existing = {
+        (row.llc_id, datetime.date(row.year, row.month, 1)): row
+        for row in MonthlyRollup.objects.filter(
+            llc_id__in={llc_id for llc_id, _ in cells},
+            year__in={month.year for _, month in cells},
+        )
+    }
+    new_cells = cells - existing.keys()
+    income = _income(income_cells | new_cells)
+    obligations = _obligations(obligation_cells | new_cells)
+
+    rows = []
+    for cell in sorted(cells):
+        llc_id, month = cell
+        row = existing.get(cell) or MonthlyRollup(llc_id=llc_id, year=month.year, month=month.month)
+        if cell in income_cells or cell in new_cells:
+            row.income, row.payment_count = income.get(cell, (ZERO, 0))
+        if cell in obligation_cells or cell in new_cells:
+            row.obligations = obligations.get(cell, ZERO)
+        rows.append(row)
+    return MonthlyRollup.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['llc', 'year', 'month'],
+        update_fields=['income', 'payment_count', 'obligations', 'updated_at'],
+        batch_size=500,
+    )
+
+
+def rebuild(llc_ids=None, first_month=None, last_month=None):
+    """
+    Recomputes every cell from `first_month` (default: the oldest payment or
+    purchase) through `last_month` (default: this month). Returns the number of rows written.
+    """
+    llc_ids = list(llc_ids) if llc_ids is not None else list(LLC.objects.values_list('pk', flat=True))
+    last_month = month_start(last_month or datetime.date.today())
+    if first_month is None:
+        first_payment = Payment.objects.filter(property__llc_id__in=llc_ids).aggregate(first=Min('payment_date'))['first']
+        first_purchase = Property.objects.filter(llc_id__in=llc_ids).aggregate(first=Min('date_purchased'))['first']
+        first_month = min(filter(None, [first_payment, first_purchase, last_month]))
+    cells = {(llc_id, month) for month in _months(first_month, last_month) for llc_id in llc_ids}
+    refresh(cells, cells)
+    return len(cells)
+
+
+# --- Keeping cells in sync ---
+#
+# As in search.py, saves only queue cells; they are recomputed once the
+# transaction commits, so a bulk import refreshes each cell once.
+
+_local = threading.local()
+
+
+def _pending():
+    if not hasattr(_local, 'pending'):
+        _local.pending = {'payments': set(), 'obligations': set(), 'moves': set()}
+    return _local.pending
+
+
+def schedule_payments(cells):
+    """Queues (property id, payment date) pairs whose month's income changed."""
+    _pending()['payments'].update((property_id, month_start(day)) for property_id, day in cells)
+    transaction.on_commit(_refresh_pending)
+
+
+def schedule_obligations(llc_ids, day=None):
+    """Queues the obligations of `llc_ids` for the month of `day` (default: this month)."""
+    month = month_start(day or datetime.date.today())
+    _pending()['obligations'].update((llc_id, month) for llc_id in llc_ids if llc_id is not None)
+    transaction.on_commit(_refresh_pending)
+
+
+def schedule_moves(moves):
+    """
+    Queues (property id, previous LLC id) pairs of properties that changed
+    LLC: every month they have payments in moves from one LLC's income to the other's.
+    """
+    _pending()['moves'].update((property_id, llc_id) for property_id, llc_id in moves if llc_id is not None)
+    transaction.on_commit(_refresh_pending)
+
+
+def _moved_income_cells(moves, llc_for_property):
+    """The (llc id, month) cells, old LLC and new, of the months moved properties have payments in."""
+    previous_llcs = defaultdict(set)
+    for property_id, llc_id in moves:
+        previous_llcs[property_id].add(llc_id)
+    months = (
+        Payment.objects
+        .filter(property_id__in=previous_llcs)
+        .annotate(month=TruncMonth('payment_date'))
+        .order_by()
+        .values_list('property_id', 'month')
+        .distinct()
+    )
+    cells = set()
+    for property_id, month in months:
+        llc_ids = previous_llcs[property_id] | {llc_for_property.get(property_id)}
+        cells.update((llc_id, month) for llc_id in llc_ids if llc_id is not None)
+    return cells
+
+
+def _moved_obligation_cells(moves, llc_for_property):
+    """
+    The stored (llc id, month) cells, old LLC and new, from each moved
+    property's purchase on. Cells without a row yet get the new owner when computed.
+    """
+    llcs = defaultdict(set)
+    for property_id, llc_id in moves:
+        llcs[property_id].update(pk for pk in (llc_id, llc_for_property.get(property_id)) if pk is not None)
+    purchased = dict(Property.objects.filter(pk__in=llcs).values_list('pk', 'date_purchased'))
+    rows = MonthlyRollup.objects.filter(llc_id__in=set().union(*llcs.values())).values_list('llc_id', 'year', 'month')
+    cells = set()
+    for llc_id, year, month in rows:
+        month = datetime.date(year, month, 1)
+        if any(
+            llc_id in llc_ids and (purchased.get(property_id) is None or month >= month_start(purchased[property_id]))
+            for property_id, llc_ids in llcs.items()
+        ):
+            cells.add((llc_id, month))
+    return cells
+
+
+def _refresh_pending():
+    pending = _local.__dict__.pop('pending', None)
+    if not pending: # Already handled by an earlier callback in the same commit
+        return
+    property_ids = {property_id for property_id, _ in pending['payments'] | pending['moves']}
+    llc_for_property = dict(Property.objects.filter(pk__in=property_ids).values_list('pk', 'llc_id')) if property_ids else {}
+    income_cells = {
+        (llc_for_property[property_id], month)
+        for property_id, month in pending['payments'] if property_id in llc_for_property
+    }
+    if pending['moves']:
+        income_cells |= _moved_income_cells(pending['moves'], llc_for_property)
+        pending['obligations'] |= _moved_obligation_cells(pending['moves'], llc_for_property)
+    # Cells queued in a transaction that rolled back may name LLCs that no longer exist.
+    queued_llc_ids = {llc_id for llc_id, _ in pending['obligations']} | {llc_id for _, llc_id in pending['moves']}
+    if queued_llc_ids:
+        gone = queued_llc_ids - set(LLC.objects.filter(pk__in=queued_llc_ids).values_list('pk', flat=True))
+        income_cells = {cell for cell in income_cells if cell[0] not in gone}
+        pending['obligations'] = {cell for cell in pending['obligations'] if cell[0] not in gone}
+    refresh(income_cells, pending['obligations'])
+
+
+# --- Statements ---
+
+def _totals(rows):
+    income = sum((row.income for row in rows), ZERO)
+    obligations = sum((row.obligations for row in rows), ZERO)
+    return {'income': income, 'obligations': obligations, 'net': income - obligations}
+
+
+def statement(llc, first_year, last_year, today=None):
+    """
+    Monthly income, obligations and net cash flow for `llc` from January of
+    `first_year` through December of `last_year` (or the current month), with
+    yearly and overall totals. Reads rollups only, except for months that
+    have never been rolled up, which are computed once and stored.
+    """
+    today = today or datetime.date.today()
+    first = datetime.date(first_year, 1, 1)
+    last = min(datetime.date(last_year, 12, 1), month_start(today))
+    wanted = [(llc.pk, month) for month in _months(first, last)]
+
+    rows = {
+        datetime.date(row.year, row.month, 1): row
+        for row in MonthlyRollup.objects.filter(llc=llc, year__gte=first_year, year__lte=last_year)
+    }
+    missing = [cell for cell in wanted if cell[1] not in rows]
+    if missing:
+        rows.update({datetime.date(row.year, row.month, 1): row for row in refresh(missing, missing)})
+
+    years = []
+    for year in range(first_year, last.year + 1):
+        months = [rows[month] for _, month in wanted if month.year == year]
+        years.append({'year': year, 'months': months, **_totals(months)})
+    all_months = [row for year in years for row in year['months']]
+    return {'llc': llc, 'years': years, 'totals': _totals(all_months)}
+
+
+def statement_rows(statement_data):
+    """Flat (period, income, payments, obligations, net) rows for CSV and PDF output."""
+    for year in statement_data['years']:
+        for row in year['months']:
+            yield [f'{row.year}-{row.month:02d}', row.income, row.payment_count, row.obligations, row.net]
+        yield [f'{year["year"]} total', year['income'], sum(r.payment_count for r in year['months']), year['obligations'], year['net']]
+    totals = statement_data['totals']
+    yield ['Total', totals['income'], sum(r.payment_count for y in statement_data['years'] for r in y['months']), totals['obligations'], totals['net']]
@@ -0,0 +1,305 @@
+# tracker/search.py
+"""
+Full-text search over tenants, properties and payment notes.
+
+Every searchable object has a SearchDocument row (title + body text), kept up
+to date by the receivers in signals.py. The index over those rows depends on
+the database and is created by install_search_index() after migrate:
+
+* SQLite: an FTS5 table with the trigram tokenizer, so any fragment of three
+  or more characters (part of a phone number, street name or check number)
+  is an index lookup. Triggers keep it in step with tracker_searchdocument.
+* PostgreSQL: a GIN index on a tsvector of the text for whole words, plus a
+  pg_trgm GIN index so ILIKE '%fragment%' is indexed too.
+
+Other databases fall back to unindexed icontains filtering.
+"""
+import logging
+import re
+import threading
+from collections import defaultdict
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q
+
+from .models import Payment, Property, SearchDocument, Tenant
+
+logger = logging.getLogger(__name__)
+
+Kind = SearchDocument.Kind
+
+INDEX_CHUNK_SIZE = 1000
+DEFAULT_LIMIT = 25
+MIN_TRIGRAM_LENGTH = 3 # Shorter terms can't be looked up in a trigram index
+
+TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"title, body, content='{TABLE}', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    f"CREATE TRIGGER {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    f"CREATE TRIGGER {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    # Index anything that was already in the table before the FTS table existed.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+PG_DOCUMENT = "(title || ' ' || body)"
+PG_TSVECTOR = f"to_tsvector('simple', {PG_DOCUMENT})"
+POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_tsv ON {TABLE} USING gin ({PG_TSVECTOR})",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_trgm ON {TABLE} USING gin ({PG_DOCUMENT} gin_trgm_ops)",
+]
+
+# Whether the SQLite FTS table exists, per database alias (checked once per process).
+_fts_ready = {}
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+def _digits(value):
+    # Lets "5551234" find "(555) 123-4567".
+    return re.sub(r'\D', '', value or '')
+
+
+def _address(number, street):
+    return f'{number} {street}' if number or street else ''
+
+
+# --- Building documents ---
+
+def _tenant_documents(queryset):
+    rows = queryset.values_list(
+        'pk', 'first_name', 'last_name', 'phone_number',
+        'property__street_number', 'property__street_name', 'property__llc__name',
+    )
+    for pk, first, last, phone, number, street, llc_name in rows.iterator(chunk_size=INDEX_CHUNK_SIZE):
+        yield SearchDocument(
+            kind=Kind.TENANT, object_id=pk, title=f'{first} {last}',
+            body=_join(phone, _digits(phone), _address(number, street), llc_name),
+        )
+
+
+def _property_documents(queryset):
+    rows = queryset.values_list('pk', 'street_number', 'street_name', 'llc__name', 'make', 'year', 'vin', 'size')
+    for pk, number, street, llc_name, make, year, vin, size in rows.iterator(chunk_size=INDEX_CHUNK_SIZE):
+        yield SearchDocument(
+            kind=Kind.PROPERTY, object_id=pk, title=f'{number} {street} ({llc_name})',
+            body=_join(make, year, vin, size),
+        )
+
+
+def _payment_documents(queryset):
+    rows = queryset.values_list(
+        'pk', 'payment_date', 'amount', 'notes', 'tenant__first_name', 'tenant__last_name',
+        'property__street_number', 'property__street_name',
+    )
+    for pk, date, amount, notes, first, last, number, street in rows.iterator(chunk_size=INDEX_CHUNK_SIZE):
+        yield SearchDocument(
+            kind=Kind.PAYMENT, object_id=pk, title=f'${amount} on {date:%Y-%m-%d}',
+            body=_join(notes, first, last, _address(number, street)),
+        )
+
+
+SOURCES = {
+    Kind.TENANT: (Tenant, _tenant_documents),
+    Kind.PROPERTY: (Property, _property_documents),
+    Kind.PAYMENT: (Payment, _payment_documents),
+}
+
+
+def _upsert(documents):
+    SearchDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=['kind', 'object_id'], update_fields=['title', 'body'],
+    )
+
+
+def index_queryset(kind, queryset=None):
+    """(Re)indexes the objects in `queryset` (default: all of `kind`) in chunks. Returns the count."""
+    model, build = SOURCES[kind]
+    queryset = model.objects.all() if queryset is None else queryset
+    count, chunk = 0, []
+    for document in build(queryset.order_by()):
+        chunk.append(document)
+        if len(chunk) >= INDEX_CHUNK_SIZE:
+            _upsert(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        _upsert(chunk)
+        count += len(chunk)
+    return count
+
+
+def remove(kind, *object_ids):
+    _pending_ids()[kind].difference_update(object_ids)
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+# --- Keeping documents in sync ---
+#
+# Saves only queue the object's id; the documents are written when the
+# transaction commits (right away in autocommit mode). So indexing stays out of
+# the save itself, and many saves in one transaction share one upsert per kind.
+
+_local = threading.local()
+
+
+def _pending_ids():
+    if not hasattr(_local, 'pending'):
+        _local.pending = defaultdict(set)
+    return _local.pending
+
+
+def schedule(kind, object_ids):
+    """Queues objects of `kind` to be (re)indexed once the current transaction commits."""
+    _pending_ids()[kind].update(object_ids)
+    transaction.on_commit(lambda: _index_pending(kind))
+
+
+def _refresh(kind, object_ids):
+    """Re-indexes objects. Returns the ids whose title changed, i.e. whose mentions elsewhere are stale."""
+    model, build = SOURCES[kind]
+    changed = set()
+    object_ids = sorted(object_ids)
+    for start in range(0, len(object_ids), INDEX_CHUNK_SIZE):
+        chunk = object_ids[start:start + INDEX_CHUNK_SIZE]
+        old_titles = dict(SearchDocument.objects.filter(kind=kind, object_id__in=chunk).values_list('object_id', 'title'))
+        documents = list(build(model.objects.filter(pk__in=chunk)))
+        if documents:
+            _upsert(documents)
+        changed.update(d.object_id for d in documents if d.object_id in old_titles and old_titles[d.object_id] != d.title)
+    return changed
+
+
+def _index_pending(kind):
+    object_ids = _pending_ids().pop(kind, None)
+    if not object_ids: # Already handled by an earlier callback in the same commit
+        return
+    changed = _refresh(kind, object_ids)
+    if not changed:
+        return
+    # Tenant documents mention the property; payment documents mention the tenant and property.
+    if kind == Kind.TENANT:
+        index_queryset(Kind.PAYMENT, Payment.objects.filter(tenant_id__in=changed))
+    elif kind == Kind.PROPERTY:
+        index_queryset(Kind.TENANT, Tenant.objects.filter(property_id__in=changed))
+        index_queryset(Kind.PAYMENT, Payment.objects.filter(property_id__in=changed))
+
+
+def rebuild(kinds=None):
+    """Drops and rebuilds the documents for `kinds` (default: all). Returns {kind: count}."""
+    kinds = kinds or list(SOURCES)
+    counts = {}
+    with transaction.atomic():
+        SearchDocument.objects.filter(kind__in=kinds).delete()
+        for kind in kinds:
+            counts[kind] = index_queryset(kind)
+    return counts
+
+
+# --- Backend-specific index ---
+
+def install_search_index(using='default'):
+    """
+    Creates the full-text index for the database, if it doesn't exist yet.
+    Safe to run repeatedly; hooked up to post_migrate in apps.py.
+    """
+    connection = connections[using]
+    if TABLE not in connection.introspection.table_names():
+        return
+    if connection.vendor == 'sqlite':
+        if FTS_TABLE in connection.introspection.table_names():
+            _fts_ready[using] = True
+            return
+        try:
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                for statement in SQLITE_DDL:
+                    cursor.execute(statement)
+        except DatabaseError as e: # e.g. SQLite older than 3.34, without the trigram tokenizer
+            logger.warning("Full-text search index not created, falling back to LIKE searches: %s", e)
+            _fts_ready[using] = False
+        else:
+            _fts_ready[using] = True
+    elif connection.vendor == 'postgresql':
+        try:
+            with transaction.atomic(using=using), connection.cursor() as cursor:
+                for statement in POSTGRESQL_DDL:
+                    cursor.execute(statement)
+        except DatabaseError as e: # Creating the extension needs the right privileges
+            logger.warning("Search indexes not created (is pg_trgm available?): %s", e)
+
+
+def _sqlite_fts_available(connection):
+    if connection.alias not in _fts_ready:
+        _fts_ready[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_ready[connection.alias]
+
+
+def _like_pattern(term):
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _search_sqlite(terms, kinds, limit):
+    long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_LENGTH]
+    short_terms = [t for t in terms if len(t) < MIN_TRIGRAM_LENGTH]
+    # Each term is quoted, so FTS5 treats it as literal text rather than query syntax.
+    match = ' '.join('"{}"'.format(t.replace('"', '""')) for t in long_terms)
+    where = [f"{FTS_TABLE} MATCH %s", f"d.kind IN ({', '.join(['%s'] * len(kinds))})"]
+    params = [match, *kinds]
+    for term in short_terms:
+        where.append("(d.title || ' ' || d.body) LIKE %s ESCAPE '\\'")
+        params.append(_like_pattern(term))
+    sql = (
+        f"SELECT d.id, d.kind, d.object_id, d.title, d.body FROM {FTS_TABLE} f "
+        f"JOIN {TABLE} d ON d.id = f.rowid WHERE {' AND '.join(where)} ORDER BY f.rank LIMIT %s"
+    )
+    return list(SearchDocument.objects.raw(sql, [*params, limit]))
+
+
+def _search_postgresql(query, terms, kinds, limit):
+    where = ["kind = ANY(%s)"]
+    params = [list(kinds)]
+    # Whole words come from the tsvector index; fragments from the trigram index.
+    fragments = ' AND '.join(f"{PG_DOCUMENT} ILIKE %s" for _ in terms)
+    where.append(f"({PG_TSVECTOR} @@ plainto_tsquery('simple', %s) OR ({fragments}))")
+    params += [query, *[_like_pattern(t) for t in terms]]
+    sql = (
+        f"SELECT id, kind, object_id, title, body FROM {TABLE} WHERE {' AND '.join(where)} "
+        f"ORDER BY ts_rank({PG_TSVECTOR}, plainto_tsquery('simple', %s)) DESC, similarity({PG_DOCUMENT}, %s) DESC "
+        f"LIMIT %s"
+    )
+    return list(SearchDocument.objects.raw(sql, [*params, query, query, limit]))
+
+
+def _search_fallback(terms, kinds, limit):
+    queryset = SearchDocument.objects.filter(kind__in=kinds)
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return list(queryset.order_by('kind', 'title')[:limit])
+
+
+def search(query, kinds=None, limit=DEFAULT_LIMIT):
+    """
+    Returns up to `limit` SearchDocuments matching every word in `query`,
+    best matches first. `kinds` limits the result to some Kind values.
+    """
+    terms = (query or '').split()
+    kinds = list(kinds) if kinds is not None else list(Kind.values)
+    if not terms or not kinds:
+        return []
+    connection = connections[SearchDocument.objects.db]
+    if connection.vendor == 'sqlite' and _sqlite_fts_available(connection):
+        if any(len(t) >= MIN_TRIGRAM_LENGTH for t in terms):
+            return _search_sqlite(terms, kinds, limit)
+    elif connection.vendor == 'postgresql':
+        return _search_postgresql(' '.join(terms), terms, kinds, limit)
+    return _search_fallback(terms, kinds, limit)
@@ -1,11 +1,12 @@
 # tracker/signals.py
 import logging
-from django.db.models.signals import post_save, post_delete, pre_save
-from django.dispatch import receiver
-from django.contrib.auth.models import User # Assuming standard User model
+from django.db.models.signals import m2m_changed, post_migrate, post_save, post_delete, pre_save
+from django.dispatch import receiver, Signal
+from django.contrib.auth.models import Group, Permission, User # Assuming standard User model
 
-from .models import LLC, Property, Tenant, Payment, PropertyFinancialHistory
+from .models import LLC, FilingDeadline, LLCFiling, Property, Tenant, Payment, PropertyFinancialHistory
 from .middleware import get_current_user # Import the function to get the user
+from . import compliance, fragments, ledger, metrics, occupancy, permissions, rollups, search
 
 # Get an instance of a logger (we'll configure this in settings.py)
 action_logger = logging.getLogger('tracker.actions')
@@ -13,21 +14,43 @@ action_logger = logging.getLogger('tracker.actions')
 # List of models we want to log actions for
 LOGGED_MODELS = [LLC, Property, Tenant, Payment]
 
+# Sent after Payment.objects.bulk_create(), which doesn't send post_save.
+# Receivers get `payments`, the list of created Payment instances (with pks).
+payments_bulk_created = Signal()
+
+# Sent by Property.objects.filter(...).update_with_history(), since update() doesn't send
+# pre_save/post_save. Receivers get `previous`, a dict of {pk: {field: value before the
+# update}} for Property.SNAPSHOT_FIELDS, and `changes`, the keyword arguments passed to update().
+properties_bulk_updated = Signal()
+
+def _current_user_str():
+    user = get_current_user()
+    return str(user) if user and user.is_authenticated else "System/Unknown"
+
+def _log_action(action, sender, instance):
+    """
+    Logs a model action. The message uses %-style arguments so the final string
+    is only built by the handler (off the request thread in queued mode); the
+    same values are attached as structured fields for the JSON log. The
+    object's label, str(instance), is taken here on the calling thread, so it
+    can still load related rows (a Payment's tenant and property); it records
+    the object as it was, even if it is gone by the time the record is written.
+    """
+    user_str = _current_user_str()
+    instance_str = str(instance)
+    action_logger.info(
+        "User '%s' %s %s: '%s' (ID: %s)", user_str, action, sender.__name__, instance_str, instance.pk,
+        extra={'user': user_str, 'action': action.lower(), 'model': sender.__name__, 'object_id': instance.pk, 'object': instance_str},
+    )
+
 @receiver(post_save)
 def log_post_save(sender, instance, created, **kwargs):
     """
     Logs when an instance of a tracked model is saved (created or updated).
     """
-    if sender in LOGGED_MODELS:
-        user = get_current_user()
-        user_str = str(user) if user and user.is_authenticated else "System/Unknown"
-
+    if sender in LOGGED_MODELS and action_logger.isEnabledFor(logging.INFO):
         action = "Added" if created else "Changed"
-
-        # Log the action
-        action_logger.info(
-            f"User '{user_str}' {action} {sender.__name__}: '{str(instance)}' (ID: {instance.pk})"
-        )
+        _log_action(action, sender, instance)
         # You could add more details here if needed, like changed fields (more complex)
 
 @receiver(post_delete)
@@ -35,14 +58,8 @@ def log_post_delete(sender, instance, **kwargs):
     """
     Logs when an instance of a tracked model is deleted.
     """
-    if sender in LOGGED_MODELS:
-        user = get_current_user()
-        user_str = str(user) if user and user.is_authenticated else "System/Unknown"
-
-        # Log the action
-        action_logger.info(
-            f"User '{user_str}' Deleted {sender.__name__}: '{str(instance)}' (ID: {instance.pk})"
-        )
+    if sender in LOGGED_MODELS and action_logger.isEnabledFor(logging.INFO):
+        _log_action("Deleted", sender, instance)
 
 @receiver(pre_save, sender=Property)
 def track_property_financial_changes(sender, instance, **kwargs):
@@ -53,17 +70,25 @@ def track_property_financial_changes(sender, instance, **kwargs):
     if instance.pk is None: # This is a new object, not an update.
         return
 
-    try:
-        old_instance = Property.objects.get(pk=instance.pk)
-    except Property.DoesNotExist:
-        return # Should not happen if pk exists, but it's safe to check.
+    # A field that is still deferred was never loaded or assigned, so it can't have changed.
+    deferred = instance.get_deferred_fields()
+    tracked_fields = [f for f in ('rent_amount', 'home_payment', 'lot_payment') if f not in deferred]
+    # Compare against the values captured when the instance was loaded (Property.from_db).
+    old_values = getattr(instance, '_loaded_values', {})
+    missing = [field for field in tracked_fields if field not in old_values]
+    if missing:
+        # Built by hand, or loaded with these fields deferred and then set: read just those columns.
+        try:
+            old_instance = Property.objects.only(*missing).get(pk=instance.pk)
+        except Property.DoesNotExist:
+            return # Should not happen if pk exists, but it's safe to check.
+        old_values = {**old_values, **{field: getattr(old_instance, field) for field in missing}}
 
     user = get_current_user()
-    tracked_fields = ['rent_amount', 'home_payment', 'lot_payment']
     history_records_to_create = []
 
     for field in tracked_fields:
-        old_value = getattr(old_instance, field)
+        old_value = old_values[field]
         new_value = getattr(instance, field)
 
         if old_value != new_value:
@@ -72,4 +97,265 @@ def track_property_financial_changes(sender, instance, **kwargs):
             )
 
     if history_records_to_create:
-        PropertyFinancialHistory.objects.bulk_create(history_records_to_create)
\ No newline at end of file
+        PropertyFinancialHistory.objects.bulk_create(history_records_to_create)
+
+@receiver(post_save, sender=Payment)
+def post_payment_to_ledger(sender, instance, **kwargs):
+    """
+    Keeps the rent ledger and running balances in step with Payment saves.
+    Edits are posted as a reversal plus a new credit so the ledger stays append-only.
+    """
+    ledger.sync_payment(instance)
+
+@receiver(post_delete, sender=Payment)
+def reverse_deleted_payment(sender, instance, **kwargs):
+    """Reverses a deleted payment's ledger credit."""
+    ledger.reverse_payment(instance.pk)
+
+
+def _llc_id_for_payment(payment):
+    """LLC of a payment's property, without a query when the property is already loaded."""
+    if Payment.property.is_cached(payment):
+        return payment.property.llc_id
+    return Property.objects.filter(pk=payment.property_id).values_list('llc_id', flat=True).first()
+
+@receiver(post_save, sender=LLC)
+@receiver(post_delete, sender=LLC)
+def invalidate_llc_metrics(sender, instance, **kwargs):
+    """Drops an LLC's cached dashboard metrics, and the LLC list if one was added or removed."""
+    metrics.invalidate_llc(instance.pk)
+    if kwargs.get('created', True): # post_delete has no 'created'; treat it like a membership change.
+        metrics.invalidate_llc_list()
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def invalidate_property_metrics(sender, instance, **kwargs):
+    """Occupancy and rent roll depend on the LLC's properties."""
+    # If the property moved to another LLC, the one it left changed too.
+    previous_llc_id = getattr(instance, '_loaded_values', {}).get('llc_id')
+    metrics.invalidate_llc(instance.llc_id, previous_llc_id)
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_payment_metrics(sender, instance, **kwargs):
+    """Collected-this-month depends on the LLC's payments."""
+    llc_ids = [_llc_id_for_payment(instance)]
+    # If the payment moved to another property, the LLC it left changed too.
+    previous_property_id = getattr(instance, '_loaded_values', {}).get('property_id')
+    if previous_property_id is not None and previous_property_id != instance.property_id:
+        llc_ids.append(Property.objects.filter(pk=previous_property_id).values_list('llc_id', flat=True).first())
+    metrics.invalidate_llc(*llc_ids)
+
+
+@receiver(payments_bulk_created)
+def log_payments_bulk_created(sender, payments, **kwargs):
+    """Logs one line per bulk insert instead of one per payment."""
+    user_str = _current_user_str()
+    action_logger.info(
+        "User '%s' Bulk added %s Payment(s)", user_str, len(payments),
+        extra={'user': user_str, 'action': 'bulk_added', 'model': 'Payment', 'count': len(payments)},
+    )
+
+@receiver(payments_bulk_created)
+def post_bulk_payments_to_ledger(sender, payments, **kwargs):
+    ledger.post_payments(payments)
+
+@receiver(payments_bulk_created)
+def invalidate_bulk_payment_metrics(sender, payments, **kwargs):
+    property_ids = {p.property_id for p in payments}
+    llc_ids = Property.objects.filter(pk__in=property_ids).values_list('llc_id', flat=True).distinct()
+    metrics.invalidate_llc(*llc_ids)
+
+
+@receiver(properties_bulk_updated)
+def log_properties_bulk_updated(sender, previous, changes, **kwargs):
+    user_str = _current_user_str()
+    fields = ', '.join(sorted(changes))
+    action_logger.info(
+        "User '%s' Bulk changed %s Property(s): %s", user_str, len(previous), fields,
+        extra={'user': user_str, 'action': 'bulk_changed', 'model': 'Property', 'count': len(previous), 'fields': sorted(changes)},
+    )
+
+@receiver(properties_bulk_updated)
+def invalidate_bulk_property_metrics(sender, previous, changes, **kwargs):
+    llc_ids = {values['llc_id'] for values in previous.values()}
+    new_llc = changes.get('llc_id', changes.get('llc'))
+    if isinstance(new_llc, LLC):
+        new_llc = new_llc.pk
+    if isinstance(new_llc, int): # Properties moved into this LLC
+        llc_ids.add(new_llc)
+    metrics.invalidate_llc(*llc_ids)
+
+
+
+# --- Search index (see tracker/search.py) ---
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=Payment)
+def index_for_search(sender, instance, **kwargs):
+    search.schedule(sender._meta.model_name, [instance.pk])
+
+@receiver(post_save, sender=LLC)
+def reindex_llc_properties(sender, instance, created, **kwargs):
+    """Property documents include the LLC name."""
+    if not created:
+        search.schedule(search.Kind.PROPERTY, instance.properties.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=Tenant)
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=Payment)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove(sender._meta.model_name, instance.pk)
+
+@receiver(payments_bulk_created)
+def index_bulk_payments(sender, payments, **kwargs):
+    search.schedule(search.Kind.PAYMENT, [p.pk for p in payments])
+
+@receiver(properties_bulk_updated)
+def reindex_bulk_updated_properties(sender, previous, changes, **kwargs):
+    # Only the LLC is part of a property's document; status and financial changes don't touch it.
+    if 'llc' in changes or 'llc_id' in changes:
+        search.schedule(search.Kind.PROPERTY, list(previous))
+
+
+# --- Occupancy intervals (see tracker/occupancy.py) ---
+
+@receiver(post_save, sender=Property)
+def record_property_occupancy(sender, instance, created, **kwargs):
+    if created or instance.snapshot_changed('status', 'llc_id'):
+        occupancy.record_changes([instance.pk])
+
+@receiver(post_save, sender=Tenant)
+def record_tenant_occupancy(sender, instance, created, **kwargs):
+    """
+    Assigning, moving or unassigning a tenant can change the primary tenant of
+    both properties; so can a new move-in date (the earliest one is primary).
+    """
+    if created or instance.snapshot_changed('property_id', 'move_in_date'):
+        previous = getattr(instance, '_loaded_values', {}).get('property_id')
+        occupancy.record_changes({previous, instance.property_id} - {None})
+
+@receiver(post_delete, sender=Tenant)
+def record_tenant_removed(sender, instance, **kwargs):
+    if instance.property_id:
+        occupancy.record_changes([instance.property_id])
+
+@receiver(properties_bulk_updated)
+def record_bulk_occupancy(sender, previous, changes, **kwargs):
+    if {'status', 'llc', 'llc_id'} & set(changes):
+        occupancy.record_changes(list(previous))
+
+
+# --- Monthly rollups (see tracker/rollups.py) ---
+
+ROLLUP_PROPERTY_FIELDS = ('llc_id', 'home_payment', 'lot_payment')
+
+@receiver(post_save, sender=Payment)
+def refresh_payment_rollups(sender, instance, created, **kwargs):
+    if created or instance.snapshot_changed(*Payment.SNAPSHOT_FIELDS):
+        previous = getattr(instance, '_loaded_values', {})
+        cells = {(instance.property_id, instance.payment_date)}
+        if 'property_id' in previous and 'payment_date' in previous:
+            cells.add((previous['property_id'], previous['payment_date']))
+        rollups.schedule_payments(cells)
+
+@receiver(post_delete, sender=Payment)
+def refresh_deleted_payment_rollup(sender, instance, **kwargs):
+    rollups.schedule_payments([(instance.property_id, instance.payment_date)])
+
+@receiver(payments_bulk_created)
+def refresh_bulk_payment_rollups(sender, payments, **kwargs):
+    rollups.schedule_payments({(p.property_id, p.payment_date) for p in payments})
+
+@receiver(post_save, sender=Property)
+def refresh_property_rollups(sender, instance, created, **kwargs):
+    if created or instance.snapshot_changed(*ROLLUP_PROPERTY_FIELDS):
+        rollups.schedule_obligations({instance.llc_id, getattr(instance, '_loaded_values', {}).get('llc_id')})
+    if not created and instance.snapshot_changed('llc_id'):
+        rollups.schedule_moves([(instance.pk, getattr(instance, '_loaded_values', {}).get('llc_id'))])
+
+@receiver(post_delete, sender=Property)
+def refresh_deleted_property_rollup(sender, instance, **kwargs):
+    rollups.schedule_obligations([instance.llc_id])
+
+@receiver(properties_bulk_updated)
+def refresh_bulk_property_rollups(sender, previous, changes, **kwargs):
+    if {'home_payment', 'lot_payment', 'llc', 'llc_id'} & set(changes):
+        llc_ids = {values['llc_id'] for values in previous.values()}
+        new_llc = changes.get('llc_id', changes.get('llc'))
+        new_llc_id = new_llc.pk if isinstance(new_llc, LLC) else new_llc
+        llc_ids.add(new_llc_id)
+        rollups.schedule_obligations(llc_ids)
+        if new_llc_id is not None:
+            rollups.schedule_moves((pk, values['llc_id']) for pk, values in previous.items() if values['llc_id'] != new_llc_id)
+
+
+# --- Filing compliance (see tracker/compliance.py) ---
+
+@receiver(post_save, sender=LLC)
+def refresh_llc_compliance(sender, instance, created, raw=False, **kwargs):
+    if raw: # loaddata; refresh_filing_status --all catches up
+        return
+    if instance.filing_current or not created:
+        compliance.record_flag(instance)
+    compliance.refresh([instance])
+
+@receiver(post_save, sender=LLCFiling)
+@receiver(post_delete, sender=LLCFiling)
+def refresh_filed_llc_compliance(sender, instance, origin=None, raw=False, **kwargs):
+    if raw or isinstance(origin, LLC): # Deleted along with its LLC
+        return
+    compliance.refresh(LLC.objects.filter(pk=instance.llc_id))
+
+@receiver(post_save, sender=FilingDeadline)
+@receiver(post_delete, sender=FilingDeadline)
+def refresh_deadline_compliance(sender, raw=False, **kwargs):
+    # The state itself may have been edited, so every LLC is checked (only changed ones are saved).
+    if not raw:
+        compliance.refresh()
+
+
+# --- Cached permissions (see tracker/permissions.py) ---
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_permissions_on_membership(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        permissions.invalidate()
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions(sender, **kwargs):
+    permissions.invalidate()
+
+
+# --- List page fragments (see tracker/fragments.py) ---
+
+LISTED_MODELS = (LLC, Property, Tenant, Payment)
+
+@receiver(post_save, sender=LLC)
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=Tenant)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=LLC)
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=Tenant)
+@receiver(post_delete, sender=Payment)
+def retire_list_fragments(sender, **kwargs):
+    fragments.bump(sender)
+
+@receiver(payments_bulk_created)
+def retire_bulk_payment_fragments(sender, payments, **kwargs):
+    fragments.bump(Payment)
+
+@receiver(properties_bulk_updated)
+def retire_bulk_property_fragments(sender, previous, changes, **kwargs):
+    fragments.bump(Property)
+
+@receiver(post_migrate)
+def retire_all_list_fragments(sender, **kwargs):
+    # migrate and flush (which re-sends post_migrate) change rows without model signals.
+    fragments.bump(*LISTED_MODELS)
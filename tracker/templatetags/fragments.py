@@ -0,0 +1,53 @@
+# tracker/templatetags/fragments.py
+"""
+{% fragment table %}...{% endfragment %} and {% fragment_row table pk %}...{% endfragment_row %}:
+output a Fragment's cached HTML when the view found it, otherwise render the
+body and hand the HTML back to the Fragment for asave() (see tracker/fragments.py).
+Keep {% csrf_token %} outside them; it differs per visitor.
+"""
+from django import template
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, fragment, pk=None):
+        self.nodelist = nodelist
+        self.fragment = fragment
+        self.pk = pk
+
+    def render(self, context):
+        fragment = self.fragment.resolve(context)
+        if fragment is None:
+            return self.nodelist.render(context)
+        if self.pk is None:
+            html, key = fragment.cached(), getattr(fragment, 'key', None)
+        else:
+            pk = self.pk.resolve(context)
+            html, key = fragment.cached_row(pk), fragment.row_key(pk) if fragment.enabled else None
+        if html is None:
+            html = self.nodelist.render(context)
+            if key is not None:
+                fragment.store(key, html)
+        return html
+
+
+def _parse(parser, token, end_tag, arguments):
+    bits = token.split_contents()
+    if len(bits) != arguments + 1:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes {arguments} argument(s).")
+    nodelist = parser.parse((end_tag,))
+    parser.delete_first_token()
+    return nodelist, [parser.compile_filter(bit) for bit in bits[1:]]
+
+
+@register.tag
+def fragment(parser, token):
+    nodelist, (fragment,) = _parse(parser, token, 'endfragment', 1)
+    return FragmentNode(nodelist, fragment)
+
+
+@register.tag
+def fragment_row(parser, token):
+    nodelist, (fragment, pk) = _parse(parser, token, 'endfragment_row', 2)
+    return FragmentNode(nodelist, fragment, pk)
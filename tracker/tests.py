@@ -1,9 +1,48 @@
 # tracker/tests.py
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from unittest import mock, skipUnless
+from asgiref.sync import iscoroutinefunction
 from django.urls import reverse
-from tracker.models import LLC, Property, Tenant, Payment
+from tracker.models import LLC, FilingDeadline, LLCFiling, Property, Tenant, Payment, LedgerEntry, MonthlyRollup, OccupancyInterval, PropertyFinancialHistory, SearchDocument
+from tracker import views
+from tracker import analytics, compliance, delinquency, ledger, metrics, occupancy, reports, rollups, search
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from tracker.importers import PaymentImporter
+from tracker.portfolio import PortfolioGenerator
+from tracker.views.property import PROPERTY_LIST_ORDERING
+from tracker.views import export as tracker_export_views
+from tracker.views import reports as tracker_report_views
+from tracker import benchmarks
+from RentTracker.caches import cache_settings
+from RentTracker.database import database_settings
+from tracker.fragments import Fragment
+from tracker.pagination import encode_cursor
+from tracker.permissions import PermissionSnapshot
+from tracker.log_handlers import BatchingFileHandler, JsonLinesFormatter
+from tracker.instrumentation import QueryBudgetExceeded, request_stats
 from django.contrib.auth.models import User, Group, Permission # Assuming standard Django User model
 from django.contrib.contenttypes.models import ContentType # For permissions
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from decimal import Decimal
+import base64
+import csv
+import datetime
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
 
 # Helper function to create a user for tests
 def create_test_user(username='testuser', password='password', groups=None, permissions=None):
@@ -206,4 +245,1825 @@ class PropertyListViewPermissionTest(TestCase):
 #
 # EXPECTED OUTPUT: Tests should pass if views, templates, and permissions are set up correctly.
 # You might need to create the templates first (base.html, tracker/property_list.html)
-# and ensure the login/logout URLs are configured in your main project urls.py.
\ No newline at end of file
+# and ensure the login/logout URLs are configured in your main project urls.py.
+
+class PropertyListPaginationTest(TestCase):
+    """Tests keyset pagination and server-side filtering on the Property List View"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_test_user(permissions=[get_permission('tracker', 'property', 'view')])
+        cls.llc_a = LLC.objects.create(name='Alpha LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.llc_b = LLC.objects.create(name='Beta LLC', creation_date=datetime.date(2020, 1, 1))
+        for i in range(1, 5):
+            Property.objects.create(llc=cls.llc_a, street_number=str(i), street_name='Main St', rent_amount=Decimal('500') + i)
+            Property.objects.create(
+                llc=cls.llc_b, street_number=str(i), street_name='Elm Ave', rent_amount=Decimal('900') + i,
+                status=Property.StatusChoices.OCCUPIED
+            )
+        cls.properties_url = reverse('tracker:property_list')
+
+    def setUp(self):
+        self.client.login(username='testuser', password='password')
+
+    def test_pages_walk_forward_and_back_without_gaps(self):
+        """Following next/previous cursors visits every property exactly once, in order."""
+        response = self.client.get(self.properties_url, {'page_size': 3})
+        seen = [p.pk for p in response.context['page']]
+        page = response.context['page']
+        while page.has_next():
+            response = self.client.get(self.properties_url, {'page_size': 3, 'after': page.next_cursor})
+            page = response.context['page']
+            seen.extend(p.pk for p in page)
+        expected = list(Property.objects.order_by('llc_id', 'street_number', 'street_name').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+        # Step back one page from the last page.
+        response = self.client.get(self.properties_url, {'page_size': 3, 'before': page.previous_cursor})
+        self.assertEqual([p.pk for p in response.context['page']], expected[3:6])
+
+    def test_filters_are_applied_in_the_query(self):
+        response = self.client.get(self.properties_url, {'llc': self.llc_b.pk, 'rent_min': '902', 'rent_max': '903'})
+        self.assertEqual(sorted(p.rent_amount for p in response.context['page']), [Decimal('902'), Decimal('903')])
+        response = self.client.get(self.properties_url, {'status': Property.StatusChoices.OCCUPIED})
+        self.assertTrue(all(p.llc_id == self.llc_b.pk for p in response.context['page']))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(self.properties_url, {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page']), 8)
+        # The right number of values, of the wrong types.
+        for values in (['x', '1', 'Oak Rd'], [[1], '1', 'Oak Rd'], [None, None, None]):
+            response = self.client.get(self.properties_url, {'before': encode_cursor(values)})
+            self.assertEqual(response.status_code, 200, values)
+            self.assertEqual(len(response.context['page']), 8)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Rows read property.llc.name, which must come from the join, not one query per row."""
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.properties_url)
+        for i in range(5, 40):
+            Property.objects.create(llc=self.llc_a, street_number=str(i), street_name='Oak Rd')
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.properties_url)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class LedgerTest(TestCase):
+    """Tests for the rent ledger and its running balances"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Ledger LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop = Property.objects.create(
+            llc=cls.llc, street_number='10', street_name='Pine St', rent_amount=Decimal('800'),
+            status=Property.StatusChoices.OCCUPIED
+        )
+        cls.other_prop = Property.objects.create(llc=cls.llc, street_number='12', street_name='Pine St', rent_amount=Decimal('650'))
+        cls.tenant = Tenant.objects.create(first_name='Ada', last_name='Lovelace', property=cls.prop, move_in_date=datetime.date(2024, 1, 1))
+        cls.user = create_test_user(permissions=[
+            get_permission('tracker', 'payment', 'add'),
+            get_permission('tracker', 'payment', 'change'),
+            get_permission('tracker', 'payment', 'delete'),
+        ])
+
+    def test_monthly_charges_are_posted_once(self):
+        entries = ledger.post_monthly_rent_charges(datetime.date(2024, 3, 15))
+        self.assertEqual(len(entries), 1) # Only the occupied property is charged
+        self.assertEqual(entries[0].period, datetime.date(2024, 3, 1))
+        self.assertEqual(ledger.post_monthly_rent_charges(datetime.date(2024, 3, 1)), [])
+        self.assertEqual(ledger.get_tenant_balance(self.tenant), Decimal('800'))
+        self.assertEqual(ledger.get_property_balance(self.prop), Decimal('800'))
+
+    def test_batch_that_hits_posted_rows_is_rebuilt(self):
+        march = datetime.date(2024, 3, 1)
+        ledger.post_monthly_rent_charges(march)
+
+        def charge(prop):
+            return LedgerEntry(property=prop, entry_type=LedgerEntry.EntryType.CHARGE, entry_date=march, period=march, amount=Decimal('650'))
+
+        # The first batch was built before an overlapping run charged self.prop.
+        batches = [[charge(self.prop), charge(self.other_prop)], [charge(self.other_prop)]]
+        inserted = ledger._insert_unposted(lambda: batches.pop(0))
+        self.assertEqual([entry.property_id for entry in inserted], [self.other_prop.pk])
+        self.assertEqual(LedgerEntry.objects.filter(property=self.prop).count(), 1)
+
+    def test_payment_views_update_balances_incrementally(self):
+        ledger.post_monthly_rent_charges(datetime.date(2024, 3, 1))
+        self.client.login(username='testuser', password='password')
+        data = {'tenant': self.tenant.pk, 'property': self.prop.pk, 'payment_date': '2024-03-03', 'amount': '500.00', 'notes': ''}
+        self.client.post(reverse('tracker:payment_add'), data)
+        payment = Payment.objects.get()
+        self.assertEqual(ledger.get_tenant_balance(self.tenant), Decimal('300'))
+
+        # Moving the payment to another property reverses it on the old one.
+        self.client.post(reverse('tracker:payment_edit', args=[payment.pk]), {**data, 'amount': '800.00', 'property': self.other_prop.pk})
+        self.assertEqual(ledger.get_tenant_balance(self.tenant), Decimal('0'))
+        self.assertEqual(ledger.get_property_balance(self.prop), Decimal('800'))
+        self.assertEqual(ledger.get_property_balance(self.other_prop), Decimal('-800'))
+
+        self.client.post(reverse('tracker:payment_delete', args=[payment.pk]))
+        self.assertEqual(ledger.get_tenant_balance(self.tenant), Decimal('800'))
+        self.assertEqual(ledger.get_property_balance(self.other_prop), Decimal('0'))
+        # Nothing was rewritten: charge, payment, reversal, payment, reversal.
+        self.assertEqual(LedgerEntry.objects.count(), 5)
+
+    def test_saving_an_unchanged_payment_posts_nothing(self):
+        payment = Payment.objects.create(tenant=self.tenant, property=self.prop, payment_date=datetime.date(2024, 3, 3), amount=Decimal('100'))
+        payment.notes = 'Check #1001'
+        payment.save()
+        self.assertEqual(LedgerEntry.objects.count(), 1)
+
+    def test_rebuild_matches_incremental_balances(self):
+        ledger.post_monthly_rent_charges(datetime.date(2024, 3, 1))
+        Payment.objects.create(tenant=self.tenant, property=self.prop, payment_date=datetime.date(2024, 3, 3), amount=Decimal('125.50'))
+        before = ledger.get_tenant_balance(self.tenant)
+        ledger.rebuild_balances()
+        self.assertEqual(ledger.get_tenant_balance(self.tenant), before)
+
+    def test_large_batches_are_applied_in_bounded_statements(self):
+        payments = Payment.objects.bulk_create([
+            Payment(tenant=self.tenant, property=self.prop, payment_date=datetime.date(2024, 3, 1), amount=Decimal('1'))
+            for _ in range(600)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            ledger.post_payments(payments)
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "tracker_tenantbalance"')]
+        self.assertEqual(len(updates), 3) # 250 entries per statement
+        self.assertEqual(ledger.get_tenant_balance(self.tenant), Decimal('-600'))
+        self.assertEqual(ledger.get_property_balance(self.prop), Decimal('-600'))
+
+    def test_ledger_history_does_not_block_deletes(self):
+        ledger.post_monthly_rent_charges(datetime.date(2024, 3, 1))
+        payment = Payment.objects.create(tenant=self.tenant, property=self.prop, payment_date=datetime.date(2024, 3, 3), amount=Decimal('800'))
+        payment.delete()
+        tenant_id, property_id = self.tenant.pk, self.prop.pk
+        self.tenant.delete()
+        self.prop.delete()
+        # Charge, payment and reversal keep pointing at the deleted rows.
+        self.assertEqual(LedgerEntry.objects.filter(tenant_id=tenant_id, property_id=property_id).count(), 3)
+
+
+class DashboardMetricsTest(TestCase):
+    """Tests for the cache-backed dashboard metrics"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_test_user(permissions=[get_permission('tracker', 'property', 'view'), get_permission('tracker', 'llc', 'view')])
+        cls.llc_a = LLC.objects.create(name='Alpha LLC', creation_date=datetime.date(2020, 1, 1), filing_current=True)
+        cls.llc_b = LLC.objects.create(name='Beta LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop_a = Property.objects.create(
+            llc=cls.llc_a, street_number='1', street_name='Main St', rent_amount=Decimal('1000'), status=Property.StatusChoices.OCCUPIED
+        )
+        Property.objects.create(llc=cls.llc_a, street_number='2', street_name='Main St', rent_amount=Decimal('900'))
+        cls.prop_b = Property.objects.create(
+            llc=cls.llc_b, street_number='1', street_name='Elm Ave', rent_amount=Decimal('700'), status=Property.StatusChoices.OCCUPIED
+        )
+        cls.tenant = Tenant.objects.create(first_name='Grace', last_name='Hopper', property=cls.prop_a)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_metrics_per_llc(self):
+        Payment.objects.create(tenant=self.tenant, property=self.prop_a, payment_date=datetime.date.today(), amount=Decimal('400'))
+        rows, portfolio = metrics.get_dashboard_metrics()
+        alpha = next(r for r in rows if r['id'] == self.llc_a.pk)
+        self.assertEqual(alpha['occupancy_rate'], 50.0)
+        self.assertEqual(alpha['rent_roll'], Decimal('1000'))
+        self.assertEqual(alpha['collected'], Decimal('400'))
+        self.assertEqual(portfolio['rent_roll'], Decimal('1700'))
+        self.assertEqual(portfolio['red_count'] + portfolio['yellow_count'], 1)
+
+    def test_dashboard_is_served_from_cache(self):
+        self.client.login(username='testuser', password='password')
+        self.client.get(reverse('tracker:dashboard'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tracker:dashboard'))
+        self.assertContains(response, 'Beta LLC')
+        self.assertFalse(any('tracker_property' in q['sql'] for q in queries.captured_queries))
+
+    def test_payment_invalidates_only_its_llc(self):
+        metrics.get_dashboard_metrics()
+        Payment.objects.create(tenant=self.tenant, property=self.prop_a, payment_date=datetime.date.today(), amount=Decimal('250'))
+        with CaptureQueriesContext(connection) as queries:
+            rows, _ = metrics.get_dashboard_metrics()
+        aggregate_sql = [q['sql'] for q in queries.captured_queries if 'tracker_property' in q['sql']]
+        self.assertEqual(len(aggregate_sql), 1)
+        self.assertIn(f'IN ({self.llc_a.pk})', aggregate_sql[0])
+        self.assertEqual(next(r for r in rows if r['id'] == self.llc_a.pk)['collected'], Decimal('250'))
+
+    def test_payment_moved_to_another_llc_invalidates_both(self):
+        payment = Payment.objects.create(tenant=self.tenant, property=self.prop_a, payment_date=datetime.date.today(), amount=Decimal('250'))
+        metrics.get_dashboard_metrics()
+        payment = Payment.objects.get(pk=payment.pk)
+        payment.property = self.prop_b
+        payment.save()
+        rows, _ = metrics.get_dashboard_metrics()
+        collected = {row['id']: row['collected'] for row in rows}
+        self.assertEqual((collected[self.llc_a.pk], collected[self.llc_b.pk]), (Decimal('0'), Decimal('250')))
+
+
+class ExportTest(TestCase):
+    """Tests for the streaming CSV exports"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_test_user(permissions=[
+            get_permission('tracker', 'payment', 'view'),
+            get_permission('tracker', 'property', 'view'),
+        ])
+        cls.llc_a = LLC.objects.create(name='Alpha LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.llc_b = LLC.objects.create(name='Beta LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop_a = Property.objects.create(llc=cls.llc_a, street_number='1', street_name='Main St')
+        cls.prop_b = Property.objects.create(llc=cls.llc_b, street_number='2', street_name='Elm Ave')
+        tenant = Tenant.objects.create(first_name='Alan', last_name='Turing', property=cls.prop_a)
+        for day in (1, 15):
+            Payment.objects.create(tenant=tenant, property=cls.prop_a, payment_date=datetime.date(2024, 2, day), amount=Decimal('100'))
+        Payment.objects.create(tenant=tenant, property=cls.prop_b, payment_date=datetime.date(2024, 2, 20), amount=Decimal('50'), notes='Check #7')
+
+    def setUp(self):
+        self.client.login(username='testuser', password='password')
+
+    def _rows(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_payment_export_applies_filters(self):
+        response = self.client.get(reverse('tracker:payment_export'), {'llc': self.llc_a.pk, 'date_from': '2024-02-10'})
+        rows = self._rows(response)
+        self.assertEqual(rows[0][:3], ['Payment ID', 'Date', 'Amount'])
+        self.assertEqual([r[1] for r in rows[1:]], ['2024-02-15'])
+
+    def test_property_export_uses_property_list_filters(self):
+        rows = self._rows(self.client.get(reverse('tracker:property_export'), {'llc': self.llc_b.pk}))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Beta LLC')
+
+    @skipUnless(tracker_export_views.openpyxl is not None, "openpyxl is not installed")
+    def test_payment_export_as_xlsx(self):
+        response = self.client.get(reverse('tracker:payment_export'), {'llc': self.llc_a.pk, 'format': 'xlsx'})
+        self.assertEqual(response['Content-Type'], tracker_export_views.XLSX_CONTENT_TYPE)
+        workbook = tracker_export_views.openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:3], ('Payment ID', 'Date', 'Amount'))
+        self.assertEqual(sorted(row[1].date() for row in rows[1:]), [datetime.date(2024, 2, 1), datetime.date(2024, 2, 15)])
+        self.assertEqual([row[2] for row in rows[1:]], [100, 100])
+
+    def test_invalid_filters_and_missing_permissions(self):
+        response = self.client.get(reverse('tracker:payment_export'), {'date_from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('tracker:tenant_export'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_payment_list_renders_filtered(self):
+        response = self.client.get(reverse('tracker:payment_list'), {'property': self.prop_b.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['payments']), 1)
+
+
+class PaymentImportTest(TestCase):
+    """Tests for the bulk CSV payment importer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Import LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop = Property.objects.create(llc=cls.llc, street_number='5', street_name='Birch Ln', rent_amount=Decimal('700'))
+        cls.other_prop = Property.objects.create(llc=cls.llc, street_number='7', street_name='Birch Ln')
+        cls.tenant = Tenant.objects.create(first_name='Katherine', last_name='Johnson', property=cls.prop)
+        cls.user = create_test_user(permissions=[get_permission('tracker', 'payment', 'add')])
+
+    def _csv(self, *rows):
+        return io.StringIO('payment_date,amount,tenant,property,notes\n' + '\n'.join(rows) + '\n')
+
+    def test_valid_rows_are_imported_and_errors_reported(self):
+        result = PaymentImporter(batch_size=2).run(self._csv(
+            '2024-05-01,700.00,Katherine Johnson,,Check #1',
+            f'2024-05-02,"$1,050.00",{self.tenant.pk},7 Birch Ln,',
+            '2024-05-03,-5,Katherine Johnson,,',
+            'not-a-date,10,Katherine Johnson,,',
+            '2024-05-04,10,Nobody Here,,',
+        ))
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6])
+        self.assertEqual(Payment.objects.get(notes='Check #1').property, self.prop)
+        self.assertEqual(Payment.objects.get(amount=Decimal('1050')).property, self.other_prop)
+        # Bulk inserts still reach the ledger.
+        self.assertEqual(ledger.get_tenant_balance(self.tenant), Decimal('-1750'))
+
+    def test_dry_run_saves_nothing(self):
+        with self.assertNoLogs('tracker.actions', level='INFO'):
+            result = PaymentImporter(dry_run=True).run(self._csv('2024-05-01,700.00,Katherine Johnson,,'))
+        self.assertEqual(result.created, 1)
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def test_query_count_does_not_grow_per_row(self):
+        rows = [f'2024-05-{day:02d},10,Katherine Johnson,,' for day in range(1, 29)]
+        with CaptureQueriesContext(connection) as few:
+            PaymentImporter(batch_size=1000).run(self._csv(*rows[:3]))
+        with CaptureQueriesContext(connection) as many:
+            PaymentImporter(batch_size=1000).run(self._csv(*rows))
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_missing_columns(self):
+        result = PaymentImporter().run(io.StringIO('date,amount\n2024-01-01,5\n'))
+        self.assertFalse(result.ok)
+        self.assertIn('payment_date', result.errors[0][1])
+
+    def test_upload_view(self):
+        self.client.login(username='testuser', password='password')
+        upload = SimpleUploadedFile('deposits.csv', b'payment_date,amount,tenant\n2024-05-01,700,Katherine Johnson\n2024-05-02,0,Katherine Johnson\n')
+        response = self.client.post(reverse('tracker:payment_import'), {'csv_file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(response.context['result'].errors[0][0], 3)
+
+    def test_file_that_is_not_utf8_is_reported(self):
+        self.client.login(username='testuser', password='password')
+        rows = ''.join(f'2024-05-{day:02d},700,Katherine Johnson\n' for day in range(1, 4)) + '2024-05-04,700,Katherine Johnson,Caf\xe9\n'
+        upload = SimpleUploadedFile('deposits.csv', ('payment_date,amount,tenant\n' + rows).encode('cp1252'))
+        response = self.client.post(reverse('tracker:payment_import'), {'csv_file': upload})
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertIn('UTF-8', result.errors[0][1])
+        self.assertEqual(result.created, 0)
+        self.assertFalse(Payment.objects.exists())
+
+
+class BatchingFileHandlerTest(TestCase):
+    """Tests for the queued JSON-lines action log handler"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'actions.jsonl')
+        self.logger = logging.getLogger('tracker.tests.batching')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def _handler(self, **kwargs):
+        handler = BatchingFileHandler(self.path, **kwargs)
+        handler.setFormatter(JsonLinesFormatter())
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def _lines(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_are_written_as_json_lines(self):
+        handler = self._handler(batch_size=10)
+        for i in range(25):
+            self.logger.info("Saved %s", i, extra={'model': 'Property', 'object_id': i})
+        handler.flush()
+        lines = self._lines()
+        self.assertEqual([line['object_id'] for line in lines], list(range(25)))
+        self.assertEqual(lines[3]['message'], 'Saved 3')
+        self.assertEqual(lines[3]['model'], 'Property')
+
+    def test_full_queue_drops_and_reports(self):
+        handler = self._handler(max_queue_size=2)
+        handler._ensure_writer = lambda: None # Hold the writer back so the queue fills up
+        for i in range(5):
+            self.logger.info("Saved %s", i)
+        self.assertEqual(handler.dropped, 3)
+        del handler._ensure_writer
+        handler._ensure_writer()
+        handler.flush()
+        lines = self._lines()
+        self.assertEqual([line['message'] for line in lines[:2]], ['Saved 0', 'Saved 1'])
+        self.assertEqual(lines[2]['dropped'], 3)
+
+    def test_drops_from_many_threads_are_all_counted(self):
+        handler = self._handler(max_queue_size=1)
+        handler._ensure_writer = lambda: None
+        self.logger.info("Kept")
+
+        def log_many():
+            for i in range(500):
+                self.logger.info("Saved %s", i)
+
+        threads = [threading.Thread(target=log_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(handler.dropped, 4000)
+
+    def test_model_saves_log_structured_fields(self):
+        with self.assertLogs('tracker.actions', level='INFO') as logs:
+            LLC.objects.create(name='Logged LLC', creation_date=datetime.date(2020, 1, 1))
+        record = logs.records[0]
+        self.assertEqual((record.action, record.model, record.object), ('added', 'LLC', 'Logged LLC'))
+
+
+class PropertyFinancialSnapshotTest(TestCase):
+    """Tests that financial history is diffed against the values loaded with the instance"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Snapshot LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop = Property.objects.create(llc=cls.llc, street_number='3', street_name='Cedar Ct', rent_amount=Decimal('600'))
+
+    def _property_selects(self, queries):
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and 'FROM "tracker_property"' in q['sql']]
+
+    def test_loaded_instance_saves_without_rereading_the_row(self):
+        prop = Property.objects.select_related('llc').get(pk=self.prop.pk)
+        prop.rent_amount = Decimal('650')
+        with CaptureQueriesContext(connection) as queries:
+            prop.save()
+        self.assertEqual(self._property_selects(queries), [])
+        history = PropertyFinancialHistory.objects.get()
+        self.assertEqual((history.old_value, history.new_value), (Decimal('600'), Decimal('650')))
+
+        # The snapshot moves forward with each save, so a second edit diffs against 650.
+        prop.rent_amount = Decimal('675')
+        prop.save()
+        self.assertEqual(PropertyFinancialHistory.objects.order_by('pk').last().old_value, Decimal('650'))
+
+    def test_deferred_fields_fall_back_to_one_narrow_query(self):
+        prop = Property.objects.only('pk', 'llc', 'street_number', 'street_name').get(pk=self.prop.pk)
+        prop.rent_amount = Decimal('610')
+        with CaptureQueriesContext(connection) as queries:
+            prop.save()
+        selects = self._property_selects(queries)
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('"vin"', selects[0])
+        self.assertEqual(PropertyFinancialHistory.objects.get().old_value, Decimal('600'))
+
+    def test_refresh_from_db_moves_the_snapshot(self):
+        prop = Property.objects.get(pk=self.prop.pk)
+        other = Property.objects.get(pk=self.prop.pk)
+        other.rent_amount = Decimal('700')
+        other.save()
+        prop.refresh_from_db()
+        prop.save() # Nothing changed since the refresh
+        self.assertEqual(PropertyFinancialHistory.objects.count(), 1)
+
+        other.home_payment = Decimal('50')
+        other.save()
+        prop.refresh_from_db(fields=['home_payment'])
+        self.assertFalse(prop.snapshot_changed('home_payment', 'rent_amount'))
+
+    def test_unsaved_changes_without_snapshot(self):
+        prop = Property(pk=self.prop.pk, llc=self.llc, street_number='3', street_name='Cedar Ct', rent_amount=Decimal('600'), home_payment=Decimal('100'))
+        prop.save()
+        self.assertEqual(list(PropertyFinancialHistory.objects.values_list('field_name', flat=True)), ['home_payment'])
+
+
+class PropertyBulkUpdateTest(TestCase):
+    """Tests for Property.objects.update_with_history()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Bulk LLC', creation_date=datetime.date(2020, 1, 1))
+        for i in range(1, 6):
+            Property.objects.create(llc=cls.llc, street_number=str(i), street_name='Maple Dr', rent_amount=Decimal('1000'))
+        cls.user = create_test_user(permissions=[get_permission('tracker', 'property', 'change')])
+
+    def test_rent_increase_is_audited_in_a_fixed_number_of_queries(self):
+        queryset = Property.objects.filter(llc=self.llc)
+        with CaptureQueriesContext(connection) as queries:
+            updated = queryset.update_with_history(changed_by=self.user, rent_amount=F('rent_amount') * Decimal('1.03'))
+        self.assertEqual(updated, 5)
+        # Savepoint handling aside: one read, one UPDATE, one read-back, one history INSERT.
+        statements = [q['sql'].split()[0] for q in queries.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(statements, ['SELECT', 'UPDATE', 'SELECT', 'INSERT'])
+        self.assertEqual(set(Property.objects.values_list('rent_amount', flat=True)), {Decimal('1030')})
+        history = PropertyFinancialHistory.objects.filter(field_name='rent_amount')
+        self.assertEqual(history.count(), 5)
+        self.assertEqual({(h.old_value, h.new_value, h.changed_by) for h in history}, {(Decimal('1000'), Decimal('1030'), self.user)})
+
+    def test_history_records_the_value_the_database_stored(self):
+        # Half a cent: how it rounds depends on the database, and history must agree with it.
+        Property.objects.filter(street_number='1').update_with_history(rent_amount=F('rent_amount') + Decimal('0.125'))
+        stored = Property.objects.get(street_number='1').rent_amount
+        self.assertIn(stored, {Decimal('1000.12'), Decimal('1000.13')})
+        self.assertEqual(PropertyFinancialHistory.objects.get().new_value, stored)
+
+    def test_unchanged_values_and_untracked_fields_write_no_history(self):
+        Property.objects.filter(street_number='1').update_with_history(rent_amount=Decimal('1000'), status=Property.StatusChoices.OCCUPIED)
+        self.assertFalse(PropertyFinancialHistory.objects.exists())
+        self.assertEqual(Property.objects.get(street_number='1').status, Property.StatusChoices.OCCUPIED)
+
+    def test_bulk_status_action_uses_the_api(self):
+        self.client.login(username='testuser', password='password')
+        ids = list(Property.objects.values_list('pk', flat=True)[:2])
+        with self.assertLogs('tracker.actions', level='INFO') as logs:
+            self.client.post(reverse('tracker:property_bulk_action'), {
+                'action': 'bulk_update', 'update_status_submit': '1', 'selected_properties': ids, 'status': 'OCC',
+            })
+        self.assertEqual(Property.objects.filter(status='OCC').count(), 2)
+        self.assertEqual(logs.records[-1].count, 2)
+
+
+
+class RentRollAsOfTest(TestCase):
+    """Tests for the point-in-time queries in tracker/reports.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='History LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.other_llc = LLC.objects.create(name='Other LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop = Property.objects.create(
+            llc=cls.llc, street_number='1', street_name='Elm St', rent_amount=Decimal('500'),
+            date_purchased=datetime.date(2020, 6, 1),
+        )
+        Property.objects.create(llc=cls.other_llc, street_number='2', street_name='Elm St', rent_amount=Decimal('800'))
+        # Raised to 550 in March 2023, then to 600 in March 2024.
+        for when, new_value in ((datetime.datetime(2023, 3, 15, 12), '550'), (datetime.datetime(2024, 3, 15, 12), '600')):
+            cls.prop.rent_amount = Decimal(new_value)
+            cls.prop.save()
+            PropertyFinancialHistory.objects.filter(pk=PropertyFinancialHistory.objects.order_by('pk').last().pk).update(
+                date_changed=timezone.make_aware(when)
+            )
+
+    def _rent_on(self, as_of):
+        return reports.financials_as_of(as_of).get(pk=self.prop.pk).rent_amount_as_of
+
+    def test_value_as_of_walks_back_through_changes(self):
+        self.assertEqual(self._rent_on(datetime.date(2022, 1, 1)), Decimal('500'))
+        self.assertEqual(self._rent_on(datetime.date(2023, 3, 14)), Decimal('500'))
+        self.assertEqual(self._rent_on(datetime.date(2023, 3, 15)), Decimal('550'))
+        self.assertEqual(self._rent_on(datetime.date(2024, 1, 1)), Decimal('550'))
+        self.assertEqual(self._rent_on(datetime.date(2025, 1, 1)), Decimal('600'))
+
+    def test_properties_bought_later_are_left_out(self):
+        self.assertFalse(reports.financials_as_of(datetime.date(2020, 1, 1)).filter(pk=self.prop.pk).exists())
+
+    def test_rent_roll_by_llc_is_one_query(self):
+        with self.assertNumQueries(1):
+            rows = {row['llc__name']: row for row in reports.rent_roll_by_llc(datetime.date(2023, 6, 1))}
+        self.assertEqual(rows['History LLC']['rent_total'], Decimal('550'))
+        self.assertEqual(rows['History LLC']['property_count'], 1)
+        self.assertEqual(rows['Other LLC']['rent_total'], Decimal('800'))
+        self.assertEqual(reports.rent_for_month(2024, 1), Decimal('1350'))
+
+    def test_unknown_field_is_rejected(self):
+        with self.assertRaises(ValueError):
+            reports.value_as_of('security_deposit', datetime.date(2024, 1, 1))
+
+    def test_view_requires_permission_and_renders(self):
+        create_test_user(permissions=[get_permission('tracker', 'propertyfinancialhistory', 'view')])
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('tracker:rent_roll'), {'as_of': '2023-06-01', 'llc': self.llc.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['llc__name'] for row in response.context['llc_rows']], ['History LLC'])
+        self.assertEqual([p.rent_amount_as_of for p in response.context['property_rows']], [Decimal('550')])
+
+        User.objects.create_user(username='nobody', password='password')
+        self.client.login(username='nobody', password='password')
+        self.assertEqual(self.client.get(reverse('tracker:rent_roll')).status_code, 403)
+
+
+
+@override_settings(TRACKER_TIMING_HEADERS=True)
+class RequestTimingMiddlewareTest(TestCase):
+    """Tests for RequestTimingMiddleware and the per-view query budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Timing LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.user = create_test_user(permissions=[get_permission('tracker', 'tenant', 'view')])
+
+    def setUp(self):
+        self.client.login(username='testuser', password='password')
+        request_stats.reset()
+
+    def _add_tenants(self, start, count):
+        for i in range(start, start + count):
+            prop = Property.objects.create(llc=self.llc, street_number=str(i), street_name='Oak St')
+            Tenant.objects.create(first_name='T', last_name=str(i), property=prop)
+
+    def test_headers_report_queries_and_timings(self):
+        response = self.client.get(reverse('tracker:tenant_list'))
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    def test_tenant_list_query_count_does_not_grow_with_rows(self):
+        self._add_tenants(0, 1)
+        first = int(self.client.get(reverse('tracker:tenant_list'))['X-Query-Count'])
+        self._add_tenants(1, 10)
+        response = self.client.get(reverse('tracker:tenant_list'))
+        self.assertEqual(int(response['X-Query-Count']), first)
+        self.assertContains(response, '9 Oak St (Timing LLC)')
+
+    def test_over_budget_request_fails_when_enforced(self):
+        with self.settings(TRACKER_QUERY_BUDGETS={'tracker:tenant_list': 1}, TRACKER_ENFORCE_QUERY_BUDGETS=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('tracker:tenant_list'))
+        with self.settings(TRACKER_QUERY_BUDGETS={'tracker:tenant_list': 1}, TRACKER_ENFORCE_QUERY_BUDGETS=False):
+            with self.assertLogs('tracker.middleware', level='WARNING'):
+                self.assertEqual(self.client.get(reverse('tracker:tenant_list')).status_code, 200)
+
+    def test_stats_endpoint_aggregates_per_url_name(self):
+        self.client.get(reverse('tracker:tenant_list'))
+        self.client.get(reverse('tracker:tenant_list'))
+        self.assertEqual(self.client.get(reverse('tracker:request_stats')).status_code, 403) # Staff only
+        self.assertEqual(self.client.post(reverse('tracker:request_stats')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        stats = self.client.get(reverse('tracker:request_stats')).json()['views']
+        self.assertEqual(stats['tracker:tenant_list']['requests'], 2)
+        self.assertGreater(stats['tracker:tenant_list']['avg_queries'], 0)
+        self.assertGreater(stats['tracker:tenant_list']['avg_render_ms'], 0)
+
+        self.client.post(reverse('tracker:request_stats'))
+        self.assertNotIn('tracker:tenant_list', self.client.get(reverse('tracker:request_stats')).json()['views'])
+
+
+
+class SearchIndexTest(TestCase):
+    """Tests for the full-text search index in tracker/search.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Documents are written when the transaction commits, so run those callbacks here.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls._create_records()
+
+    @classmethod
+    def _create_records(cls):
+        cls.llc = LLC.objects.create(name='Search LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop = Property.objects.create(llc=cls.llc, street_number='42', street_name='Wallaby Way', vin='VIN998877')
+        cls.tenant = Tenant.objects.create(first_name='Penelope', last_name='Quill', phone_number='(555) 867-5309', property=cls.prop)
+        cls.payment = Payment.objects.create(
+            tenant=cls.tenant, property=cls.prop, payment_date=datetime.date(2024, 1, 5),
+            amount=Decimal('700'), notes='Check #10442',
+        )
+
+    def _found(self, query, **kwargs):
+        return {(d.kind, d.object_id) for d in search.search(query, **kwargs)}
+
+    def test_signals_keep_documents_in_sync(self):
+        self.assertEqual(SearchDocument.objects.count(), 3)
+        self.assertIn(('tenant', self.tenant.pk), self._found('8675'))
+        self.assertIn(('tenant', self.tenant.pk), self._found('5558675309'))
+        self.assertEqual(self._found('allab'), {('property', self.prop.pk), ('tenant', self.tenant.pk), ('payment', self.payment.pk)})
+        self.assertEqual(self._found('10442'), {('payment', self.payment.pk)})
+        self.assertEqual(self._found('998877'), {('property', self.prop.pk)})
+
+        # Renaming the tenant updates the payment documents that mention them.
+        self.tenant.last_name = 'Featherstone'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.save()
+        self.assertEqual(self._found('featherst'), {('tenant', self.tenant.pk), ('payment', self.payment.pk)})
+        self.assertEqual(self._found('Quill'), set())
+
+        self.payment.delete()
+        self.assertEqual(self._found('10442'), set())
+
+    def test_every_word_must_match_and_short_words_are_filtered(self):
+        self.assertEqual(self._found('penelope wallaby', kinds=['tenant']), {('tenant', self.tenant.pk)})
+        self.assertEqual(self._found('penelope zebra'), set())
+        self.assertEqual(self._found('42 wallaby', kinds=['property']), {('property', self.prop.pk)})
+        # FTS5 query syntax in the input is searched for literally rather than parsed.
+        self.assertEqual(self._found('NEAR(quill "OR'), set())
+
+    def test_bulk_paths_and_rebuild(self):
+        importer = PaymentImporter()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = importer.run(io.StringIO('payment_date,amount,tenant,notes\n2024-02-05,700,Penelope Quill,Money order 5521\n'))
+        self.assertEqual(result.created, 1)
+        self.assertEqual(len(self._found('5521')), 1)
+
+        # Moving properties to another LLC in bulk re-indexes them and their tenants.
+        other = LLC.objects.create(name='Kangaroo Holdings', creation_date=datetime.date(2020, 1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.filter(pk=self.prop.pk).update_with_history(llc=other)
+        self.assertEqual(self._found('kangaroo'), {('property', self.prop.pk), ('tenant', self.tenant.pk)})
+
+        SearchDocument.objects.all().delete()
+        self.assertEqual(search.rebuild(), {'tenant': 1, 'property': 1, 'payment': 2})
+        self.assertEqual(len(self._found('wallaby')), 4)
+
+    def test_view_only_returns_kinds_the_user_can_view(self):
+        create_test_user(permissions=[get_permission('tracker', 'tenant', 'view'), get_permission('tracker', 'tenant', 'change')])
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('tracker:search'), {'q': 'wallaby'})
+        self.assertEqual([r['kind'] for r in response.context['results']], ['Tenant'])
+        self.assertContains(response, reverse('tracker:tenant_edit', args=[self.tenant.pk]))
+
+
+
+class PortfolioBenchmarkTest(TestCase):
+    """Tests for the synthetic portfolio generator and the benchmark suite"""
+
+    def test_generator_builds_a_consistent_portfolio(self):
+        counts = PortfolioGenerator(llcs=3, properties=40, years=1, occupancy=0.5, seed=7, batch_size=25).run()
+        self.assertEqual((counts['llcs'], counts['properties']), (3, 40))
+        self.assertEqual(Tenant.objects.count(), Property.objects.filter(status=Property.StatusChoices.OCCUPIED).count())
+        self.assertEqual(Payment.objects.count(), counts['payments'])
+        self.assertGreater(counts['payments'], counts['tenants'])
+        # Payments were posted through the bulk signal, so the ledger has them too.
+        self.assertEqual(LedgerEntry.objects.filter(entry_type=LedgerEntry.EntryType.PAYMENT).count(), counts['payments'])
+        self.assertFalse(Payment.objects.filter(payment_date__lte=F('tenant__move_in_date')).exists())
+
+        # Same seed, same data (apart from the numbering that keeps LLC names unique).
+        again = PortfolioGenerator(llcs=3, properties=40, years=1, occupancy=0.5, seed=7, batch_size=25).run()
+        self.assertEqual(again, counts)
+
+    def test_benchmark_report_covers_pages_admin_and_signals(self):
+        PortfolioGenerator(llcs=2, properties=10, years=1, seed=1).run()
+        user = benchmarks.get_benchmark_user()
+        payment_count = Payment.objects.count()
+        report = benchmarks.run_benchmarks(user, suites=('urls', 'admin', 'signals'), repeat=1, host='testserver')
+        results = report['results']
+        for name in ('tracker:property_list', 'tracker:tenant_edit', 'tracker:search?q=main', 'admin:tracker_payment_changelist', 'signals:payment_create'):
+            self.assertIn(name, results)
+        self.assertEqual({name for name, r in results.items() if r.get('status', 200) not in (200, 302)}, set())
+        self.assertGreater(results['tracker:payment_export?format=csv']['bytes'], 0)
+        self.assertGreater(results['signals:payment_create']['queries'], 0)
+        self.assertEqual(Payment.objects.count(), payment_count) # Signal benchmarks are rolled back
+        self.assertEqual(report['data']['properties'], 10)
+        json.dumps(report)
+
+        slower = json.loads(json.dumps(report))
+        slower['results']['tracker:property_list']['queries'] += 5
+        self.assertEqual(benchmarks.compare_reports(report, report), [])
+        self.assertIn(('tracker:property_list', 'queries', results['tracker:property_list']['queries'], results['tracker:property_list']['queries'] + 5),
+                      benchmarks.compare_reports(report, slower))
+
+
+
+class ConcurrencyBenchmarkTest(TransactionTestCase):
+    """Writers and readers run in parallel threads; the suite reports every operation and changes no data"""
+
+    def test_concurrency_suite_accounts_for_every_operation(self):
+        PortfolioGenerator(llcs=1, properties=10, years=1, seed=2).run()
+        rents = list(Property.objects.order_by('pk').values_list('rent_amount', flat=True))
+        report = benchmarks.run_benchmarks(benchmarks.get_benchmark_user(), suites=('concurrency',), host='testserver', threads=2, operations=5)
+        for kind in ('write', 'read'):
+            result = report['results'][f'concurrency:{kind}[2x5]']
+            self.assertEqual((result['threads'], result['runs'] + result['errors']), (2, 10))
+            self.assertGreater(result['queries'], 0)
+        self.assertEqual(list(Property.objects.order_by('pk').values_list('rent_amount', flat=True)), rents)
+        self.assertEqual(report['environment']['database_profile']['vendor'], connection.vendor)
+
+    def test_asgi_suite_serves_each_async_view_both_ways(self):
+        PortfolioGenerator(llcs=1, properties=5, years=1, seed=2).run()
+        report = benchmarks.run_benchmarks(benchmarks.get_benchmark_user(), suites=('asgi',), host='testserver', requests=3, latency_ms=1)
+        for name in benchmarks.ASGI_VIEWS:
+            for mode in ('sync', 'async'):
+                result = report['results'][f'asgi:{name}[{mode} x3]']
+                self.assertEqual((result['runs'], result['status']), (3, [200]), (name, mode))
+
+
+class AsyncListViewTest(TestCase):
+    """The list pages and dashboard are async views; permissions and rendering must work through the ASGI handler"""
+
+    @classmethod
+    def setUpTestData(cls):
+        PortfolioGenerator(llcs=2, properties=12, years=1, seed=5).run()
+        viewers, _ = Group.objects.get_or_create(name='Async viewers')
+        for model in ('llc', 'property', 'tenant', 'payment'):
+            viewers.permissions.add(get_permission('tracker', model, 'view'))
+        cls.viewer = create_test_user(username='asyncviewer', password='password', groups=['Async viewers'])
+        cls.no_perms_user = create_test_user(username='asyncnoperms', password='password')
+
+    def test_views_are_coroutines(self):
+        for view in (views.dashboard, views.llc_list, views.property_list, views.tenant_list, views.payment_list):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_lists_render_under_asgi(self):
+        await self.async_client.aforce_login(self.viewer)
+        for name in ('tracker:dashboard', 'tracker:llc_list', 'tracker:property_list', 'tracker:tenant_list', 'tracker:payment_list'):
+            response = await self.async_client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)
+        tenant = await Tenant.objects.order_by('last_name').afirst()
+        response = await self.async_client.get(reverse('tracker:tenant_list'))
+        self.assertContains(response, tenant.last_name)
+        self.assertContains(response, 'href="/properties/"') # Navbar links come from the preloaded permissions
+
+    async def test_filters_and_pages_load_asynchronously(self):
+        await self.async_client.aforce_login(self.viewer)
+        llc = await LLC.objects.order_by('name').afirst()
+        response = await self.async_client.get(reverse('tracker:property_list'), {'llc': llc.pk, 'page_size': 5})
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page']
+        self.assertTrue(all(prop.llc_id == llc.pk for prop in page))
+        self.assertContains(response, f'<option value="{llc.pk}" selected>{llc.name}</option>', html=True)
+        response = await self.async_client.get(reverse('tracker:property_list'), {'after': page.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(reverse('tracker:payment_list'), {'llc': llc.pk})
+        self.assertTrue(response.context['payments'])
+        self.assertTrue(all(payment.property.llc_id == llc.pk for payment in response.context['payments']))
+
+    async def test_permission_decorators_still_apply(self):
+        response = await self.async_client.get(reverse('tracker:tenant_list'))
+        self.assertEqual(response.status_code, 302)
+        await self.async_client.aforce_login(self.no_perms_user)
+        for name in ('tracker:llc_list', 'tracker:property_list', 'tracker:tenant_list', 'tracker:payment_list'):
+            response = await self.async_client.get(reverse(name))
+            self.assertEqual(response.status_code, 403, name)
+        response = await self.async_client.get(reverse('tracker:dashboard'))
+        self.assertEqual(response.status_code, 200) # Login is all the dashboard needs
+
+    @override_settings(TRACKER_TIMING_HEADERS=True)
+    async def test_timing_middleware_measures_async_requests(self):
+        await self.async_client.aforce_login(self.viewer)
+        response = await self.async_client.get(reverse('tracker:payment_list'))
+        self.assertGreater(int(response['X-Query-Count']), 0)
+
+
+class PermissionCacheTest(TransactionTestCase):
+    """
+    Permission sets are cached per user across requests and resolved once per
+    request. (Committed data: a transaction with permission changes of its own
+    bypasses the cache, so TestCase would never exercise it.)
+    """
+
+    def setUp(self):
+        PortfolioGenerator(llcs=1, properties=30, years=1, seed=9).run()
+        self.group = Group.objects.create(name='Cached editors')
+        self.group.permissions.add(get_permission('tracker', 'property', 'view'), get_permission('tracker', 'property', 'change'))
+        self.user = create_test_user(username='cached', password='password', groups=['Cached editors'])
+
+    def fresh_perms(self):
+        return User.objects.get(pk=self.user.pk).get_all_permissions()
+
+    def test_permission_set_is_cached_across_requests(self):
+        self.assertIn('tracker.change_property', self.fresh_perms())
+        with self.assertNumQueries(1): # Only loading the user; the permissions come from the cache
+            self.assertIn('tracker.change_property', self.fresh_perms())
+
+    def test_membership_and_permission_changes_invalidate(self):
+        self.assertNotIn('tracker.delete_property', self.fresh_perms())
+        self.group.permissions.add(get_permission('tracker', 'property', 'delete'))
+        self.assertIn('tracker.delete_property', self.fresh_perms())
+
+        self.user.user_permissions.add(get_permission('tracker', 'llc', 'view'))
+        self.assertIn('tracker.view_llc', self.fresh_perms())
+
+        self.user.groups.remove(self.group)
+        self.assertEqual(self.fresh_perms(), {'tracker.view_llc'})
+
+        User.objects.filter(pk=self.user.pk).update(is_superuser=True)
+        self.assertIn('tracker.delete_payment', self.fresh_perms())
+
+    def test_changes_inside_a_transaction_are_not_cached(self):
+        with transaction.atomic():
+            self.user.groups.remove(self.group)
+            self.assertEqual(self.fresh_perms(), set())
+            transaction.set_rollback(True)
+        self.assertIn('tracker.change_property', self.fresh_perms())
+
+    def test_list_rendering_resolves_permissions_a_fixed_number_of_times(self):
+        self.client.login(username='cached', password='password')
+        calls = []
+        for page_size in (5, 30):
+            with mock.patch.object(User, 'get_all_permissions', autospec=True, side_effect=User.get_all_permissions) as lookups:
+                response = self.client.get(reverse('tracker:property_list'), {'page_size': page_size})
+            self.assertEqual(len(response.context['page']), page_size)
+            self.assertContains(response, 'btn-outline-secondary me-1', count=page_size) # Per-row edit buttons
+            calls.append(lookups.call_count)
+        self.assertEqual(calls, [1, 1])
+
+    def test_snapshot_answers_like_has_perm(self):
+        user = User.objects.get(pk=self.user.pk)
+        snapshot = PermissionSnapshot(user)
+        for perm in ('tracker.view_property', 'tracker.change_property', 'tracker.delete_property', 'auth.view_user'):
+            self.assertEqual(snapshot.has_perm(perm), user.has_perm(perm), perm)
+        self.assertIn('tracker.view_property', snapshot)
+        self.assertIn('tracker', snapshot)
+        self.assertNotIn('auth', snapshot)
+        self.assertTrue(snapshot['tracker']['change_property'])
+        self.assertFalse(snapshot['tracker']['delete_property'])
+        with self.assertRaises(TypeError):
+            iter(snapshot)
+
+    def test_bulk_action_checks_the_snapshot(self):
+        self.client.login(username='cached', password='password')
+        ids = list(Property.objects.values_list('pk', flat=True)[:2])
+        response = self.client.post(reverse('tracker:property_bulk_action'), {'action': 'bulk_delete', 'selected_properties': ids}, follow=True)
+        self.assertContains(response, 'You do not have permission to delete properties.')
+        response = self.client.post(reverse('tracker:property_bulk_action'), {'action': 'bulk_update', 'selected_properties': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'tracker/property_bulk_update.html')
+
+
+class DatabaseSettingsTest(TestCase):
+    """DATABASES comes from DB_ENGINE and friends"""
+
+    def test_sqlite_is_the_tuned_default(self):
+        config = database_settings(Path('/srv/app'), env={})['default']
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], Path('/srv/app/db.sqlite3'))
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=WAL', config['OPTIONS']['init_command'])
+        untuned = database_settings(Path('/srv/app'), env={'SQLITE_TUNED': 'false', 'SQLITE_BUSY_TIMEOUT': '5'})['default']
+        self.assertEqual(untuned['OPTIONS'], {'timeout': 5.0})
+
+    def test_postgresql_keeps_connections_open(self):
+        env = {'DB_ENGINE': 'postgresql', 'SQL_DATABASE': 'rent', 'SQL_HOST': 'db', 'DB_CONN_MAX_AGE': '300'}
+        config = database_settings(Path('/srv/app'), env=env)['default']
+        self.assertEqual((config['ENGINE'], config['NAME'], config['PORT']), ('django.db.backends.postgresql', 'rent', '5432'))
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (300, True))
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_pool_replaces_persistent_connections(self):
+        env = {'DB_ENGINE': 'postgresql', 'DB_POOL': 'true', 'DB_POOL_MAX_SIZE': '20', 'DB_CONN_MAX_AGE': '300'}
+        with mock.patch('importlib.util.find_spec', return_value=object()):
+            config = database_settings(Path('/srv/app'), env=env)['default']
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10.0})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        with mock.patch('importlib.util.find_spec', return_value=None):
+            with self.assertRaises(ImproperlyConfigured):
+                database_settings(Path('/srv/app'), env=env)
+
+    def test_bad_values_are_configuration_errors(self):
+        for env in ({'DB_ENGINE': 'oracle'}, {'DB_ENGINE': 'postgresql', 'DB_CONN_MAX_AGE': 'forever'}):
+            with self.assertRaises(ImproperlyConfigured):
+                database_settings(Path('/srv/app'), env=env)
+
+
+
+@skipUnless(connection.vendor == 'sqlite', "Asserts on SQLite's EXPLAIN QUERY PLAN output")
+class QueryPlanTest(TestCase):
+    """The list and report queries should be served by indexes, not full scans plus sorts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        PortfolioGenerator(llcs=5, properties=300, years=2, seed=3).run()
+        cls.prop = Property.objects.filter(tenants__isnull=False).first()
+        cls.tenant = cls.prop.tenants.first()
+        for i in range(3):
+            cls.prop.rent_amount += Decimal('10')
+            cls.prop.save()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE') # Give the planner real statistics, as a production database has
+
+    def assertPlan(self, queryset, uses_index):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {uses_index}', plan.replace('USING COVERING INDEX', 'USING INDEX'))
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+        return plan
+
+    def test_payment_queries(self):
+        self.assertPlan(Payment.objects.select_related('tenant', 'property').order_by('-payment_date')[:50], 'payment_recent_idx')
+        self.assertPlan(Payment.objects.all()[:50], 'payment_recent_idx') # Default ordering
+        self.assertPlan(Payment.objects.filter(property=self.prop).order_by('payment_date'), 'payment_property_date_idx')
+        self.assertPlan(
+            Payment.objects.filter(tenant=self.tenant, payment_date__gte=datetime.date(2025, 1, 1)).order_by('payment_date'),
+            'payment_tenant_date_idx',
+        )
+
+    def test_property_and_tenant_lists(self):
+        self.assertPlan(Property.objects.select_related('llc').order_by(*PROPERTY_LIST_ORDERING)[:51], 'tracker_property_llc_id_street_number')
+        self.assertIn('SEARCH tracker_property USING', Property.objects.filter(llc_id=self.prop.llc_id, status='OCC').explain())
+        self.assertPlan(Tenant.objects.select_related('property__llc').order_by('last_name', 'first_name'), 'tenant_name_idx')
+
+    def test_point_in_time_report_uses_history_index(self):
+        plan = reports.financials_as_of(datetime.date(2025, 1, 1)).explain()
+        self.assertEqual(plan.count('USING INDEX fin_history_lookup_idx (property_id=? AND field_name=? AND date_changed>?)'), 3)
+
+
+
+class BaselineUpgradeTest(TransactionTestCase):
+    """
+    Databases from before the app had migrations were made with
+    migrate --run-syncdb. 0001_initial must create exactly their tables so
+    migrate --fake-initial can fake it and apply the rest.
+    """
+    BASELINE_MODELS = {'llc', 'property', 'tenant', 'payment', 'propertyfinancialhistory'}
+
+    def test_fake_initial_upgrades_a_baseline_database(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('tracker', None)])
+        baseline = executor.loader.project_state(('tracker', '0001_initial')).apps
+        models = list(baseline.get_app_config('tracker').get_models())
+        self.assertEqual({model._meta.model_name for model in models}, self.BASELINE_MODELS)
+        with connection.schema_editor() as editor: # What run-syncdb made of the baseline models
+            for model in models:
+                editor.create_model(model)
+        baseline.get_model('tracker', 'LLC').objects.create(name='Baseline LLC', creation_date=datetime.date(2020, 1, 1))
+
+        call_command('migrate', 'tracker', fake_initial=True, verbosity=0)
+        applied = MigrationRecorder(connection).applied_migrations()
+        self.assertTrue(all(key in applied for key in executor.loader.graph.leaf_nodes('tracker')))
+        self.assertEqual(LLC.objects.get().name, 'Baseline LLC')
+        self.assertFalse(LedgerEntry.objects.exists()) # Created by a later migration
+
+
+class OccupancyIntervalTest(TestCase):
+    """Tests for the interval bookkeeping and month reports in tracker/occupancy.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Occupancy LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.other_llc = LLC.objects.create(name='Second LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop = Property.objects.create(
+            llc=cls.llc, street_number='1', street_name='Oak Ave', status='VAC', rent_amount=Decimal('900'),
+            date_purchased=datetime.date(2021, 5, 1),
+        )
+        cls.other = Property.objects.create(llc=cls.other_llc, street_number='2', street_name='Oak Ave', status='VAC', rent_amount=Decimal('600'))
+
+    def _intervals(self, prop):
+        return list(prop.occupancy_intervals.order_by('start_date', 'pk').values_list('status', 'tenant_id', 'start_date', 'end_date'))
+
+    def _age_intervals(self, days=10):
+        # Pretend the open intervals were opened a while ago, so the next change closes them.
+        OccupancyInterval.objects.update(start_date=datetime.date.today() - datetime.timedelta(days=days))
+
+    def test_new_property_opens_an_interval_and_same_day_changes_amend_it(self):
+        today = datetime.date.today()
+        self.assertEqual(self._intervals(self.prop), [('VAC', None, today, None)])
+        self.prop.status = 'OCC'
+        self.prop.save()
+        self.assertEqual(self._intervals(self.prop), [('OCC', None, today, None)])
+
+    def test_status_change_closes_the_open_interval(self):
+        self._age_intervals()
+        started, today = datetime.date.today() - datetime.timedelta(days=10), datetime.date.today()
+        self.prop.status = 'OCC'
+        self.prop.save()
+        self.assertEqual(self._intervals(self.prop), [('VAC', None, started, today), ('OCC', None, today, None)])
+        # Saves that don't touch status or LLC leave the history alone.
+        self.prop.rent_amount = Decimal('950')
+        self.prop.save()
+        self.assertEqual(len(self._intervals(self.prop)), 2)
+
+    def test_tenant_moves_update_both_properties(self):
+        self._age_intervals()
+        tenant = Tenant.objects.create(first_name='Ada', last_name='Moss', property=self.prop)
+        self.assertEqual(self._intervals(self.prop)[-1][:2], ('VAC', tenant.pk))
+        tenant.property = self.other
+        tenant.save()
+        self.assertEqual(self._intervals(self.prop)[-1][:2], ('VAC', None))
+        self.assertEqual(self._intervals(self.other)[-1][:2], ('VAC', tenant.pk))
+        tenant.delete()
+        self.assertEqual(self._intervals(self.other)[-1][:2], ('VAC', None))
+
+    def test_move_in_date_change_updates_the_primary_tenant(self):
+        first = Tenant.objects.create(first_name='Cy', last_name='Lund', property=self.prop, move_in_date=datetime.date(2023, 1, 1))
+        second = Tenant.objects.create(first_name='Di', last_name='Lund', property=self.prop, move_in_date=datetime.date(2023, 6, 1))
+        self.assertEqual(self._intervals(self.prop)[-1][1], first.pk)
+        self._age_intervals()
+        second.move_in_date = datetime.date(2022, 6, 1)
+        second.save()
+        self.assertEqual(self._intervals(self.prop)[-1][1], second.pk)
+        self.assertIsNotNone(self._intervals(self.prop)[-2][3])
+
+    def test_bulk_status_update_is_recorded_in_a_fixed_number_of_queries(self):
+        self._age_intervals()
+        with CaptureQueriesContext(connection) as with_two:
+            Property.objects.all().update_with_history(status='OCC')
+        self.assertEqual(set(OccupancyInterval.objects.filter(end_date__isnull=True).values_list('status', flat=True)), {'OCC'})
+        self.assertEqual(OccupancyInterval.objects.filter(end_date=datetime.date.today()).count(), 2)
+
+        for i in range(3, 8):
+            Property.objects.create(llc=self.llc, street_number=str(i), street_name='Oak Ave', status='OCC')
+        self._age_intervals()
+        with CaptureQueriesContext(connection) as with_seven:
+            Property.objects.all().update_with_history(status='VAC')
+        self.assertEqual(len(with_seven.captured_queries), len(with_two.captured_queries))
+
+    def test_backfill_starts_at_move_in_or_purchase(self):
+        tenant = Tenant.objects.create(first_name='Bo', last_name='Reyes', property=self.other, move_in_date=datetime.date(2022, 2, 1))
+        Property.objects.filter(pk=self.other.pk).update(status='OCC')
+        OccupancyInterval.objects.all().delete()
+        self.assertEqual(occupancy.backfill(), 2)
+        self.assertEqual(self._intervals(self.prop), [('VAC', None, datetime.date(2021, 5, 1), None)])
+        self.assertEqual(self._intervals(self.other), [('OCC', tenant.pk, datetime.date(2022, 2, 1), None)])
+        self.assertEqual(occupancy.backfill(), 0)
+
+    def test_month_report_in_one_query(self):
+        OccupancyInterval.objects.all().delete()
+        OccupancyInterval.objects.bulk_create([
+            # Vacant for the first 10 days of April 2024, occupied for the other 20.
+            OccupancyInterval(property=self.prop, llc=self.llc, status='VAC', start_date=datetime.date(2024, 3, 20), end_date=datetime.date(2024, 4, 11)),
+            OccupancyInterval(property=self.prop, llc=self.llc, status='OCC', start_date=datetime.date(2024, 4, 11)),
+            OccupancyInterval(property=self.other, llc=self.other_llc, status='OCC', start_date=datetime.date(2023, 1, 1)),
+        ])
+        with self.assertNumQueries(1):
+            rows = {row['llc__name']: row for row in occupancy.occupancy_for_month(datetime.date(2024, 4, 15))}
+        row = rows['Occupancy LLC']
+        self.assertEqual((row['unit_days'], row['occupied_days'], row['vacant_days']), (30, 20, 10))
+        self.assertEqual(row['occupancy_rate'], 66.7)
+        self.assertEqual(row['vacancy_loss'], Decimal('300.00')) # 10 days at $900 / 30
+        self.assertEqual(rows['Second LLC']['vacancy_loss'], Decimal('0.00'))
+
+        timeline = occupancy.occupancy_timeline(datetime.date(2024, 3, 1), datetime.date(2024, 4, 1))
+        self.assertEqual([entry['month'] for entry in timeline], [datetime.date(2024, 3, 1), datetime.date(2024, 4, 1)])
+        self.assertEqual(timeline[0]['portfolio']['unit_days'], 12 + 31) # Occupancy LLC's history starts March 20th
+        self.assertEqual(timeline[1]['portfolio']['occupancy_rate'], 83.3)
+
+    def test_view_requires_permission_and_renders(self):
+        create_test_user(permissions=[get_permission('tracker', 'property', 'view')])
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('tracker:occupancy_report'), {'start': '2024-01', 'end': '2024-03', 'llc': self.llc.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['timeline']), 3)
+        self.assertEqual(self.client.get(reverse('tracker:occupancy_report')).status_code, 200)
+
+        User.objects.create_user(username='nobody', password='password')
+        self.client.login(username='nobody', password='password')
+        self.assertEqual(self.client.get(reverse('tracker:occupancy_report')).status_code, 403)
+
+
+class MonthlyBillingTest(TestCase):
+    """Tests for late fees and the post_rent_charges command"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Billing LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.tenants = {}
+        for i, name in enumerate(['on_time', 'late', 'partial', 'unpaid', 'vacant']):
+            prop = Property.objects.create(
+                llc=cls.llc, street_number=str(i + 1), street_name='Birch Ct', rent_amount=Decimal('700'),
+                status='VAC' if name == 'vacant' else 'OCC',
+            )
+            if name != 'vacant':
+                cls.tenants[name] = Tenant.objects.create(first_name=name, last_name='Tenant', property=prop, move_in_date=datetime.date(2023, 1, 1))
+        for name, paid_on, amount in (('on_time', datetime.date(2024, 3, 4), '700'), ('late', datetime.date(2024, 3, 9), '700'), ('partial', datetime.date(2024, 3, 2), '400')):
+            tenant = cls.tenants[name]
+            Payment.objects.create(tenant=tenant, property_id=tenant.property_id, payment_date=paid_on, amount=Decimal(amount))
+
+    def _fined(self):
+        return set(LedgerEntry.objects.filter(entry_type=LedgerEntry.EntryType.LATE_FEE).values_list('tenant__first_name', flat=True))
+
+    def _run(self, *args):
+        out = io.StringIO()
+        call_command('post_rent_charges', '--month', '2024-03', '--grace-days', '5', '--late-fee', '35', *args, stdout=out)
+        return out.getvalue()
+
+    def test_charges_first_then_fees_after_grace(self):
+        output = self._run('--as-of', '2024-03-03')
+        self.assertIn('Posted 4 rent charge(s) and 0 late fee(s)', output)
+        output = self._run('--as-of', '2024-03-07')
+        self.assertIn('Posted 0 rent charge(s) and 3 late fee(s)', output)
+        # Paying on the 9th is after the grace period, so that tenant is fined too.
+        self.assertEqual(self._fined(), {'late', 'partial', 'unpaid'})
+        self.assertEqual(ledger.get_tenant_balance(self.tenants['unpaid']), Decimal('735'))
+        self.assertEqual(ledger.get_tenant_balance(self.tenants['partial']), Decimal('335'))
+        self.assertIn('Posted 0 rent charge(s) and 0 late fee(s)', self._run('--as-of', '2024-03-20'))
+
+    def test_fees_do_not_compound(self):
+        self._run('--as-of', '2024-03-07')
+        ledger.run_monthly_billing(datetime.date(2024, 4, 1), Decimal('35'), 5, as_of=datetime.date(2024, 4, 7))
+        # Nobody paid April's rent, so everyone is fined.
+        tenant_fees = LedgerEntry.objects.filter(entry_type=LedgerEntry.EntryType.LATE_FEE, period=datetime.date(2024, 4, 1))
+        self.assertEqual(set(tenant_fees.values_list('tenant__first_name', flat=True)), {'on_time', 'late', 'partial', 'unpaid'})
+        Payment.objects.create(tenant=self.tenants['on_time'], property_id=self.tenants['on_time'].property_id, payment_date=datetime.date(2024, 5, 1), amount=Decimal('1400'))
+        # Rent is now paid up; the unpaid April fee alone doesn't earn another one.
+        ledger.run_monthly_billing(datetime.date(2024, 5, 1), Decimal('35'), 5, as_of=datetime.date(2024, 5, 7))
+        may_fees = LedgerEntry.objects.filter(entry_type=LedgerEntry.EntryType.LATE_FEE, period=datetime.date(2024, 5, 1))
+        self.assertEqual(set(may_fees.values_list('tenant__first_name', flat=True)), {'late', 'partial', 'unpaid'})
+
+    def test_interrupted_run_resumes_in_chunks(self):
+        # A run that stopped after its first chunk left two properties charged.
+        first_chunk = next(ledger.property_chunks(chunk_size=2))
+        self.assertEqual(len(ledger.post_monthly_rent_charges(datetime.date(2024, 3, 1), first_chunk)), 2)
+        counts = ledger.run_monthly_billing(datetime.date(2024, 3, 1), Decimal('35'), 5, as_of=datetime.date(2024, 3, 7), chunk_size=2)
+        self.assertEqual(counts, {'charges': 2, 'late_fees': 3})
+        self.assertEqual(LedgerEntry.objects.filter(entry_type=LedgerEntry.EntryType.CHARGE).count(), 4)
+
+    def test_bad_arguments_are_rejected(self):
+        with self.assertRaises(CommandError):
+            call_command('post_rent_charges', '--month', 'March', stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('post_rent_charges', '--late-fee', 'lots', stdout=io.StringIO())
+
+
+class DelinquencyReportTest(TestCase):
+    """Tests for the delinquency queries in tracker/delinquency.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Behind LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.other_llc = LLC.objects.create(name='Current LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.tenants = {}
+        # Moved in during November 2023, so by 2024-03-10 four months (Dec-Mar) are due.
+        for i, (name, llc, rent, paid) in enumerate((
+            ('Far', cls.llc, '500', ['500']),                # $1500 behind, oldest unpaid month is January
+            ('Near', cls.llc, '800', ['800', '800', '800']),  # $800 behind, only March unpaid
+            ('Paid', cls.llc, '600', ['1200', '1200']),       # Paid up
+            ('Other', cls.other_llc, '700', []),              # $2800 behind, in another LLC
+        )):
+            prop = Property.objects.create(llc=llc, street_number=str(i + 1), street_name='Cedar Ln', rent_amount=Decimal(rent), status='OCC')
+            tenant = Tenant.objects.create(first_name=name, last_name='Renter', property=prop, move_in_date=datetime.date(2023, 11, 15))
+            Payment.objects.bulk_create([
+                Payment(tenant=tenant, property=prop, payment_date=datetime.date(2023, 12, 1), amount=Decimal(amount)) for amount in paid
+            ])
+            cls.tenants[name] = tenant
+        # Not placed yet, and a payment after the report date: neither counts.
+        Tenant.objects.create(first_name='Applicant', last_name='Renter')
+        Payment.objects.create(tenant=cls.tenants['Other'], property_id=cls.tenants['Other'].property_id, payment_date=datetime.date(2024, 4, 1), amount=Decimal('2800'))
+        cls.as_of = datetime.date(2024, 3, 10)
+
+    def test_balances_and_ordering_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = [(t.first_name, t.months_due, t.expected_rent, t.total_paid, t.past_due) for t in delinquency.delinquent_tenants(self.as_of)]
+        self.assertEqual(rows, [
+            ('Other', 4, Decimal('2800'), Decimal('0'), Decimal('2800')),
+            ('Far', 4, Decimal('2000'), Decimal('500'), Decimal('1500')),
+            ('Near', 4, Decimal('3200'), Decimal('2400'), Decimal('800')),
+        ])
+
+    def test_llc_filter_totals_and_days_past_due(self):
+        tenants = delinquency.delinquent_tenants(self.as_of, llc=self.llc)
+        self.assertEqual(delinquency.delinquency_totals(tenants), {'tenants': 2, 'past_due': Decimal('2300')})
+        days = {t.first_name: delinquency.days_past_due(t, self.as_of) for t in tenants}
+        self.assertEqual(days, {'Far': 69, 'Near': 9}) # Since January 1st and March 1st
+
+    def test_view_requires_permissions(self):
+        create_test_user(permissions=[get_permission('tracker', 'tenant', 'view')])
+        self.client.login(username='testuser', password='password')
+        self.assertEqual(self.client.get(reverse('tracker:delinquency_report')).status_code, 403)
+
+        User.objects.get(username='testuser').user_permissions.add(get_permission('tracker', 'payment', 'view'))
+        response = self.client.get(reverse('tracker:delinquency_report'), {'as_of': '2024-03-10', 'llc': self.llc.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t.first_name for t in response.context['page_obj']], ['Far', 'Near'])
+        self.assertEqual(response.context['totals']['past_due'], Decimal('2300'))
+        self.assertContains(response, '$1500.00')
+
+
+
+class MonthlyRollupTest(TestCase):
+    """Tests for the incremental rollups and statements in tracker/rollups.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Rollup LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.prop = Property.objects.create(
+            llc=cls.llc, street_number='5', street_name='Spring St', status='OCC', rent_amount=Decimal('900'),
+            home_payment=Decimal('300'), lot_payment=Decimal('100'), date_purchased=datetime.date(2023, 6, 1),
+        )
+        cls.tenant = Tenant.objects.create(first_name='Roll', last_name='Up', property=cls.prop)
+
+    def _pay(self, day, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Payment.objects.create(tenant=self.tenant, property=self.prop, payment_date=day, amount=Decimal(amount))
+
+    def _cell(self, year, month):
+        return MonthlyRollup.objects.filter(llc=self.llc, year=year, month=month).values_list('income', 'payment_count', 'obligations').first()
+
+    def test_payments_update_their_months(self):
+        self._pay(datetime.date(2024, 1, 3), '900')
+        payment = self._pay(datetime.date(2024, 1, 20), '50')
+        self.assertEqual(self._cell(2024, 1), (Decimal('950'), 2, Decimal('400')))
+
+        payment.payment_date = datetime.date(2024, 2, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.save()
+        self.assertEqual(self._cell(2024, 1)[:2], (Decimal('900'), 1))
+        self.assertEqual(self._cell(2024, 2)[:2], (Decimal('50'), 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment.delete()
+        self.assertEqual(self._cell(2024, 2)[:2], (Decimal('0'), 0))
+
+    def test_financial_changes_update_this_months_obligations(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.home_payment = Decimal('350')
+            self.prop.save()
+        today = datetime.date.today()
+        self.assertEqual(self._cell(today.year, today.month)[2], Decimal('450'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.filter(pk=self.prop.pk).update_with_history(lot_payment=Decimal('0'))
+        self.assertEqual(self._cell(today.year, today.month)[2], Decimal('350'))
+
+    def test_moved_property_takes_its_income_along(self):
+        self._pay(datetime.date(2024, 1, 3), '900')
+        self._pay(datetime.date(2024, 2, 3), '900')
+        buyer = LLC.objects.create(name='Buyer LLC', creation_date=datetime.date(2020, 1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.llc = buyer
+            self.prop.save()
+
+        def income(llc, month):
+            return MonthlyRollup.objects.filter(llc=llc, year=2024, month=month).values_list('income', flat=True).first()
+
+        self.assertEqual([income(self.llc, 1), income(buyer, 1)], [Decimal('0'), Decimal('900')])
+        self.assertEqual([income(self.llc, 2), income(buyer, 2)], [Decimal('0'), Decimal('900')])
+
+        # Moving it back in bulk moves the income back too.
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.filter(pk=self.prop.pk).update_with_history(llc=self.llc)
+        self.assertEqual([income(self.llc, 1), income(buyer, 1)], [Decimal('900'), Decimal('0')])
+
+    def test_moved_property_statements_match_a_rebuild(self):
+        self._pay(datetime.date(2023, 7, 2), '900')
+        today = datetime.date(2024, 3, 15)
+        rollups.statement(self.llc, 2023, 2024, today=today) # Stores the months, obligations included
+        buyer = LLC.objects.create(name='Buyer LLC', creation_date=datetime.date(2020, 1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.llc = buyer
+            self.prop.save()
+        stored = [rollups.statement(llc, 2023, 2024, today=today)['totals'] for llc in (self.llc, buyer)]
+        self.assertEqual(stored[0]['obligations'], Decimal('0'))
+
+        MonthlyRollup.objects.all().delete()
+        rollups.rebuild(first_month=datetime.date(2023, 1, 1), last_month=datetime.date(2024, 3, 1))
+        rebuilt = [rollups.statement(llc, 2023, 2024, today=today)['totals'] for llc in (self.llc, buyer)]
+        self.assertEqual(stored, rebuilt)
+
+    def test_statement_fills_missing_months_once_then_reads_rollups(self):
+        self._pay(datetime.date(2023, 7, 2), '900')
+        self._pay(datetime.date(2024, 2, 2), '900')
+        # The home payment went up after 2024; earlier months keep the old obligations.
+        self.prop.home_payment = Decimal('500')
+        self.prop.save()
+
+        data = rollups.statement(self.llc, 2023, 2024, today=datetime.date(2024, 3, 15))
+        self.assertEqual([year['year'] for year in data['years']], [2023, 2024])
+        self.assertEqual(len(data['years'][0]['months']), 12)
+        self.assertEqual(len(data['years'][1]['months']), 3) # Through the current month
+        self.assertEqual(data['years'][0]['obligations'], Decimal('2800')) # June to December at $400
+        self.assertEqual(data['years'][1]['income'], Decimal('900'))
+        self.assertEqual(data['totals']['net'], Decimal('1800') - Decimal('4000'))
+
+        with self.assertNumQueries(1):
+            again = rollups.statement(self.llc, 2023, 2024, today=datetime.date(2024, 3, 15))
+        self.assertEqual(again['totals'], data['totals'])
+
+        MonthlyRollup.objects.all().delete()
+        rollups.rebuild(first_month=datetime.date(2023, 1, 1), last_month=datetime.date(2024, 3, 1))
+        self.assertEqual(rollups.statement(self.llc, 2023, 2024, today=datetime.date(2024, 3, 15))['totals'], data['totals'])
+
+    def test_statement_view_and_csv(self):
+        self._pay(datetime.date(2024, 1, 3), '900')
+        create_test_user(permissions=[get_permission('tracker', 'llc', 'view'), get_permission('tracker', 'payment', 'view')])
+        self.client.login(username='testuser', password='password')
+        url = reverse('tracker:llc_statement', args=[self.llc.pk])
+        response = self.client.get(url, {'start_year': 2024, 'end_year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['statement']['years'][0]['months'][0].income, Decimal('900'))
+
+        response = self.client.get(url, {'start_year': 2024, 'end_year': 2024, 'format': 'csv'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['Period', 'Income', 'Payments', 'Obligations', 'Net'])
+        self.assertEqual(rows[1], ['2024-01', '900.00', '1', '400.00', '500.00'])
+        self.assertEqual(rows[-1][0], 'Total')
+        self.assertEqual(self.client.get(url, {'start_year': 2025, 'end_year': 2024, 'format': 'csv'}).status_code, 400)
+
+        User.objects.create_user(username='nobody', password='password')
+        self.client.login(username='nobody', password='password')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    @skipUnless(tracker_report_views.SimpleDocTemplate is not None, "reportlab is not installed")
+    def test_pdf_statement(self):
+        create_test_user(permissions=[get_permission('tracker', 'llc', 'view'), get_permission('tracker', 'payment', 'view')])
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('tracker:llc_statement', args=[self.llc.pk]), {'start_year': 2024, 'end_year': 2024, 'format': 'pdf'})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_pdf_statement_without_reportlab(self):
+        create_test_user(permissions=[get_permission('tracker', 'llc', 'view'), get_permission('tracker', 'payment', 'view')])
+        self.client.login(username='testuser', password='password')
+        with mock.patch.object(tracker_report_views, 'SimpleDocTemplate', None):
+            response = self.client.get(reverse('tracker:llc_statement', args=[self.llc.pk]), {'start_year': 2024, 'end_year': 2024, 'format': 'pdf'})
+        self.assertEqual(response.status_code, 501)
+
+
+class FragmentCacheTest(TransactionTestCase):
+    """
+    List tables are cached under per-model version keys, so a repeat view
+    skips the queryset and the row loop until the data changes. (Committed
+    data, as with PermissionCacheTest: pending changes bypass the cache.)
+    """
+
+    def setUp(self):
+        cache.clear()
+        PortfolioGenerator(llcs=2, properties=20, years=1, seed=11).run()
+        self.group = Group.objects.create(name='Fragment editors')
+        for model in ('llc', 'property', 'tenant', 'payment'):
+            self.group.permissions.add(get_permission('tracker', model, 'view'))
+        self.group.permissions.add(get_permission('tracker', 'property', 'change'))
+        self.user = create_test_user(username='fragments', password='password', groups=['Fragment editors'])
+        self.client.login(username='fragments', password='password')
+
+    def get(self, name, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def table(self, response):
+        return response.content.decode().partition('<table')[2].partition('</table>')[0]
+
+    def test_repeat_views_skip_the_queryset(self):
+        for name, table in (('tracker:llc_list', 'tracker_llc'), ('tracker:property_list', 'tracker_property'),
+                            ('tracker:tenant_list', 'tracker_tenant'), ('tracker:payment_list', 'tracker_payment')):
+            first, first_queries = self.get(name)
+            second, second_queries = self.get(name)
+            self.assertIn('<td', self.table(first), name)
+            self.assertEqual(self.table(second), self.table(first))
+            self.assertLess(len(second_queries), len(first_queries), name)
+            self.assertFalse([sql for sql in second_queries if f'FROM "{table}"' in sql], name)
+
+    def test_changes_retire_the_cached_table(self):
+        prop = Property.objects.order_by(*PROPERTY_LIST_ORDERING).first()
+        self.get('tracker:property_list')
+        prop.rent_amount = Decimal('4321.00')
+        prop.save()
+        response, _ = self.get('tracker:property_list')
+        self.assertContains(response, '$4321.00')
+
+        llc = prop.llc
+        self.get('tracker:tenant_list')
+        llc.name = 'Renamed Holdings'
+        llc.save() # Tenants show their property's LLC
+        response, _ = self.get('tracker:tenant_list')
+        self.assertContains(response, 'Renamed Holdings')
+
+        today = datetime.date.today()
+        LLCFiling.objects.bulk_create([LLCFiling(llc=llc, year=today.year, filed_on=today) for llc in LLC.objects.all()])
+        call_command('refresh_filing_status', '--all', stdout=io.StringIO()) # bulk_update(), no post_save
+        response, _ = self.get('tracker:llc_list')
+        self.assertContains(response, 'bg-success', count=2)
+        call_command('refresh_filing_status', '--as-of', f'{today.year + 1}-01-01', stdout=io.StringIO()) # A new year's filing is due
+        response, _ = self.get('tracker:llc_list')
+        self.assertNotContains(response, 'bg-success')
+
+    def test_rows_are_reused_across_pages_and_viewers_with_other_permissions_differ(self):
+        self.get('tracker:property_list', {'page_size': 5})
+        with mock.patch.object(Fragment, 'store', autospec=True, side_effect=Fragment.store) as stored:
+            self.get('tracker:property_list', {'page_size': 8})
+        self.assertEqual(stored.call_count, 3 + 1) # Three new rows and the table
+
+        reader = create_test_user(username='reader', password='password', permissions=[get_permission('tracker', 'property', 'view')])
+        self.client.force_login(reader)
+        response, _ = self.get('tracker:property_list', {'page_size': 5})
+        self.assertNotContains(response, 'btn-outline-secondary me-1') # No cached edit buttons from the editor's rows
+
+    def test_pending_changes_bypass_the_cache(self):
+        self.get('tracker:tenant_list')
+        tenant = Tenant.objects.order_by('last_name', 'first_name').first()
+        with transaction.atomic():
+            tenant.last_name = 'Uncommitted'
+            tenant.save()
+            response, _ = self.get('tracker:tenant_list')
+            self.assertContains(response, 'Uncommitted')
+            transaction.set_rollback(True)
+        response, _ = self.get('tracker:tenant_list')
+        self.assertNotContains(response, 'Uncommitted')
+
+
+class CacheSettingsTest(TestCase):
+    """CACHES comes from CACHE_BACKEND and CACHE_LOCATION"""
+
+    def test_backends(self):
+        self.assertEqual(cache_settings(env={})['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+        config = cache_settings(env={'CACHE_BACKEND': 'file', 'CACHE_LOCATION': '/srv/cache'})['default']
+        self.assertEqual((config['BACKEND'], config['LOCATION']), ('django.core.cache.backends.filebased.FileBasedCache', '/srv/cache'))
+        with mock.patch('importlib.util.find_spec', return_value=object()):
+            config = cache_settings(env={'CACHE_BACKEND': 'redis'})['default']
+        self.assertEqual((config['BACKEND'], config['LOCATION']), ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'))
+
+    def test_bad_values_are_configuration_errors(self):
+        with mock.patch('importlib.util.find_spec', return_value=None):
+            with self.assertRaises(ImproperlyConfigured):
+                cache_settings(env={'CACHE_BACKEND': 'redis'})
+        for env in ({'CACHE_BACKEND': 'memcached'}, {'CACHE_MAX_ENTRIES': 'lots'}):
+            with self.assertRaises(ImproperlyConfigured):
+                cache_settings(env=env)
+
+
+class ConditionalGetTest(TestCase):
+    """List and report pages answer If-None-Match/If-Modified-Since from signal-maintained versions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        PortfolioGenerator(llcs=2, properties=10, years=1, seed=13).run()
+        viewers, _ = Group.objects.get_or_create(name='Conditional viewers')
+        for model in ('llc', 'property', 'tenant', 'payment', 'propertyfinancialhistory'):
+            viewers.permissions.add(get_permission('tracker', model, 'view'))
+        cls.user = create_test_user(username='refresher', password='password', groups=['Conditional viewers'])
+        cls.other = create_test_user(username='other', password='password', groups=['Conditional viewers'])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.assertNotIn('ETag', self.client.get(reverse('tracker:dashboard'))) # Sets the CSRF cookie the pages depend on
+
+    def test_unchanged_pages_are_not_modified(self):
+        for name in ('tracker:llc_list', 'tracker:property_list', 'tracker:tenant_list', 'tracker:payment_list',
+                     'tracker:rent_roll', 'tracker:occupancy_report', 'tracker:delinquency_report'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)
+            self.assertIn('no-cache', response['Cache-Control'])
+            with CaptureQueriesContext(connection) as queries:
+                again = self.client.get(reverse(name), headers={'If-None-Match': response['ETag']})
+            self.assertEqual(again.status_code, 304, name)
+            self.assertEqual(again.content, b'')
+            self.assertFalse([q['sql'] for q in queries.captured_queries if 'tracker_' in q['sql']], name) # Session and user only
+            again = self.client.get(reverse(name), headers={'If-Modified-Since': response['Last-Modified']})
+            self.assertEqual(again.status_code, 304, name)
+
+    def test_changes_and_other_viewers_get_the_page(self):
+        url = reverse('tracker:property_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, {'page_size': 5}, headers={'If-None-Match': etag}).status_code, 200)
+
+        prop = Property.objects.first()
+        prop.rent_amount += 1
+        prop.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_pages_with_messages_are_always_rendered(self):
+        url = reverse('tracker:tenant_list')
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('tracker:property_bulk_action'), {'action': 'bulk_delete', 'selected_properties': []})
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class JsonApiTest(TestCase):
+    """The JSON API: sparse fields, filters and cursors on reads; validated batch writes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        PortfolioGenerator(llcs=2, properties=12, years=1, seed=17).run()
+        cls.reader = create_test_user(username='apireader', password='password', permissions=[
+            get_permission('tracker', model, 'view') for model in ('llc', 'property', 'tenant', 'payment', 'propertyfinancialhistory')
+        ])
+        cls.writer = create_test_user(username='apiwriter', password='password', permissions=[
+            get_permission('tracker', model, action) for model in ('property', 'payment') for action in ('view', 'add', 'change')
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.writer)
+
+    def api(self, method, url, data=None, user=None, **params):
+        """A request as the logged in user, or with HTTP Basic authentication as `user`."""
+        headers = {'Authorization': 'Basic ' + base64.b64encode(f'{user}:password'.encode()).decode()} if user else {}
+        if data is not None:
+            return getattr(self.client, method)(url, json.dumps(data), content_type='application/json', headers=headers)
+        return getattr(self.client, method)(url, params, headers=headers)
+
+    def test_pages_select_fields_filter_and_follow_cursors(self):
+        self.client.force_login(self.reader)
+        url = reverse('tracker:api_collection', args=['properties'])
+        llc = LLC.objects.order_by('pk').first()
+        seen, cursor = [], None
+        while True:
+            params = {'fields': 'street_name,rent_amount', 'llc': llc.pk, 'limit': 4, **({'after': cursor} if cursor else {})}
+            with CaptureQueriesContext(connection) as queries:
+                data = self.api('get', url, **params).json()
+            self.assertLessEqual(len(queries), 5) # Session, user, permissions (2) and one query for the page
+            self.assertTrue(all(set(row) == {'id', 'street_name', 'rent_amount'} for row in data['results']))
+            seen += [row['id'] for row in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(Property.objects.filter(llc=llc).order_by('pk').values_list('pk', flat=True)))
+        self.assertEqual(self.api('get', url, fields='secret').status_code, 400)
+        self.assertEqual(self.api('get', url, rent_amount__gte='lots').status_code, 400)
+
+        tenant = Tenant.objects.filter(property__isnull=False).first()
+        payments = self.api('get', reverse('tracker:api_collection', args=['payments']), tenant=tenant.pk, limit=1000).json()['results']
+        self.assertEqual(len(payments), Payment.objects.filter(tenant=tenant).count())
+        row = self.api('get', reverse('tracker:api_item', args=['tenants', tenant.pk])).json()
+        self.assertEqual((row['last_name'], row['property']), (tenant.last_name, tenant.property_id))
+        self.assertNotIn('identification_number', row)
+
+    def test_batch_create_runs_the_bulk_payment_path(self):
+        tenant = Tenant.objects.filter(property__isnull=False).first()
+        url = reverse('tracker:api_collection', args=['payments'])
+        batch = [{'tenant': tenant.pk, 'property': tenant.property_id, 'payment_date': '2024-03-01', 'amount': amount} for amount in ('100.00', 250, '75.5')]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api('post', url, batch)
+        self.assertEqual(response.status_code, 201)
+        created = response.json()['results']
+        self.assertEqual([row['amount'] for row in created], ['100.00', '250.00', '75.50'])
+        self.assertEqual(LedgerEntry.objects.filter(payment_id__in=[row['id'] for row in created]).count(), 3)
+        self.assertEqual(len([q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "tracker_payment"')]), 1)
+
+        batch[1].update(tenant=999999, amount='-5')
+        response = self.api('post', url, batch)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'1'})
+        self.assertEqual(set(response.json()['errors']['1']), {'tenant', 'amount'})
+        self.assertEqual(Payment.objects.filter(payment_date='2024-03-01').count(), 3) # Nothing from the bad batch
+
+    def test_batch_update_saves_through_signals(self):
+        props = list(Property.objects.order_by('pk')[:2])
+        url = reverse('tracker:api_collection', args=['properties'])
+        response = self.api('patch', url, [{'id': props[0].pk, 'rent_amount': '1234.00'}, {'id': props[1].pk, 'status': Property.StatusChoices.VACANT}])
+        self.assertEqual(response.status_code, 200)
+        props[0].refresh_from_db()
+        self.assertEqual(props[0].rent_amount, Decimal('1234.00'))
+        self.assertTrue(PropertyFinancialHistory.objects.filter(property=props[0], new_value=Decimal('1234.00')).exists())
+
+        response = self.api('patch', reverse('tracker:api_item', args=['properties', props[1].pk]), {'status': 'haunted'})
+        self.assertEqual(response.status_code, 400)
+        response = self.api('patch', url, [{'id': 999999, 'bedrooms': 2}])
+        self.assertEqual(response.json()['errors'], {'0': {'id': ['No property with id 999999.']}})
+
+    def test_malformed_cursors_and_ids_are_rejected(self):
+        url = reverse('tracker:api_collection', args=['properties'])
+        for values in (['x'], [[1]], [None], [1, 2]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.api('get', url, after=cursor)
+            self.assertEqual(response.status_code, 400, values)
+            self.assertIn('cursor', response.json()['error'])
+
+        prop = Property.objects.order_by('pk').first()
+        response = self.api('patch', url, [{'id': 'abc', 'bedrooms': 2}, {'id': [1], 'bedrooms': 2}, {'id': prop.pk, 'bedrooms': 2}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'0', '1'})
+        self.assertEqual(set(response.json()['errors']['1']), {'id'})
+
+    def test_authentication_and_permissions(self):
+        url = reverse('tracker:api_collection', args=['properties'])
+        response = Client().get(url)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Basic', response['WWW-Authenticate'])
+        self.assertEqual(self.api('get', url, user='nobody').status_code, 401)
+        self.assertEqual(self.api('post', url, {'street_name': 'X'}, user='apireader').status_code, 403)
+        self.assertEqual(self.api('get', reverse('tracker:api_collection', args=['llcs']), user='apiwriter').status_code, 403)
+        self.assertEqual(self.api('get', url, user='apireader').status_code, 200)
+        self.assertEqual(self.api('post', reverse('tracker:api_collection', args=['financial-history']), {}, user='apireader').status_code, 405)
+        self.assertEqual(self.api('get', reverse('tracker:api_collection', args=['ledger'])).status_code, 404)
+
+        csrf_client = Client(enforce_csrf_checks=True)
+        csrf_client.force_login(self.writer)
+        self.assertEqual(csrf_client.get(url).status_code, 200) # Session reads work as usual
+        response = csrf_client.patch(url, json.dumps([{'id': Property.objects.first().pk, 'bedrooms': 3}]), content_type='application/json')
+        self.assertEqual(response.status_code, 403) # Session writes need the CSRF token
+
+
+@skipUnless(analytics.np is not None, "numpy is not installed")
+class PortfolioAnalyticsTest(TestCase):
+    """Tests for the NumPy portfolio metrics in tracker/analytics.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.llc = LLC.objects.create(name='Analyzed LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.other_llc = LLC.objects.create(name='Quiet LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.props = []
+        for i, (llc, rent, home, lot, payments) in enumerate((
+            # Paid every month, 0, 7 and 2 days after the 1st; December is before the window.
+            (cls.llc, '1000', '400', '100', [('2023-12-01', '1000'), ('2024-01-01', '1000'), ('2024-02-08', '1000'), ('2024-03-03', '1000')]),
+            # Costs more than it earns; paid twice in February, nothing in March.
+            (cls.llc, '800', '900', '0', [('2024-02-15', '400'), ('2024-02-20', '400')]),
+            (cls.other_llc, '500', '0', '0', []),
+        )):
+            prop = Property.objects.create(
+                llc=llc, street_number=str(i + 1), street_name='Birch Rd', status='OCC',
+                rent_amount=Decimal(rent), home_payment=Decimal(home), lot_payment=Decimal(lot),
+            )
+            tenant = Tenant.objects.create(first_name=f'Tenant{i}', last_name='Renter', property=prop)
+            Payment.objects.bulk_create([
+                Payment(tenant=tenant, property=prop, payment_date=datetime.date.fromisoformat(day), amount=Decimal(amount)) for day, amount in payments
+            ])
+            cls.props.append(prop)
+
+    def analyze(self, **kwargs):
+        return analytics.analyze(datetime.date(2024, 3, 31), months=3, grace_days=5, **kwargs)
+
+    def test_property_metrics(self):
+        with self.assertNumQueries(2):
+            result = self.analyze()
+        rows = {row['pk']: row for row in result.property_rows()}
+        self.assertEqual(result.since, datetime.date(2024, 1, 1))
+        self.assertEqual(rows[self.props[0].pk], {
+            'pk': self.props[0].pk, 'address': '1 Birch Rd', 'llc': 'Analyzed LLC',
+            'rent': Decimal('1000.00'), 'obligations': Decimal('500.00'), 'net': Decimal('500.00'), 'annual_net': Decimal('6000.00'),
+            'margin': 0.5, 'collected': Decimal('3000.00'), 'collection_rate': 1.0, 'payments': 3,
+            'regularity': 1.0, 'avg_days_late': 3.0, 'late_share': 0.333,
+        })
+        second = rows[self.props[1].pk]
+        self.assertEqual((second['net'], second['margin'], second['collection_rate'], second['regularity'], second['avg_days_late'], second['late_share']),
+                         (Decimal('-100.00'), -0.125, 0.5, 0.5, 16.5, 1.0))
+        quiet = rows[self.props[2].pk]
+        self.assertEqual((quiet['payments'], quiet['collection_rate'], quiet['regularity'], quiet['avg_days_late']), (0, None, None, None))
+
+    def test_ordering_llc_totals_and_filter(self):
+        result = self.analyze()
+        self.assertEqual([row['address'] for row in result.property_rows('margin')], ['2 Birch Rd', '1 Birch Rd', '3 Birch Rd'])
+        self.assertEqual([row['address'] for row in result.property_rows('days_late', limit=2)], ['2 Birch Rd', '1 Birch Rd'])
+        llc_row = result.llc_rows()[0]
+        self.assertEqual((llc_row['name'], llc_row['properties'], llc_row['net'], llc_row['collected']),
+                         ('Analyzed LLC', 2, Decimal('400.00'), Decimal('3800.00')))
+        self.assertEqual((llc_row['margin'], llc_row['collection_rate'], llc_row['regularity'], llc_row['avg_days_late'], llc_row['late_share']),
+                         (0.222, 0.826, 0.8, 8.4, 0.6))
+        self.assertEqual([row['name'] for row in self.analyze(llc=self.other_llc).llc_rows()], ['Quiet LLC'])
+
+    def test_view_and_command(self):
+        create_test_user(permissions=[get_permission('tracker', 'property', 'view')])
+        self.client.login(username='testuser', password='password')
+        self.assertEqual(self.client.get(reverse('tracker:analytics_report')).status_code, 403)
+        User.objects.get(username='testuser').user_permissions.add(get_permission('tracker', 'payment', 'view'))
+        response = self.client.get(reverse('tracker:analytics_report'), {'as_of': '2024-03-31', 'months': 3, 'order': 'regularity'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['property_rows'][0]['address'], '2 Birch Rd')
+        self.assertContains(response, '$-100.00')
+
+        out = io.StringIO()
+        call_command('portfolio_analytics', '--as-of', '2024-03-31', '--months', '3', '--top', '1', stdout=out)
+        self.assertIn('Analyzed LLC', out.getvalue())
+        self.assertIn('2 Birch Rd', out.getvalue())
+        self.assertNotIn('1 Birch Rd', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('portfolio_analytics', '--months', '0')
+
+
+class FilingComplianceTest(TestCase):
+    """Tests for the stored LLC filing statuses in tracker/compliance.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        FilingDeadline.objects.create(state='TX', month=5, day=15)
+        FilingDeadline.objects.create(state='NV', rule=FilingDeadline.Rule.ANNIVERSARY)
+        cls.texas = LLC.objects.create(name='Texas LLC', state='TX', creation_date=datetime.date(2020, 3, 1))
+        cls.nevada = LLC.objects.create(name='Nevada LLC', state='nv', creation_date=datetime.date(2019, 8, 10))
+        cls.filed = LLC.objects.create(name='Filed LLC', creation_date=datetime.date(2020, 1, 1))
+        cls.new = LLC.objects.create(name='New LLC', creation_date=datetime.date(2025, 5, 1))
+        LLCFiling.objects.create(llc=cls.filed, year=2025, filed_on=datetime.date(2025, 3, 2))
+        cls.today = datetime.date(2025, 6, 1)
+        compliance.refresh(today=cls.today)
+
+    def statuses(self):
+        return {llc.name: (llc.filing_due, llc.filing_status) for llc in LLC.objects.all()}
+
+    def test_deadlines_per_state_and_buckets(self):
+        self.assertEqual(self.statuses(), {
+            'Texas LLC': (datetime.date(2025, 5, 15), 'red'),
+            'Nevada LLC': (datetime.date(2025, 8, 31), 'yellow'), # End of the anniversary month
+            'Filed LLC': (datetime.date(2025, 4, 15), 'green'), # settings.LLC_FILING_DEADLINE
+            'New LLC': (datetime.date(2026, 4, 15), 'yellow'), # Formed after this year's deadline
+        })
+        self.assertEqual(LLC.objects.get(pk=self.filed.pk).last_filing_date, datetime.date(2025, 3, 2))
+        with self.assertNumQueries(4):
+            self.assertEqual(compliance.refresh(today=self.today), []) # Nothing changed, nothing written
+
+    def test_daily_command_only_reads_llcs_the_date_moves(self):
+        self.assertFalse(compliance.stale(self.today).exists())
+        self.assertEqual(list(compliance.stale(datetime.date(2025, 9, 1))), [self.nevada])
+        self.assertEqual(compliance.stale(datetime.date(2026, 1, 1)).count(), 3) # All but New LLC, first due in 2026
+
+        out = io.StringIO()
+        call_command('refresh_filing_status', '--as-of', '2025-09-01', '--upcoming', '300', stdout=out)
+        self.assertIn('1 LLC(s)', out.getvalue())
+        self.assertIn('2026-04-15  New LLC', out.getvalue())
+        self.assertEqual(self.statuses()['Nevada LLC'], (datetime.date(2025, 8, 31), 'red'))
+        call_command('refresh_filing_status', '--as-of', '2026-01-02', stdout=io.StringIO())
+        self.assertEqual(self.statuses()['Filed LLC'], (datetime.date(2026, 4, 15), 'yellow'))
+
+    def test_deprecated_reset_command_runs_the_refresh(self):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('reset_llc_filing_status', stdout=out, stderr=err)
+        self.assertIn('deprecated', err.getvalue())
+        self.assertIn('Updated the filing status of', out.getvalue())
+
+    def test_filed_checkbox_and_deadline_changes_refresh_on_save(self):
+        llc = LLC.objects.get(pk=self.texas.pk)
+        llc.filing_current = True
+        llc.save()
+        self.assertEqual(llc.filing_status, 'green')
+        this_year = datetime.date.today().year
+        self.assertTrue(LLCFiling.objects.filter(llc=llc, year=this_year).exists())
+        llc.filing_current = False
+        llc.save()
+        self.assertFalse(LLCFiling.objects.filter(llc=llc, year=this_year).exists())
+        self.assertNotEqual(LLC.objects.get(pk=llc.pk).filing_status, 'green')
+
+        FilingDeadline.objects.filter(state='TX').update(month=12, day=31) # No signal...
+        FilingDeadline.objects.get(state='TX').save() # ...until saved
+        self.assertEqual(LLC.objects.get(pk=llc.pk).filing_due, datetime.date(this_year, 12, 31))
+
+    def test_edited_filing_date_is_kept(self):
+        llc = LLC.objects.get(pk=self.texas.pk)
+        this_year = datetime.date.today().year
+        llc.filing_current, llc.last_filing_date = True, datetime.date(this_year, 1, 1)
+        llc.save()
+        llc.last_filing_date = datetime.date(this_year, 1, 10) # Corrected on the form
+        llc.save()
+        self.assertEqual(LLC.objects.get(pk=llc.pk).last_filing_date, datetime.date(this_year, 1, 10))
+        self.assertEqual(LLCFiling.objects.get(llc=llc, year=this_year).filed_on, datetime.date(this_year, 1, 10))
+
+        llc.filing_current, llc.last_filing_date = False, datetime.date(2018, 6, 1) # Older than any recorded filing
+        llc.save()
+        self.assertEqual(LLC.objects.get(pk=llc.pk).last_filing_date, datetime.date(2018, 6, 1))
+        llc = LLC.objects.get(pk=self.filed.pk)
+        llc.filing_current, llc.last_filing_date = False, datetime.date(2024, 3, 2)
+        llc.save()
+        self.assertEqual(LLC.objects.get(pk=llc.pk).last_filing_date, datetime.date(2025, 3, 2)) # The recorded 2025 filing is later
+
+    def test_llc_list_filters_and_sorts_by_status_in_sql(self):
+        create_test_user(permissions=[get_permission('tracker', 'llc', 'view')])
+        self.client.login(username='testuser', password='password')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tracker:llc_list'), {'sort': 'status'})
+        self.assertEqual([llc.name for llc in response.context['llcs']], ['Texas LLC', 'Nevada LLC', 'New LLC', 'Filed LLC'])
+        self.assertTrue(any('ORDER BY "tracker_llc"."filing_bucket"' in q['sql'] for q in queries.captured_queries))
+        response = self.client.get(reverse('tracker:llc_list'), {'status': LLC.FilingBucket.DUE})
+        self.assertEqual([llc.name for llc in response.context['llcs']], ['Nevada LLC', 'New LLC'])
+        self.assertContains(response, '2025-08-31')
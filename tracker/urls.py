@@ -10,11 +10,13 @@ urlpatterns = [
     path('', views.home, name='home'),
     # Add other app-specific URLs here later (e.g., for properties, tenants)
     path('dashboard/', views.dashboard, name='dashboard'), # Example protected view
+    path('search/', views.search, name='search'),
     # LLC URLs
     path('llcs/', views.llc_list, name='llc_list'),
     path('llcs/add/', views.llc_add, name='llc_add'),
     path('llcs/<int:pk>/edit/', views.llc_edit, name='llc_edit'),
     path('llcs/<int:pk>/delete/', views.llc_delete, name='llc_delete'),
+    path('llcs/<int:pk>/statement/', views.llc_statement, name='llc_statement'),
 
     # Property URLs
     path('properties/', views.property_list, name='property_list'),
@@ -22,16 +24,31 @@ urlpatterns = [
     path('properties/<int:pk>/edit/', views.property_edit, name='property_edit'),
     path('properties/<int:pk>/delete/', views.property_delete, name='property_delete'),
     path('properties/bulk-action/', views.property_bulk_action, name='property_bulk_action'),
+    path('properties/export/', views.property_export, name='property_export'),
 
     # Tenant URLs
     path('tenants/', views.tenant_list, name='tenant_list'),
     path('tenants/add/', views.tenant_add, name='tenant_add'),
     path('tenants/<int:pk>/edit/', views.tenant_edit, name='tenant_edit'),
     path('tenants/<int:pk>/delete/', views.tenant_delete, name='tenant_delete'),
+    path('tenants/export/', views.tenant_export, name='tenant_export'),
 
     # Payment URLs
     path('payments/', views.payment_list, name='payment_list'),
     path('payments/add/', views.payment_add, name='payment_add'),
     path('payments/<int:pk>/edit/', views.payment_edit, name='payment_edit'),
     path('payments/<int:pk>/delete/', views.payment_delete, name='payment_delete'),
+    path('payments/export/', views.payment_export, name='payment_export'),
+    path('payments/import/', views.payment_import, name='payment_import'),
+
+    # Report URLs
+    path('reports/rent-roll/', views.rent_roll, name='rent_roll'),
+    path('reports/occupancy/', views.occupancy_report, name='occupancy_report'),
+    path('reports/delinquency/', views.delinquency_report, name='delinquency_report'),
+    path('reports/analytics/', views.analytics_report, name='analytics_report'),
+    path('stats/requests/', views.request_stats_view, name='request_stats'),
+
+    # JSON API (see tracker/api.py)
+    path('api/<slug:resource>/', views.api_collection, name='api_collection'),
+    path('api/<slug:resource>/<int:pk>/', views.api_item, name='api_item'),
 ]
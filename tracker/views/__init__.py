@@ -1,7 +1,7 @@
 # tracker/views/__init__.py
 
 # Import views from main.py
-from .main import home, dashboard
+from .main import home, dashboard, request_stats_view
 
 # Import views from llc.py
 from .llc import llc_list, llc_add, llc_edit, llc_delete
@@ -13,4 +13,16 @@ from .property import property_list, property_add, property_edit, property_delet
 from .tenant import tenant_list, tenant_add, tenant_edit, tenant_delete
 
 # Import views from payment.py
-from .payment import payment_list, payment_add, payment_edit, payment_delete
\ No newline at end of file
+from .payment import payment_list, payment_add, payment_edit, payment_delete, payment_import
+
+# Import views from export.py
+from .export import payment_export, property_export, tenant_export
+
+# Import views from reports.py
+from .reports import analytics_report, delinquency_report, llc_statement, occupancy_report, rent_roll
+
+# Import views from search.py
+from .search import search
+
+# Import views from api.py
+from .api import api_collection, api_item
\ No newline at end of file
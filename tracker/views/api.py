@@ -0,0 +1,110 @@
+# tracker/views/api.py
+"""
+JSON API over the tracker models; the resources themselves are in tracker/api.py.
+
+    GET   /api/<resource>/          a page of rows: ?fields=, ?after=, ?limit=, filters
+    POST  /api/<resource>/          create one object or a list of them
+    PATCH /api/<resource>/          update a list of objects, each with its "id"
+    GET   /api/<resource>/<id>/     one row
+    PATCH /api/<resource>/<id>/     update one object
+
+Scripts can log in with HTTP Basic authentication on every request, or use
+a browser session (then writes need the CSRF token like any form post).
+The usual view/add/change permissions apply.
+"""
+import base64
+import binascii
+import json
+from functools import wraps
+
+from django.contrib.auth import authenticate
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+
+from ..api import RESOURCES, ApiError
+from ..permissions import permission_snapshot
+
+ACTIONS = {'GET': 'view', 'HEAD': 'view', 'POST': 'add', 'PATCH': 'change'}
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder, safe=False)
+
+
+def _basic_auth_user(request):
+    try:
+        credentials = base64.b64decode(request.headers['Authorization'][6:], validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    username, _, password = credentials.partition(':')
+    return authenticate(request, username=username, password=password)
+
+
+def _authorize(request, resource):
+    """Authenticates the request and checks the permission its method needs; raises ApiError otherwise."""
+    if request.headers.get('Authorization', '').startswith('Basic '):
+        user = _basic_auth_user(request) # No cookies involved, so no CSRF check needed
+        if user is None:
+            raise ApiError("Invalid username or password.", status=401)
+        request.user = user
+    elif not request.user.is_authenticated:
+        raise ApiError("Authentication required.", status=401)
+    elif request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+        # The view is csrf_exempt for Basic auth; session requests get the usual check.
+        if CsrfViewMiddleware(lambda r: None).process_view(request, None, (), {}) is not None:
+            raise ApiError("CSRF verification failed.", status=403)
+    action = ACTIONS.get(request.method)
+    if action is None or (action != 'view' and not resource.writable):
+        raise ApiError(f"{request.method} isn't supported here.", status=405)
+    if not permission_snapshot(request).has_perm(resource.perm(action)):
+        raise ApiError("You do not have permission to do that.", status=403)
+
+
+def _body(request):
+    try:
+        return json.loads(request.body or b'null')
+    except ValueError:
+        raise ApiError("The request body isn't valid JSON.")
+
+
+def _api_view(view):
+    @wraps(view)
+    def inner(request, resource, **kwargs):
+        try:
+            if resource not in RESOURCES:
+                raise ApiError(f"Unknown resource {resource!r}. Available: {', '.join(RESOURCES)}.", status=404)
+            resource = RESOURCES[resource]
+            _authorize(request, resource)
+            return view(request, resource, **kwargs)
+        except ApiError as e:
+            data = {'error': e.message}
+            if e.errors:
+                data['errors'] = e.errors
+            response = _json(data, status=e.status)
+            if e.status == 401:
+                response['WWW-Authenticate'] = 'Basic realm="RentTracker API"'
+            return response
+    return csrf_exempt(inner)
+
+
+@_api_view
+def api_collection(request, resource):
+    """Lists (GET), creates (POST) or batch updates (PATCH) a resource's objects."""
+    if request.method == 'POST':
+        return _json({'results': resource.create(_body(request))}, status=201)
+    if request.method == 'PATCH':
+        return _json({'results': resource.update(_body(request))})
+    rows, next_cursor = resource.page(request.GET)
+    return _json({'results': rows, 'next': next_cursor})
+
+
+@_api_view
+def api_item(request, resource, pk):
+    """Reads (GET) or updates (PATCH) one object."""
+    if request.method == 'POST':
+        raise ApiError("POST to the collection to create objects.", status=405)
+    if request.method == 'PATCH':
+        return _json(resource.update(_body(request), pk=pk)[0])
+    return _json(resource.get(pk, request.GET))
@@ -0,0 +1,80 @@
+# tracker/views/conditional.py
+"""
+Conditional GET (ETag/Last-Modified) for list and report pages.
+
+A page's validators are the version tokens of the models it shows (see
+tracker/fragments.py; the signal receivers replace them on every change),
+plus everything else its HTML depends on: the viewer and their permissions,
+their CSRF token and, for pages that default to today, the date. None of
+that needs a query, so refreshing an unchanged page gets a 304 after only
+the session and user lookups, before the view touches its queryset.
+"""
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .. import fragments, permissions
+from .shortcuts import aload_user
+
+
+def _validators(request, tokens, daily):
+    """The page's (ETag, Last-Modified timestamp), or (None, None) when it must be rendered."""
+    if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+        return None, None # Flash messages are shown once, so that page is never "not modified"
+    if 'CSRF_COOKIE' not in request.META:
+        return None, None # This render sets the cookie, so the next request's validators will differ anyway
+    user = request.user
+    stamps = [int(token) / 1e9 for token in tokens]
+    if user.last_login: # Logging in again (as anyone) makes every page new to this browser
+        stamps.append(user.last_login.timestamp())
+    today = timezone.localdate() if daily else None
+    if today:
+        stamps.append(timezone.make_aware(datetime.datetime.combine(today, datetime.time())).timestamp())
+    parts = (request.get_full_path(), tokens, user.pk, stamps, request.META.get('CSRF_COOKIE'), today)
+    etag = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{etag}"', int(max(stamps))
+
+
+def _finish(request, response, etag, last_modified):
+    if etag and request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        response.headers.setdefault('Last-Modified', http_date(last_modified))
+        # Per user, and always revalidated: without no-cache, browsers may reuse a
+        # page with a Last-Modified for a while without asking.
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(*models, daily=False):
+    """
+    Decorator (inside the login and permission checks) for a page built from
+    `models`. `daily` is for pages whose defaults depend on today's date.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                await aload_user(request) # request.user, without sync queries in the event loop
+                tokens = [*await fragments.aversions(models), await permissions._aversion()]
+                etag, last_modified = _validators(request, tokens, daily)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(request, response, etag, last_modified)
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                tokens = [*fragments.versions(models), permissions._version()]
+                etag, last_modified = _validators(request, tokens, daily)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return _finish(request, response, etag, last_modified)
+        return inner
+    return decorator
@@ -0,0 +1,139 @@
+# tracker/views/export.py
+import csv
+import datetime
+import itertools
+import tempfile
+
+from django.contrib.auth.decorators import login_required, permission_required
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+
+from ..models import Payment, Property, Tenant
+from ..forms import PaymentFilterForm, PropertyFilterForm, TenantFilterForm
+
+try: # XLSX export is optional; CSV works without any extra packages.
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Rows fetched per round trip. On PostgreSQL .iterator() uses a server-side cursor,
+# on SQLite it fetches in chunks, so memory stays flat for any export size.
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Echo:
+    """A file-like object whose write() just hands back the line, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def _stream_csv(filename, header, rows):
+    writer = csv.writer(Echo())
+    lines = (writer.writerow(row) for row in itertools.chain([header], rows))
+    response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def _xlsx(filename, header, rows):
+    """
+    Writes rows with openpyxl's write-only mode, which spools to disk instead
+    of holding the workbook in memory. An .xlsx is a zip file, so unlike CSV it
+    can't be sent until it has been fully written.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=filename[:31])
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
+
+
+def _export(request, form, queryset, columns, filename):
+    """
+    Shared export handler. `columns` is a list of (header, lookup) pairs;
+    rows are read as tuples with values_list() so no model instances are built.
+    """
+    if not form.is_valid():
+        return HttpResponseBadRequest(f"Invalid filters: {form.errors.as_text()}")
+    queryset = form.filter_queryset(queryset)
+    header = [label for label, _ in columns]
+    rows = queryset.values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    filename = f'{filename}-{datetime.date.today():%Y%m%d}'
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format == 'csv':
+        return _stream_csv(filename, header, rows)
+    if export_format == 'xlsx':
+        if openpyxl is None:
+            return HttpResponse("XLSX export requires the openpyxl package.", status=501)
+        return _xlsx(filename, header, rows)
+    return HttpResponseBadRequest(f"Unknown export format: {export_format}")
+
+
+@login_required
+@permission_required('tracker.view_payment', login_url='/login/', raise_exception=True)
+def payment_export(request):
+    """Exports payments matching the payment list filters."""
+    columns = [
+        ('Payment ID', 'pk'),
+        ('Date', 'payment_date'),
+        ('Amount', 'amount'),
+        ('Tenant First Name', 'tenant__first_name'),
+        ('Tenant Last Name', 'tenant__last_name'),
+        ('Street Number', 'property__street_number'),
+        ('Street Name', 'property__street_name'),
+        ('LLC', 'property__llc__name'),
+        ('Notes', 'notes'),
+    ]
+    queryset = Payment.objects.order_by('payment_date', 'pk')
+    return _export(request, PaymentFilterForm(request.GET), queryset, columns, 'payments')
+
+
+@login_required
+@permission_required('tracker.view_property', login_url='/login/', raise_exception=True)
+def property_export(request):
+    """Exports properties matching the property list filters."""
+    columns = [
+        ('Property ID', 'pk'),
+        ('LLC', 'llc__name'),
+        ('Street Number', 'street_number'),
+        ('Street Name', 'street_name'),
+        ('Status', 'status'),
+        ('Rent', 'rent_amount'),
+        ('Home Payment', 'home_payment'),
+        ('Lot Payment', 'lot_payment'),
+        ('Security Deposit', 'security_deposit'),
+        ('Bedrooms', 'bedrooms'),
+        ('Bathrooms', 'bathrooms'),
+        ('Date Purchased', 'date_purchased'),
+        ('Make', 'make'),
+        ('Year', 'year'),
+        ('VIN', 'vin'),
+    ]
+    queryset = Property.objects.order_by('llc_id', 'street_number', 'street_name')
+    return _export(request, PropertyFilterForm(request.GET), queryset, columns, 'properties')
+
+
+@login_required
+@permission_required('tracker.view_tenant', login_url='/login/', raise_exception=True)
+def tenant_export(request):
+    """Exports tenants, optionally limited to an LLC or property. ID numbers are left out on purpose."""
+    columns = [
+        ('Tenant ID', 'pk'),
+        ('First Name', 'first_name'),
+        ('Last Name', 'last_name'),
+        ('Phone', 'phone_number'),
+        ('Approved', 'is_approved'),
+        ('Date Approved', 'date_approved'),
+        ('Move-in Date', 'move_in_date'),
+        ('Street Number', 'property__street_number'),
+        ('Street Name', 'property__street_name'),
+        ('LLC', 'property__llc__name'),
+    ]
+    queryset = Tenant.objects.order_by('last_name', 'first_name', 'pk')
+    return _export(request, TenantFilterForm(request.GET), queryset, columns, 'tenants')
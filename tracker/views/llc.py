@@ -6,18 +6,39 @@ from django.db import IntegrityError
 from django.db.models import ProtectedError
 
 from ..models import LLC
-from ..forms import LLCForm
+from ..forms import LLCFilterForm, LLCForm
+from .conditional import conditional_page
+from .shortcuts import alist_fragment, arender
+
+# Permissions that change what the LLC table shows
+LLC_LIST_PERMS = ('add_llc', 'change_llc', 'delete_llc', 'view_payment')
 
 # LLCs view
 @login_required
 @permission_required('tracker.view_llc', login_url='/login/', raise_exception=True)
-def llc_list(request):
-    """Displays a list of all LLCs and their filing status."""
-    llcs = LLC.objects.all().order_by('name') # Get all LLCs, ordered by name
+@conditional_page(LLC)
+async def llc_list(request):
+    """
+    Displays the LLCs and their filing status, optionally filtered by status
+    and sorted most urgent first. Statuses are stored columns (see
+    tracker/compliance.py), so both happen in SQL, and the table is cached
+    per query string until an LLC or its status changes.
+    """
+    filter_form = LLCFilterForm(request.GET or None)
+    queryset = filter_form.filter_queryset(LLC.objects.all()) if filter_form.is_valid() else LLC.objects.order_by('name')
+    table = await alist_fragment(request, 'llc_list', [LLC], LLC_LIST_PERMS, vary_on=[request.GET.urlencode()])
+    llcs = []
+    if not await table.aload():
+        llcs = [llc async for llc in queryset.aiterator()]
+        await table.aload_rows([llc.pk for llc in llcs])
     context = {
         'llcs': llcs,
+        'filter_form': filter_form,
+        'table': table,
     }
-    return render(request, 'tracker/llc_list.html', context)
+    response = await arender(request, 'tracker/llc_list.html', context)
+    await table.asave()
+    return response
 
 # --- LLC CRUD Views ---
 @login_required
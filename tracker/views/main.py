@@ -1,6 +1,12 @@
 # tracker/views/main.py
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+
+from ..instrumentation import request_stats
+from ..metrics import aget_dashboard_metrics
+from .shortcuts import arender
 
 def home(request):
     """
@@ -14,9 +20,29 @@ def home(request):
     return render(request, 'tracker/home.html')
 
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """
     Displays the main dashboard for logged-in users.
+    Metrics are precomputed per LLC and served from the cache (see tracker/metrics.py).
+    """
+    user = await request.auser()
+    llc_metrics, portfolio = await aget_dashboard_metrics()
+    context = {
+        'user_first_name': user.first_name or user.username,
+        'llc_metrics': llc_metrics,
+        'portfolio': portfolio,
+    }
+    return await arender(request, 'tracker/dashboard.html', context)
+
+@login_required
+def request_stats_view(request):
+    """
+    Per-view request timings and query counts gathered by RequestTimingMiddleware
+    in this process, as JSON. POST clears them (e.g. before a benchmark run).
     """
-    # You will need to create a 'tracker/dashboard.html' template
-    return render(request, 'tracker/dashboard.html')
\ No newline at end of file
+    if not request.user.is_staff:
+        # 403 like permission_required(..., raise_exception=True); a redirect to the login page would loop.
+        raise PermissionDenied
+    if request.method == 'POST':
+        request_stats.reset()
+    return JsonResponse({'views': request_stats.snapshot()})
@@ -1,19 +1,41 @@
 # tracker/views/payment.py
+import io
+
 from django.shortcuts import render, redirect, get_object_or_404 # Import redirect
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import ProtectedError
 
-from ..models import Payment
-from ..forms import PaymentForm
+from ..models import LLC, Payment, Property, Tenant
+from ..forms import PaymentForm, PaymentFilterForm, PaymentImportForm
+from ..importers import PaymentImporter
+from .conditional import conditional_page
+from .shortcuts import alist_fragment, arender
+
+# Permissions that change what the payment table shows
+PAYMENT_LIST_PERMS = ('add_payment', 'change_payment', 'delete_payment')
 
 # Payments view
 @login_required
 @permission_required('tracker.view_payment', login_url='/login/', raise_exception=True)
-def payment_list(request):
+@conditional_page(Payment, Tenant, Property, LLC) # LLCs are also the filter's choices
+async def payment_list(request):
+    """Displays payments, filtered; the table is cached per query string until a payment, tenant or property changes."""
+    filter_form = PaymentFilterForm(request.GET or None)
     payments = Payment.objects.select_related('tenant', 'property').all().order_by('-payment_date')
-    context = {'payments': payments}
-    return render(request, 'tracker/payment_list.html', context)
+    if filter_form.is_bound and await filter_form.ais_valid():
+        payments = filter_form.filter_queryset(payments)
+    await filter_form.aload_choices()
+    table = await alist_fragment(request, 'payment_list', [Payment, Tenant, Property], PAYMENT_LIST_PERMS, vary_on=[request.GET.urlencode()])
+    rows = []
+    if not await table.aload():
+        rows = [payment async for payment in payments.aiterator()]
+        await table.aload_rows([payment.pk for payment in rows])
+    context = {'payments': rows, 'filter_form': filter_form, 'table': table}
+    response = await arender(request, 'tracker/payment_list.html', context)
+    await table.asave()
+    return response
 
 
 # --- Payment CRUD Views ---
@@ -24,7 +46,8 @@ def payment_add(request):
         form = PaymentForm(request.POST)
         if form.is_valid():
             try:
-                form.save()
+                with transaction.atomic(): # Payment and its ledger posting commit together
+                    form.save()
                 messages.success(request, f"Payment added successfully.")
                 return redirect('tracker:payment_list')
             except Exception as e:
@@ -46,7 +69,8 @@ def payment_edit(request, pk):
         form = PaymentForm(request.POST, instance=payment)
         if form.is_valid():
             try:
-                form.save()
+                with transaction.atomic():
+                    form.save()
                 messages.success(request, f"Payment updated successfully.")
                 return redirect('tracker:payment_list')
             except Exception as e:
@@ -68,7 +92,8 @@ def payment_delete(request, pk):
     if request.method == 'POST':
         try:
             payment_str = str(payment)
-            payment.delete()
+            with transaction.atomic():
+                payment.delete()
             messages.success(request, f"Payment '{payment_str}' deleted successfully.")
             return redirect('tracker:payment_list')
         # No ProtectedError expected here based on current models, but keep general exception handling
@@ -77,3 +102,30 @@ def payment_delete(request, pk):
             return redirect('tracker:payment_list')
     context = {'object': payment, 'object_type': 'Payment'}
     return render(request, 'tracker/generic_confirm_delete.html', context)
+
+
+@login_required
+@permission_required('tracker.add_payment', login_url='/login/', raise_exception=True)
+def payment_import(request):
+    """Uploads a CSV of payments and shows a per-row error report."""
+    result = None
+    if request.method == 'POST':
+        form = PaymentImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Wrap the upload so rows are decoded and parsed as they're read.
+            csv_file = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            result = PaymentImporter(dry_run=form.cleaned_data['dry_run']).run(csv_file)
+            if result.dry_run:
+                messages.info(request, f"Dry run: {result.created} of {result.rows_read} row(s) would be imported.")
+            elif result.created:
+                messages.success(request, f"Imported {result.created} of {result.rows_read} payment(s).")
+            if result.errors:
+                messages.warning(request, f"{len(result.errors)} row(s) could not be imported. See the report below.")
+    else:
+        form = PaymentImportForm()
+    context = {
+        'form': form,
+        'result': result,
+        'form_title': 'Import Payments',
+    }
+    return render(request, 'tracker/payment_import.html', context)
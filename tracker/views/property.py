@@ -5,19 +5,65 @@ from django.contrib import messages
 from django.db import IntegrityError
 from django.db.models import ProtectedError
 
-from ..models import Property
-from ..forms import PropertyForm, PropertyBulkUpdateForm
+from ..models import LLC, Property
+from ..forms import PropertyForm, PropertyBulkUpdateForm, PropertyFilterForm
+from ..pagination import KeysetPaginator, InvalidCursor
+from ..permissions import permission_snapshot
+from .conditional import conditional_page
+from .shortcuts import alist_fragment, arender
+
+# Keyset ordering for the property list. (llc, street_name, street_number) is unique,
+# so this tuple identifies exactly one row and can be used as a cursor.
+PROPERTY_LIST_ORDERING = ('llc_id', 'street_number', 'street_name')
+PROPERTY_LIST_PAGE_SIZE = 50
+PROPERTY_LIST_MAX_PAGE_SIZE = 500
+# Permissions that change what the property table shows
+PROPERTY_LIST_PERMS = ('change_property', 'delete_property')
 
 # Properties view
 @login_required
 @permission_required('tracker.view_property', login_url='/login/', raise_exception=True)
-def property_list(request):
-    """Displays a list of all properties."""
-    properties = Property.objects.all().order_by('llc', 'street_number', 'street_name') # Get all properties, ordered by LLC, address
+@conditional_page(Property, LLC)
+async def property_list(request):
+    """
+    Displays a page of properties, filtered by LLC/status/rent range.
+    Uses keyset pagination (?after=/?before= cursors) so every page costs the
+    same small, fixed number of queries no matter how many properties exist.
+    Async, so under ASGI a slow page doesn't hold a worker thread. The table
+    is cached per query string until a property or LLC changes.
+    """
+    filter_form = PropertyFilterForm(request.GET or None)
+    properties = Property.objects.select_related('llc') # Join the LLC so rows don't each query it
+    if filter_form.is_bound and await filter_form.ais_valid():
+        properties = filter_form.filter_queryset(properties)
+    await filter_form.aload_choices()
+
+    try:
+        page_size = int(request.GET.get('page_size', PROPERTY_LIST_PAGE_SIZE))
+    except ValueError:
+        page_size = PROPERTY_LIST_PAGE_SIZE
+    page_size = max(1, min(page_size, PROPERTY_LIST_MAX_PAGE_SIZE))
+
+    paginator = KeysetPaginator(properties, PROPERTY_LIST_ORDERING, page_size)
+    try:
+        page = paginator.get_page(after=request.GET.get('after'), before=request.GET.get('before'))
+    except InvalidCursor:
+        messages.warning(request, "That page link is no longer valid. Showing the first page.")
+        page = paginator.get_page()
+    table = await alist_fragment(request, 'property_list', [Property, LLC], PROPERTY_LIST_PERMS, vary_on=[request.GET.urlencode()])
+    if not await table.aload():
+        await page.aload()
+        await table.aload_rows([property.pk for property in page])
+
     context = {
-        'properties': properties,
+        'properties': page,
+        'page': page,
+        'filter_form': filter_form,
+        'table': table,
     }
-    return render(request, 'tracker/property_list.html', context)
+    response = await arender(request, 'tracker/property_list.html', context)
+    await table.asave()
+    return response
 
 # --- Property CRUD Views ---
 @login_required
@@ -104,11 +150,12 @@ def property_bulk_action(request):
         messages.warning(request, "You must select at least one property.")
         return redirect('tracker:property_list')
 
-    # Check permissions for the chosen action
-    if action == 'bulk_delete' and not request.user.has_perm('tracker.delete_property'):
+    # Check permissions for the chosen action (resolved once; the template reuses them)
+    perms = permission_snapshot(request)
+    if action == 'bulk_delete' and not perms.has_perm('tracker.delete_property'):
         messages.error(request, "You do not have permission to delete properties.")
         return redirect('tracker:property_list')
-    if action == 'bulk_update' and not request.user.has_perm('tracker.change_property'):
+    if action == 'bulk_update' and not perms.has_perm('tracker.change_property'):
         messages.error(request, "You do not have permission to change properties.")
         return redirect('tracker:property_list')
 
@@ -136,7 +183,7 @@ def property_bulk_action(request):
             form = PropertyBulkUpdateForm(request.POST)
             if form.is_valid():
                 new_status = form.cleaned_data['status']
-                updated_count = queryset.update(status=new_status)
+                updated_count = queryset.update_with_history(changed_by=request.user, status=new_status)
                 messages.success(request, f"Successfully updated {updated_count} properties to '{dict(Property.StatusChoices.choices)[new_status]}'.")
                 return redirect('tracker:property_list')
         
@@ -0,0 +1,192 @@
+# tracker/views/reports.py
+import datetime
+import io
+
+from dateutil.relativedelta import relativedelta
+from django.core.paginator import Paginator
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, render
+from django.utils.text import slugify
+from django.contrib.auth.decorators import login_required, permission_required
+
+from .. import analytics
+from ..delinquency import days_past_due, delinquency_totals, delinquent_tenants
+from ..forms import AnalyticsForm, DelinquencyForm, OccupancyReportForm, RentRollForm, StatementForm
+from ..models import LLC, OccupancyInterval, Payment, Property, Tenant
+from ..occupancy import occupancy_timeline
+from ..reports import financials_as_of, rent_roll_by_llc
+from ..rollups import statement, statement_rows
+from .conditional import conditional_page
+from .export import _stream_csv
+
+try: # PDF statements are optional; HTML and CSV work without any extra packages.
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+except ImportError:
+    SimpleDocTemplate = None
+
+STATEMENT_HEADER = ['Period', 'Income', 'Payments', 'Obligations', 'Net']
+
+
+@login_required
+@permission_required('tracker.view_propertyfinancialhistory', login_url='/login/', raise_exception=True)
+@conditional_page(LLC, Property, daily=True) # History rows are written with the property
+def rent_roll(request):
+    """
+    Historical rent roll: per-LLC totals as of a date, plus per-property
+    values when a single LLC is selected. Both are single queries.
+    """
+    form = RentRollForm(request.GET or {'as_of': datetime.date.today()})
+    llc_rows, property_rows, totals = [], None, {}
+    if form.is_valid():
+        as_of = form.cleaned_data['as_of']
+        llc = form.cleaned_data['llc']
+        llc_rows = list(rent_roll_by_llc(as_of))
+        if llc:
+            llc_rows = [row for row in llc_rows if row['llc_id'] == llc.pk]
+            property_rows = financials_as_of(as_of).filter(llc=llc).order_by('street_number', 'street_name')
+        totals = {
+            key: sum(row[key] or 0 for row in llc_rows)
+            for key in ('property_count', 'rent_total', 'home_payment_total', 'lot_payment_total')
+        }
+    context = {
+        'form': form,
+        'llc_rows': llc_rows,
+        'property_rows': property_rows,
+        'totals': totals,
+    }
+    return render(request, 'tracker/rent_roll.html', context)
+
+
+@login_required
+@permission_required('tracker.view_property', login_url='/login/', raise_exception=True)
+@conditional_page(LLC, Property, Tenant, daily=True) # Intervals follow property and tenant changes
+def occupancy_report(request):
+    """Monthly occupancy rate and vacancy loss per LLC, one aggregate query per month."""
+    this_month = datetime.date.today().replace(day=1)
+    form = OccupancyReportForm(request.GET or {
+        'start': (this_month - relativedelta(months=11)).strftime('%Y-%m'),
+        'end': this_month.strftime('%Y-%m'),
+    })
+    timeline = []
+    if form.is_valid():
+        intervals = OccupancyInterval.objects.all()
+        if form.cleaned_data['llc']:
+            intervals = intervals.filter(llc=form.cleaned_data['llc'])
+        timeline = occupancy_timeline(form.cleaned_data['start'], form.cleaned_data['end'], intervals)
+    context = {
+        'form': form,
+        'timeline': timeline,
+    }
+    return render(request, 'tracker/occupancy_report.html', context)
+
+
+@login_required
+@permission_required(['tracker.view_tenant', 'tracker.view_payment'], login_url='/login/', raise_exception=True)
+@conditional_page(LLC, Property, Tenant, Payment, daily=True)
+def delinquency_report(request):
+    """
+    Tenants who are behind on rent, largest amount first. Balances, sorting and
+    totals are computed in the database; only the shown page is loaded.
+    """
+    form = DelinquencyForm(request.GET or None)
+    as_of, llc = datetime.date.today(), None
+    if form.is_valid():
+        as_of = form.cleaned_data['as_of'] or as_of
+        llc = form.cleaned_data['llc']
+    tenants = delinquent_tenants(as_of, llc)
+    totals = delinquency_totals(tenants)
+    paginator = Paginator(tenants, 50)
+    paginator.count = totals['tenants'] # Already counted; saves the paginator's COUNT query
+    page = paginator.get_page(request.GET.get('page'))
+    for tenant in page:
+        tenant.days_past_due = days_past_due(tenant, as_of)
+
+    context = {
+        'form': form,
+        'as_of': as_of,
+        'page_obj': page,
+        'totals': totals,
+    }
+    return render(request, 'tracker/delinquency.html', context)
+
+
+@login_required
+@permission_required(['tracker.view_property', 'tracker.view_payment'], login_url='/login/', raise_exception=True)
+@conditional_page(LLC, Property, Payment, daily=True)
+def analytics_report(request):
+    """
+    Cash flow and payment behaviour per LLC, and the properties that do worst
+    on the chosen measure. Computed with NumPy (see tracker/analytics.py).
+    """
+    if analytics.np is None:
+        return HttpResponse("Portfolio analytics require the numpy package.", status=501)
+    form = AnalyticsForm(request.GET or None)
+    as_of, months, llc, order = datetime.date.today(), 12, None, 'margin'
+    if form.is_valid():
+        as_of = form.cleaned_data['as_of'] or as_of
+        months = form.cleaned_data['months'] or months
+        llc = form.cleaned_data['llc']
+        order = form.cleaned_data['order'] or order
+    result = analytics.analyze(as_of, months, llc)
+
+    context = {
+        'form': form,
+        'result': result,
+        'llc_rows': result.llc_rows(),
+        'property_rows': result.property_rows(order, limit=50),
+        'order_label': dict(AnalyticsForm.ORDER_CHOICES)[order],
+    }
+    return render(request, 'tracker/analytics.html', context)
+
+
+def _statement_pdf(filename, title, rows):
+    output = io.BytesIO()
+    document = SimpleDocTemplate(output, pagesize=letter, title=title)
+    table = Table([STATEMENT_HEADER] + [[str(value) for value in row] for row in rows], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+    ]))
+    document.build([Paragraph(title, getSampleStyleSheet()['Heading1']), table])
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=f'{filename}.pdf', content_type='application/pdf')
+
+
+@login_required
+@permission_required(['tracker.view_llc', 'tracker.view_payment'], login_url='/login/', raise_exception=True)
+@conditional_page(LLC, Property, Payment, daily=True) # Rollups follow payments and property obligations
+def llc_statement(request, pk):
+    """
+    An LLC's monthly income, obligations and net cash flow, by year, as HTML,
+    CSV (?format=csv) or PDF (?format=pdf). Built from MonthlyRollup rows only.
+    """
+    llc = get_object_or_404(LLC, pk=pk)
+    this_year = datetime.date.today().year
+    form = StatementForm(request.GET or {'start_year': this_year, 'end_year': this_year})
+    data = None
+    if form.is_valid():
+        data = statement(llc, form.cleaned_data['start_year'], form.cleaned_data['end_year'])
+
+    export_format = request.GET.get('format', 'html')
+    if export_format != 'html':
+        if data is None:
+            return HttpResponseBadRequest(f"Invalid statement options: {form.errors.as_text()}")
+        filename = f"statement-{slugify(llc.name)}-{form.cleaned_data['start_year']}-{form.cleaned_data['end_year']}"
+        if export_format == 'csv':
+            return _stream_csv(filename, STATEMENT_HEADER, statement_rows(data))
+        if export_format == 'pdf':
+            if SimpleDocTemplate is None:
+                return HttpResponse("PDF statements require the reportlab package.", status=501)
+            return _statement_pdf(filename, f"{llc.name} statement", statement_rows(data))
+        return HttpResponseBadRequest(f"Unknown statement format: {export_format}")
+
+    context = {
+        'llc': llc,
+        'form': form,
+        'statement': data,
+    }
+    return render(request, 'tracker/llc_statement.html', context)
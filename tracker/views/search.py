@@ -0,0 +1,36 @@
+# tracker/views/search.py
+from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.urls import reverse
+
+from ..models import SearchDocument
+from ..permissions import permission_snapshot
+from ..search import search as run_search
+
+# Result kind -> (view permission, edit permission, edit URL name)
+KIND_PERMISSIONS = {
+    SearchDocument.Kind.TENANT: ('tracker.view_tenant', 'tracker.change_tenant', 'tracker:tenant_edit'),
+    SearchDocument.Kind.PROPERTY: ('tracker.view_property', 'tracker.change_property', 'tracker:property_edit'),
+    SearchDocument.Kind.PAYMENT: ('tracker.view_payment', 'tracker.change_payment', 'tracker:payment_edit'),
+}
+
+
+@login_required
+def search(request):
+    """
+    Searches tenants, properties and payments at once. Results are limited to
+    the kinds of records the user is allowed to view.
+    """
+    query = request.GET.get('q', '').strip()
+    perms = permission_snapshot(request)
+    kinds = [kind for kind, (view_perm, _, _) in KIND_PERMISSIONS.items() if perms.has_perm(view_perm)]
+    results = []
+    for document in run_search(query, kinds=kinds):
+        _, change_perm, edit_url = KIND_PERMISSIONS[document.kind]
+        results.append({
+            'document': document,
+            'kind': SearchDocument.Kind(document.kind).label,
+            'url': reverse(edit_url, args=[document.object_id]) if perms.has_perm(change_perm) else None,
+        })
+    context = {'query': query, 'results': results}
+    return render(request, 'tracker/search.html', context)
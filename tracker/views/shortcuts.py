@@ -0,0 +1,40 @@
+# tracker/views/shortcuts.py
+from django.shortcuts import render
+
+from ..fragments import Fragment
+from ..permissions import permission_snapshot
+
+
+async def aload_user(request):
+    """
+    Resolves request.user and all their permissions with the async API.
+
+    The auth context processor gives templates the request's lazy user, and
+    `perms` looks permissions up on it, both with synchronous queries that
+    Django refuses to run inside the event loop. Once this has run, they are
+    answered from memory (as is permission_snapshot()).
+    """
+    user = await request.auser()
+    await user.aget_all_permissions() # Fills the permission caches has_perm() reads
+    request.user = user
+    return user
+
+
+async def arender(request, template_name, context=None):
+    """
+    render() for async views. Everything the template reads must already be
+    in memory (lists, not querysets).
+    """
+    await aload_user(request)
+    return render(request, template_name, context)
+
+
+async def alist_fragment(request, name, models, perms, vary_on=()):
+    """
+    The Fragment for a list page's table (see tracker/fragments.py). Its rows
+    show buttons depending on the viewer's `perms` (codenames), so cached
+    HTML is shared only between viewers who'd see the same buttons.
+    """
+    await aload_user(request)
+    snapshot = permission_snapshot(request)
+    return Fragment(name, models, vary_on, row_vary_on=[snapshot.has_perm(f'tracker.{perm}') for perm in perms])
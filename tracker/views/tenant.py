@@ -4,16 +4,30 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
 from django.db.models import ProtectedError
 
-from ..models import Tenant
+from ..models import LLC, Property, Tenant
 from ..forms import TenantForm
+from .conditional import conditional_page
+from .shortcuts import alist_fragment, arender
+
+# Permissions that change what the tenant table shows
+TENANT_LIST_PERMS = ('add_tenant', 'change_tenant', 'delete_tenant')
 
 # Tenants view
 @login_required
 @permission_required('tracker.view_tenant', login_url='/login/', raise_exception=True)
-def tenant_list(request):
-    tenants = Tenant.objects.all().order_by('last_name', 'first_name')
-    context = {'tenants': tenants}
-    return render(request, 'tracker/tenant_list.html', context)
+@conditional_page(Tenant, Property, LLC)
+async def tenant_list(request):
+    """Displays all tenants; the table is cached until a tenant, property or LLC changes."""
+    table = await alist_fragment(request, 'tenant_list', [Tenant, Property, LLC], TENANT_LIST_PERMS)
+    rows = []
+    if not await table.aload():
+        tenants = Tenant.objects.select_related('property__llc').order_by('last_name', 'first_name')
+        rows = [tenant async for tenant in tenants.aiterator()]
+        await table.aload_rows([tenant.pk for tenant in rows])
+    context = {'tenants': rows, 'table': table}
+    response = await arender(request, 'tracker/tenant_list.html', context)
+    await table.asave()
+    return response
 
 
 # --- Tenant CRUD Views ---